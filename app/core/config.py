@@ -1,4 +1,7 @@
 import os
+
+from typing import List
+
 from pydantic_settings import BaseSettings,SettingsConfigDict
 
 # Get the current file's directory
@@ -22,6 +25,51 @@ class Settings(BaseSettings) :
     CLOUDINARY_CLOUD_NAME: str = "default_cloudinary_cloud_name" # use env var
     ADMIN_EMAIL: str = "default_admin_email" # use env file
     MAX_FILE_SIZE_MB: int = 10 # use env file
+    CLERK_JWKS_URL: str = "https://api.clerk.com/v1/jwks" # use env file
+    CLERK_JWKS_TTL_SECONDS: int = 3600 # use env file
+    CLERK_JWKS_MIN_REFRESH_SECONDS: int = 30 # use env file
+    CLERK_JWT_LEEWAY_SECONDS: int = 5 # use env file
+    CLERK_AUTHORIZED_PARTIES: List[str] = [] # use env file
+    CLERK_USER_CACHE_TTL_SECONDS: int = 300 # use env file
+    CLERK_USER_CACHE_MAX_ENTRIES: int = 10000 # use env file
+    ADMIN_ROLE_CACHE_TTL_SECONDS: int = 60 # use env file
+    USER_SYNC_MAX_RECORDS: int = 5000 # use env file
+    USER_SYNC_BATCH_SIZE: int = 500 # use env file
+    PAGE_SIZE_DEFAULT: int = 50 # use env file
+    PAGE_SIZE_MAX: int = 200 # use env file
+    MESSAGE_PAGE_SIZE_DEFAULT: int = 50 # use env file
+    CONVERSATION_PREVIEW_LENGTH: int = 120 # use env file
+    MESSAGE_BATCH_SIZE: int = 256 # use env file
+    MESSAGE_BATCH_LINGER_MS: int = 5 # use env file
+    MESSAGE_QUEUE_MAX: int = 10000 # use env file
+    MESSAGE_WRITE_CONCURRENCY: int = 4 # use env file
+    MESSAGE_SYNC_MAX: int = 500 # use env file
+    SOCKET_MANAGER: str = "single" # use env file
+    SOCKET_EVENTS_CAPPED_BYTES: int = 16777216 # use env file
+    SOCKET_PRESENCE_HEARTBEAT_SECONDS: int = 30 # use env file
+    ACTIVITY_TICK_MS: int = 250 # use env file
+    ACTIVITY_MAX_LATENCY_MS: int = 1000 # use env file
+    SONG_POOL_SIZE: int = 120 # use env file
+    SONG_POOL_REFRESH_SECONDS: int = 300 # use env file
+    TRENDING_HALF_LIFE_SECONDS: int = 21600 # use env file
+    TRENDING_FLUSH_SECONDS: int = 10 # use env file
+    TRENDING_TOP_K: int = 50 # use env file
+    TRENDING_MAX_PENDING_SONGS: int = 50000 # use env file
+    SEARCH_LIMIT_DEFAULT: int = 20 # use env file
+    SEARCH_LIMIT_MAX: int = 50 # use env file
+    ALBUM_BATCH_MAX: int = 50 # use env file
+    RECOMMENDATION_TOP_N: int = 20 # use env file
+    RECOMMENDATION_WINDOW_DAYS: int = 180 # use env file
+    RECOMMENDATION_FLUSH_SECONDS: int = 30 # use env file
+    RECOMMENDATION_REBUILD_SECONDS: int = 3600 # use env file
+    RECOMMENDATION_MAX_PENDING_PLAYS: int = 50000 # use env file
+    RESPONSE_CACHE_MAX_BYTES: int = 33554432 # use env file
+    RESPONSE_CACHE_MAX_ENTRIES: int = 10000 # use env file
+    RESPONSE_CACHE_TTL_SECONDS: int = 600 # use env file
+    CATALOG_VERSION_SYNC_SECONDS: int = 5 # use env file
+    COUNTERS_RECONCILE_SECONDS: int = 3600 # use env file
+    ANALYTICS_FLUSH_SECONDS: int = 10 # use env file
+    ANALYTICS_MAX_POINTS: int = 10000 # use env file
 
     @property
     def MONGO_URI(self) -> str:
@@ -0,0 +1,192 @@
+import time
+
+import asyncio
+
+import jwt
+import httpx
+
+from typing import Dict, List, Optional
+
+from fastapi import Request
+
+from app.core.config import Settings
+from app.schemas.auth import SessionClaims
+from app.errors.exceptions import InvalidSessionTokenError
+
+
+class JWKSCache():
+    """Async cache of Clerk's signing keys, indexed by ``kid``.
+
+    Keys are served from memory until ``ttl_seconds`` elapse. A stale key set
+    keeps being served while a single refresh runs in the background, and an
+    unknown ``kid`` (key rotation) forces a refresh, rate limited by
+    ``min_refresh_seconds`` so forged tokens cannot hammer the JWKS endpoint.
+    """
+
+    def __init__(self, jwks_url: str, secret_key: str, ttl_seconds: int, min_refresh_seconds: int):
+        self.jwks_url = jwks_url
+        self.secret_key = secret_key
+        self.ttl_seconds = ttl_seconds
+        self.min_refresh_seconds = min_refresh_seconds
+        self._keys: Dict[str, jwt.PyJWK] = dict()
+        self._fetched_at: float = 0.0
+        self._last_attempt_at: float = 0.0
+        self._lock: asyncio.Lock = asyncio.Lock()
+        self._refresh_task: Optional[asyncio.Task] = None
+
+    def _is_fresh(self) -> bool:
+        return bool(self._keys) and (time.monotonic() - self._fetched_at) < self.ttl_seconds
+
+    async def _fetch_keys(self) -> Dict[str, jwt.PyJWK]:
+        headers = {"Authorization": f"Bearer {self.secret_key}"}
+        async with httpx.AsyncClient(timeout=10.0) as client:
+            response = await client.get(self.jwks_url, headers=headers)
+            response.raise_for_status()
+            jwks: dict = response.json()
+
+        keys: Dict[str, jwt.PyJWK] = dict()
+        for jwk in jwks.get("keys", []):
+            kid: Optional[str] = jwk.get("kid")
+            if kid and jwk.get("use", "sig") == "sig":
+                keys[kid] = jwt.PyJWK(jwk)
+
+        return keys
+
+    async def refresh(self, force: bool = False) -> None:
+        async with self._lock:
+            # Another coroutine may have refreshed while we waited for the lock.
+            if not force and self._is_fresh():
+                return None
+
+            now = time.monotonic()
+            if force and (now - self._last_attempt_at) < self.min_refresh_seconds:
+                return None
+
+            self._last_attempt_at = now
+            keys = await self._fetch_keys()
+
+            if keys:
+                self._keys = keys
+                self._fetched_at = time.monotonic()
+
+        return None
+
+    def _refresh_in_background(self) -> None:
+        if self._refresh_task and not self._refresh_task.done():
+            return None
+        self._refresh_task = asyncio.create_task(self._safe_refresh())
+        return None
+
+    async def _safe_refresh(self, force: bool = False) -> None:
+        try :
+            await self.refresh(force=force)
+        except Exception as err :
+            print("jwks_refresh_failed",err) # keep serving the previous key set
+
+    async def get_key(self, kid: str) -> jwt.PyJWK:
+        if not self._keys:
+            await self.refresh()
+        elif not self._is_fresh():
+            self._refresh_in_background()
+
+        key: Optional[jwt.PyJWK] = self._keys.get(kid)
+
+        if not key:
+            await self._safe_refresh(force=True)
+            key = self._keys.get(kid)
+
+        if not key:
+            raise InvalidSessionTokenError("Invalid session token - unknown signing key")
+
+        return key
+
+    async def _refresh_loop(self) -> None:
+        # Refresh a little before expiry so requests never wait on the network.
+        interval = max(self.ttl_seconds * 0.8, self.min_refresh_seconds)
+        while True:
+            await asyncio.sleep(interval)
+            await self._safe_refresh(force=True)
+
+    async def start(self) -> None:
+        await self._safe_refresh()
+        if not self._refresh_task or self._refresh_task.done():
+            self._refresh_task = asyncio.create_task(self._refresh_loop())
+        return None
+
+    async def stop(self) -> None:
+        if self._refresh_task:
+            self._refresh_task.cancel()
+            self._refresh_task = None
+        return None
+
+
+class SessionTokenVerifier():
+    _instance = None
+    _initialized = False
+
+    def __new__(cls, *args, **kwargs) :
+        if not cls._instance :
+            cls._instance = super(SessionTokenVerifier,cls).__new__(cls)
+        return cls._instance
+
+    def __init__(self, settings: Settings):
+        if SessionTokenVerifier._initialized :
+            return
+        self.jwks_cache: JWKSCache = JWKSCache(
+            jwks_url=settings.CLERK_JWKS_URL,
+            secret_key=settings.CLERK_SECRET_KEY,
+            ttl_seconds=settings.CLERK_JWKS_TTL_SECONDS,
+            min_refresh_seconds=settings.CLERK_JWKS_MIN_REFRESH_SECONDS,
+        )
+        self.leeway_seconds: int = settings.CLERK_JWT_LEEWAY_SECONDS
+        self.authorized_parties: List[str] = settings.CLERK_AUTHORIZED_PARTIES
+        SessionTokenVerifier._initialized = True
+
+    @staticmethod
+    def extract_token(request: Request) -> Optional[str]:
+        authorization: Optional[str] = request.headers.get("Authorization")
+        if authorization:
+            scheme, _, token = authorization.partition(" ")
+            if scheme.lower() == "bearer" and token.strip():
+                return token.strip()
+
+        return request.cookies.get("__session")
+
+    async def verify(self, token: str) -> SessionClaims:
+        try :
+            header: dict = jwt.get_unverified_header(token)
+        except jwt.PyJWTError as jwt_err :
+            raise InvalidSessionTokenError("Invalid session token - malformed header") from jwt_err
+
+        kid: Optional[str] = header.get("kid")
+        if not kid:
+            raise InvalidSessionTokenError("Invalid session token - missing key id")
+
+        signing_key: jwt.PyJWK = await self.jwks_cache.get_key(kid)
+
+        try :
+            payload: dict = jwt.decode(
+                token,
+                key=signing_key.key,
+                algorithms=["RS256"],
+                leeway=self.leeway_seconds,
+                options={"require": ["exp", "iat", "sub"]},
+            )
+        except jwt.ExpiredSignatureError as jwt_err :
+            raise InvalidSessionTokenError("Invalid session token - token expired") from jwt_err
+        except jwt.PyJWTError as jwt_err :
+            raise InvalidSessionTokenError(f"Invalid session token - {jwt_err}") from jwt_err
+
+        authorized_party: Optional[str] = payload.get("azp")
+        if self.authorized_parties and authorized_party not in self.authorized_parties:
+            raise InvalidSessionTokenError("Invalid session token - unauthorized party")
+
+        return SessionClaims(**payload)
+
+    async def start(self) -> None:
+        await self.jwks_cache.start()
+        return None
+
+    async def stop(self) -> None:
+        await self.jwks_cache.stop()
+        return None
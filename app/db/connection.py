@@ -1,4 +1,5 @@
 from app.core.config import Settings
+from app.db.indexes import ensure_indexes, index_report
 from motor.motor_asyncio import AsyncIOMotorClient,AsyncIOMotorDatabase,AsyncIOMotorCollection
 
 class DatabaseConnection() :
@@ -19,10 +20,31 @@ class DatabaseConnection() :
         self.albums: AsyncIOMotorCollection = self.db.get_collection("albums")
         self.songs: AsyncIOMotorCollection = self.db.get_collection("songs")
         self.messages: AsyncIOMotorCollection = self.db.get_collection("messages")
+        self.song_scores: AsyncIOMotorCollection = self.db.get_collection("song_scores")
+        self.listens: AsyncIOMotorCollection = self.db.get_collection("listens")
+        self.catalog_versions: AsyncIOMotorCollection = self.db.get_collection("catalog_versions")
+        self.counters: AsyncIOMotorCollection = self.db.get_collection("counters")
+        self.artist_refs: AsyncIOMotorCollection = self.db.get_collection("artist_refs")
+        self.rollups: AsyncIOMotorCollection = self.db.get_collection("rollups")
+        self.conversations: AsyncIOMotorCollection = self.db.get_collection("conversations")
+        self.presence: AsyncIOMotorCollection = self.db.get_collection("presence")
+        self.presence_users: AsyncIOMotorCollection = self.db.get_collection("presence_users")
+        self.socket_events: AsyncIOMotorCollection = self.db.get_collection("socket_events")
         DatabaseConnection._initialized = True
 
     async def create_index(self) -> None:
-        await self.users.create_index([("email", 1)], unique=True)
+        await ensure_indexes(self.db)
+        return None
+
+    async def sync_indexes(self) -> None:
+        # Runs in the background at startup, queries work (slower) until it is done.
+        try :
+            failed = await ensure_indexes(self.db)
+            report: dict = await index_report(self.db)
+            if failed or report['missing'] or report['unused']:
+                print("index_report",{"failed": failed, **report})
+        except Exception as err :
+            print("index_sync_failed",err)
         return None
 
     def close_connection(self) :
@@ -0,0 +1,220 @@
+import sys
+
+import asyncio
+
+from bson import ObjectId
+
+from typing import Awaitable, Callable, Dict, List, NamedTuple, Tuple
+
+from datetime import datetime, timezone
+
+from pymongo.errors import OperationFailure, PyMongoError
+
+from motor.motor_asyncio import AsyncIOMotorDatabase
+
+from app.utils.utils import encode_page_cursor, keyset_page_filter
+
+
+class IndexSpec(NamedTuple):
+    collection: str
+    keys: Tuple[Tuple[str, int], ...]
+    unique: bool = False
+    used_by: str = ""
+
+
+INDEX_OPTIONS_CONFLICT = 85
+
+
+# Every index a service query relies on. Keep in sync with QUERY_PLANS below.
+INDEXES: List[IndexSpec] = [
+    IndexSpec("users", (("email", 1),), unique=True, used_by="AuthService.auth_callback"),
+    IndexSpec("users", (("clerk_id", 1),), unique=True, used_by="AuthService.auth_callback, AuthService.sync_users"),
+    IndexSpec("songs", (("created_at", 1), ("_id", 1)), used_by="SongService.fetch_all_songs"),
+    IndexSpec("songs", (("title_key", 1),), used_by="SongService.fetch_song_by_name"),
+    IndexSpec("songs", (("album_id", 1), ("created_at", 1)), used_by="AlbumService.fetch_album_by_id $lookup"),
+    IndexSpec("albums", (("created_at", 1), ("_id", 1)), used_by="AlbumService.fetch_all_albums"),
+    IndexSpec("albums", (("title_key", 1),), used_by="AlbumService.fetch_album_by_name"),
+    IndexSpec("messages", (("conversation_id", 1), ("created_at", 1), ("_id", 1)), used_by="UserService.fetch_messages"),
+    IndexSpec("messages", (("receiver_id", 1), ("created_at", 1), ("_id", 1)), used_by="SocketService.sync_messages"),
+    IndexSpec("conversations", (("user_id", 1), ("peer_id", 1)), unique=True, used_by="MessageWriter._write_batch, SocketService.mark_read"),
+    IndexSpec("conversations", (("user_id", 1), ("last_message_at", -1), ("_id", -1)), used_by="UserService.fetch_conversations"),
+    IndexSpec("presence", (("user_id", 1),), used_by="MongoPresenceStore.set_activity, MongoPresenceStore.online_user_ids"),
+    IndexSpec("presence", (("worker_id", 1),), used_by="MongoPresenceStore._heartbeat_loop, MongoPresenceStore._remove_own_sids"),
+    IndexSpec("presence", (("seen_at", 1),), used_by="MongoPresenceStore._reap"),
+    IndexSpec("song_scores", (("updated_at", 1),), used_by="TrendingService._compute_top"),
+    IndexSpec("listens", (("user_id", 1), ("song_id", 1)), unique=True, used_by="RecommendationService.flush"),
+    IndexSpec("listens", (("last_played_at", 1),), used_by="RecommendationService.rebuild"),
+    IndexSpec("catalog_versions", (("updated_at", 1),), used_by="CatalogVersions.sync"),
+    IndexSpec("rollups", (("metric", 1), ("start", 1)), unique=True, used_by="AnalyticsService.flush, AnalyticsService.fetch_timeseries"),
+]
+
+
+async def ensure_indexes(db: AsyncIOMotorDatabase) -> List[str]:
+    # create_index is a no-op for an index that already exists with the same options.
+    failed: List[str] = []
+    for index in INDEXES:
+        try :
+            await db.get_collection(index.collection).create_index(list(index.keys), unique=index.unique)
+        except PyMongoError as err :
+            # Same keys with other options on the server: never rebuilt at startup, that is a job for app/db/migrations.py.
+            is_conflict: bool = isinstance(err, OperationFailure) and err.code == INDEX_OPTIONS_CONFLICT
+            print("index_options_conflict" if is_conflict else "index_create_failed",index.collection,index.keys,err)
+            failed.append(f"{index.collection}.{index.keys}")
+    return failed
+
+
+async def index_report(db: AsyncIOMotorDatabase) -> dict:
+    """Registered indexes that are missing, and existing ones with no use.
+
+    Usage comes from ``$indexStats`` and only covers accesses since the
+    last mongod restart.
+    """
+    missing: List[dict] = []
+    unused: List[dict] = []
+    unregistered: List[dict] = []
+
+    for collection_name in sorted({ index.collection for index in INDEXES }):
+        collection = db.get_collection(collection_name)
+        registered_keys = { index.keys for index in INDEXES if index.collection == collection_name }
+
+        existing_keys: Dict[Tuple[Tuple[str, int], ...], str] = dict()
+        async for index_info in collection.list_indexes():
+            existing_keys[tuple((field, int(order)) for field, order in index_info['key'].items())] = index_info['name']
+
+        for keys in registered_keys - existing_keys.keys():
+            missing.append({"collection": collection_name, "keys": keys})
+
+        for keys, name in existing_keys.items():
+            if name != "_id_" and keys not in registered_keys:
+                unregistered.append({"collection": collection_name, "name": name})
+
+        async for index_stats in collection.aggregate([{"$indexStats": {}}]):
+            if index_stats['name'] != "_id_" and index_stats['accesses']['ops'] == 0:
+                unused.append({"collection": collection_name, "name": index_stats['name'], "since": index_stats['accesses']['since']})
+
+    return {"missing": missing, "unused": unused, "unregistered": unregistered}
+
+
+def plan_stages(explain_result: dict) -> List[str]:
+    # Walks the winning plan only, including OR branches, the slot based
+    # engine's queryPlan and the per stage plans of aggregations.
+    stages: List[str] = []
+
+    def walk(node: object) -> None:
+        if isinstance(node, dict):
+            if isinstance(node.get('stage'), str):
+                stages.append(node['stage'])
+            if node.get('collectionScans'):
+                stages.append("COLLSCAN")
+            for key, value in node.items():
+                if key not in ("rejectedPlans", "allPlansExecution"):
+                    walk(value)
+        elif isinstance(node, list):
+            for item in node:
+                walk(item)
+
+    walk(explain_result.get('queryPlanner', {}).get('winningPlan', {}))
+    walk(explain_result.get('stages', []))
+    walk(explain_result.get('executionStats', {}).get('executionStages', {}))
+    return stages
+
+
+def summarize_plan(explain_result: dict) -> dict:
+    execution_stats: dict = explain_result.get('executionStats', {})
+    winning_plan: dict = explain_result.get('queryPlanner', {}).get('winningPlan', {})
+    # Plans executed by the slot based engine nest the classic tree one level down.
+    winning_plan = winning_plan.get('queryPlan', winning_plan)
+
+    stages: List[str] = []
+    while winning_plan:
+        stages.append(winning_plan.get('stage'))
+        winning_plan = winning_plan.get('inputStage', {})
+
+    return {
+        "stages": stages,
+        "docsExamined": execution_stats.get('totalDocsExamined'),
+        "keysExamined": execution_stats.get('totalKeysExamined'),
+        "millis": execution_stats.get('executionTimeMillis'),
+    }
+
+
+def _explain_aggregate(db: AsyncIOMotorDatabase, collection: str, pipeline: List[dict]) -> Awaitable[dict]:
+    return db.command({"explain": {"aggregate": collection, "pipeline": pipeline, "cursor": {}}, "verbosity": "executionStats"})
+
+
+async def _explain_sync(db: AsyncIOMotorDatabase, last_seen: str) -> dict:
+    # Imported here, the socket service depends on the connection that imports this module.
+    from app.services.socket import sync_filter
+
+    message_filter: dict = {"receiver_id": "user_0", **await sync_filter(db.messages, last_seen)}
+    return await db.messages.find(message_filter).sort([("created_at", 1), ("_id", 1)]).limit(501).explain()
+
+
+# Filters come from the same helpers the services use, so a plan here is the plan they get.
+PLAN_AT: datetime = datetime(2024, 1, 1, tzinfo=timezone.utc)
+PLAN_CURSOR: str = encode_page_cursor(PLAN_AT, ObjectId.from_datetime(PLAN_AT))
+
+
+# One entry per hot service query, with representative arguments.
+QUERY_PLANS: Dict[str, Callable[[AsyncIOMotorDatabase], Awaitable[dict]]] = {
+    "users.by_clerk_id": lambda db: db.users.find({"clerk_id": "user_0"}).explain(),
+    "users.by_email": lambda db: db.users.find({"email": "user@example.com"}).explain(),
+    "songs.page": lambda db: db.songs.find({}).sort([("created_at", 1), ("_id", 1)]).limit(51).explain(),
+    "songs.page_after": lambda db: db.songs.find(keyset_page_filter(PLAN_CURSOR)).sort([("created_at", 1), ("_id", 1)]).limit(51).explain(),
+    "songs.title_prefix": lambda db: db.songs.find({"title_key": {"$gte": "a", "$lt": "b"}}).sort([("title_key", 1)]).limit(20).explain(),
+    "songs.by_album": lambda db: db.songs.find({"album_id": None}).sort([("created_at", 1)]).explain(),
+    "albums.page": lambda db: db.albums.find({}).sort([("created_at", 1), ("_id", 1)]).limit(51).explain(),
+    "albums.page_after": lambda db: db.albums.find(keyset_page_filter(PLAN_CURSOR)).sort([("created_at", 1), ("_id", 1)]).limit(51).explain(),
+    "albums.title_prefix": lambda db: db.albums.find({"title_key": {"$gte": "a", "$lt": "b"}}).sort([("title_key", 1)]).limit(20).explain(),
+    "albums.detail": lambda db: _explain_aggregate(db, "albums", [
+        {"$match": {"_id": None}},
+        {"$lookup": {"from": "songs", "localField": "_id", "foreignField": "album_id", "pipeline": [{"$sort": {"created_at": 1}}], "as": "song_docs"}},
+    ]),
+    "messages.conversation": lambda db: db.messages.find({"conversation_id": "user_0:user_1"}).sort([("created_at", -1), ("_id", -1)]).limit(51).explain(),
+    "messages.conversation_before": lambda db: db.messages.find({"conversation_id": "user_0:user_1", **keyset_page_filter(PLAN_CURSOR, descending=True)}).sort([("created_at", -1), ("_id", -1)]).limit(51).explain(),
+    "messages.sync": lambda db: _explain_sync(db, PLAN_CURSOR),
+    "messages.sync_since": lambda db: _explain_sync(db, PLAN_AT.isoformat()),
+    "conversations.by_peer": lambda db: db.conversations.find({"user_id": "user_0", "peer_id": "user_1"}).explain(),
+    "conversations.inbox": lambda db: db.conversations.find({"user_id": "user_0"}).sort([("last_message_at", -1), ("_id", -1)]).limit(51).explain(),
+    "conversations.inbox_after": lambda db: db.conversations.find({"user_id": "user_0", **keyset_page_filter(PLAN_CURSOR, descending=True, field='last_message_at')}).sort([("last_message_at", -1), ("_id", -1)]).limit(51).explain(),
+    "song_scores.recent": lambda db: db.song_scores.find({"updated_at": {"$gte": datetime(2024, 1, 1, tzinfo=timezone.utc)}}).explain(),
+    "listens.by_user_song": lambda db: db.listens.find({"user_id": "user_0", "song_id": None}).explain(),
+    "listens.window": lambda db: db.listens.find({"last_played_at": {"$gte": datetime(2024, 1, 1, tzinfo=timezone.utc)}}).explain(),
+    "catalog_versions.changed": lambda db: db.catalog_versions.find({"updated_at": {"$gte": datetime(2024, 1, 1, tzinfo=timezone.utc)}}).explain(),
+    "rollups.range": lambda db: db.rollups.find({"metric": "messages_sent", "start": {"$gte": datetime(2024, 1, 1, tzinfo=timezone.utc)}}).explain(),
+}
+
+
+async def check_query_plans(db: AsyncIOMotorDatabase) -> Dict[str, List[str]]:
+    collection_scans: Dict[str, List[str]] = dict()
+    for name, explain in QUERY_PLANS.items():
+        stages: List[str] = plan_stages(await explain(db))
+        if "COLLSCAN" in stages:
+            collection_scans[name] = stages
+    return collection_scans
+
+
+async def main() -> int:
+    # Plan regression check, meant for a local mongod: python -m app.db.indexes
+    from app.core.config import Settings
+    from app.db.connection import DatabaseConnection
+
+    db_instance: DatabaseConnection = DatabaseConnection(settings=Settings())
+
+    try :
+        failed: List[str] = await ensure_indexes(db_instance.db)
+        print("index report", await index_report(db_instance.db))
+
+        collection_scans: Dict[str, List[str]] = await check_query_plans(db_instance.db)
+        for name, stages in collection_scans.items():
+            print("COLLSCAN", name, stages)
+        print(f"{len(QUERY_PLANS) - len(collection_scans)}/{len(QUERY_PLANS)} query plans use an index")
+
+        return 1 if collection_scans or failed else 0
+
+    finally :
+        db_instance.close_connection()
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
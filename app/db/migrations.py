@@ -0,0 +1,148 @@
+import re
+import sys
+
+import asyncio
+
+from typing import Callable, Dict, List
+
+from pymongo import UpdateOne
+
+from motor.motor_asyncio import AsyncIOMotorCollection
+
+from app.core.config import Settings
+from app.db.connection import DatabaseConnection
+from app.db.indexes import summarize_plan
+from app.utils.utils import conversation_id, normalize_search_key, prefix_range_filter
+
+
+async def backfill_search_keys(db_instance: DatabaseConnection, batch_size: int = 500) -> Dict[str, int]:
+    updated_counts: Dict[str, int] = dict()
+
+    collections: Dict[str, AsyncIOMotorCollection] = {"songs": db_instance.songs, "albums": db_instance.albums}
+
+    for name, collection in collections.items():
+        updated_counts[name] = 0
+        operations: List[UpdateOne] = []
+
+        async for doc in collection.find({"title_key": {"$exists": False}}, {"title": 1}):
+            operations.append(UpdateOne({"_id": doc['_id']}, {"$set": {"title_key": normalize_search_key(doc['title'])}}))
+
+            if len(operations) >= batch_size:
+                await collection.bulk_write(operations, ordered=False)
+                updated_counts[name] += len(operations)
+                operations = []
+
+        if operations:
+            await collection.bulk_write(operations, ordered=False)
+            updated_counts[name] += len(operations)
+
+    return updated_counts
+
+
+async def backfill_conversation_ids(db_instance: DatabaseConnection, batch_size: int = 500) -> int:
+    updated_count: int = 0
+    operations: List[UpdateOne] = []
+
+    projection = {"sender_id": 1, "receiver_id": 1}
+    async for message_doc in db_instance.messages.find({"conversation_id": {"$exists": False}}, projection):
+        operations.append(UpdateOne(
+            {"_id": message_doc['_id']},
+            {"$set": {"conversation_id": conversation_id(message_doc['sender_id'], message_doc['receiver_id'])}}
+        ))
+
+        if len(operations) >= batch_size:
+            await db_instance.messages.bulk_write(operations, ordered=False)
+            updated_count += len(operations)
+            operations = []
+
+    if operations:
+        await db_instance.messages.bulk_write(operations, ordered=False)
+        updated_count += len(operations)
+
+    return updated_count
+
+
+async def backfill_conversations(db_instance: DatabaseConnection, preview_length: int) -> int:
+    # History predating the summaries is treated as read; live summaries win.
+    pipeline = [
+        {"$sort": {"created_at": 1, "_id": 1}},
+        {"$project": {
+            "conversation_id": 1,
+            "last_message": {
+                "_id": "$_id",
+                "sender_id": "$sender_id",
+                "content": {"$substrCP": ["$content", 0, preview_length]},
+                "created_at": "$created_at",
+            },
+            "sides": [
+                {"user_id": "$sender_id", "peer_id": "$receiver_id"},
+                {"user_id": "$receiver_id", "peer_id": "$sender_id"},
+            ],
+        }},
+        {"$unwind": "$sides"},
+        {"$group": {
+            "_id": {"user_id": "$sides.user_id", "peer_id": "$sides.peer_id"},
+            "conversation_id": {"$last": "$conversation_id"},
+            "last_message": {"$last": "$last_message"},
+        }},
+        {"$project": {
+            "_id": 0,
+            "user_id": "$_id.user_id",
+            "peer_id": "$_id.peer_id",
+            "conversation_id": 1,
+            "last_message": 1,
+            "last_message_at": "$last_message.created_at",
+            "unread": {"$literal": 0},
+        }},
+        {"$merge": {"into": "conversations", "on": ["user_id", "peer_id"], "whenMatched": "keepExisting", "whenNotMatched": "insert"}},
+    ]
+
+    await db_instance.messages.aggregate(pipeline=pipeline).to_list(length=None)
+
+    return await db_instance.conversations.count_documents({})
+
+
+async def compare_search_plans(db_instance: DatabaseConnection, name: str, limit: int = 20) -> Dict[str, dict]:
+    escaped = re.escape(name)
+    search_key: str = normalize_search_key(name)
+
+    queries: Dict[str, Callable] = {
+        "regex": lambda collection: collection.find({'title': { '$regex': f'^{escaped}', '$options': 'i' }}),
+        "title_key": lambda collection: collection.find(prefix_range_filter('title_key', search_key)).sort([("title_key", 1)]).limit(limit),
+    }
+
+    plans: Dict[str, dict] = dict()
+    for collection_name, collection in {"songs": db_instance.songs, "albums": db_instance.albums}.items():
+        for query_name, build_query in queries.items():
+            explain_result: dict = await build_query(collection).explain()
+            plans[f"{collection_name}.{query_name}"] = summarize_plan(explain_result)
+
+    return plans
+
+
+async def main(argv: List[str]) -> None:
+    settings: Settings = Settings()
+    db_instance: DatabaseConnection = DatabaseConnection(settings=settings)
+
+    try :
+        await db_instance.create_index()
+
+        updated_counts: Dict[str, int] = await backfill_search_keys(db_instance=db_instance)
+        print("search keys backfilled", updated_counts)
+
+        updated_messages: int = await backfill_conversation_ids(db_instance=db_instance)
+        print("conversation ids backfilled", updated_messages)
+
+        conversation_count: int = await backfill_conversations(db_instance=db_instance, preview_length=settings.CONVERSATION_PREVIEW_LENGTH)
+        print("conversations backfilled", conversation_count)
+
+        sample_name: str = argv[0] if argv else "a"
+        for query, plan in (await compare_search_plans(db_instance=db_instance, name=sample_name)).items():
+            print(query, plan)
+
+    finally :
+        db_instance.close_connection()
+
+
+if __name__ == "__main__":
+    asyncio.run(main(sys.argv[1:]))
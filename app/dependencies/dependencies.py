@@ -13,21 +13,34 @@ from pydantic import ValidationError
 from fastapi import Depends, Form, Request, HTTPException, status, UploadFile
 
 from app.core.config import Settings
+from app.core.security import SessionTokenVerifier
 from app.db.connection import DatabaseConnection
 from app.schemas.song import SongIn
 from app.schemas.album import AlbumIn
+from app.schemas.auth import SessionClaims
 from app.services.auth import AuthService
 from app.services.admin import AdminService
 from app.services.album import AlbumService
 from app.services.song import SongService
+from app.services.song_pool import SongPool
+from app.services.search import SearchIndex
+from app.services.trending import TrendingService
+from app.services.recommendation import RecommendationService
 from app.services.stat import StatService
 from app.services.user import UserService
 from app.services.socket import SocketService
-from app.errors.exceptions import InternalServerError
+from app.services.message_writer import MessageWriter
+from app.services.activity import ActivityAggregator
+from app.services.presence import LocalPresenceStore, MongoPresenceStore
+from app.services.clerk_user import ClerkUserCache
+from app.services.response_cache import ResponseCache
+from app.services.catalog_version import CatalogVersions
+from app.services.counter import CatalogCounters
+from app.services.analytics import AnalyticsService
+from app.errors.exceptions import InternalServerError, InvalidSessionTokenError
 
 from clerk_backend_api import Clerk
 from clerk_backend_api.models.user import User as ClerkUser
-from clerk_backend_api.jwks_helpers import AuthenticateRequestOptions, RequestState
 
 
 @lru_cache
@@ -37,8 +50,23 @@ def get_settings() -> Settings:
 def get_database_connection(settings: Annotated[Settings, Depends(get_settings)]) -> DatabaseConnection:
     return DatabaseConnection(settings=settings)
 
-def get_auth_service(db_instance: Annotated[DatabaseConnection, Depends(get_database_connection)]) -> AuthService:
-    return AuthService(db_instance=db_instance)
+def get_catalog_counters(
+        settings: Annotated[Settings, Depends(get_settings)],
+        db_instance: Annotated[DatabaseConnection, Depends(get_database_connection)]
+    ) -> CatalogCounters:
+    return CatalogCounters(db_instance=db_instance,settings=settings)
+
+def get_analytics_service() -> AnalyticsService:
+    settings: Settings = get_settings()
+    db_instance: DatabaseConnection = DatabaseConnection(settings=settings)
+    return AnalyticsService(db_instance=db_instance,settings=settings)
+
+def get_auth_service(
+        db_instance: Annotated[DatabaseConnection, Depends(get_database_connection)],
+        catalog_counters: Annotated[CatalogCounters, Depends(get_catalog_counters)],
+        analytics_service: Annotated[AnalyticsService, Depends(get_analytics_service)]
+    ) -> AuthService:
+    return AuthService(db_instance=db_instance,catalog_counters=catalog_counters,analytics_service=analytics_service)
 
 @lru_cache()
 def init_clerk_sdk(secret_key: str) -> Clerk:
@@ -50,20 +78,62 @@ def get_clerk_sdk(settings: Annotated[Settings, Depends(get_settings)]) -> Clerk
     except Exception as err :
         raise InternalServerError() from err
 
-def sync_authenticate_request(request: Request, clerk_sdk: Clerk) -> RequestState:
-    return clerk_sdk.authenticate_request(request=request,options=AuthenticateRequestOptions())
+def get_clerk_user_cache(settings: Annotated[Settings, Depends(get_settings)]) -> ClerkUserCache:
+    return ClerkUserCache(settings=settings)
 
-async def protect_route(request: Request, clerk_sdk: Annotated[Clerk, Depends(get_clerk_sdk)]) -> ClerkUser:
+def get_session_verifier(settings: Annotated[Settings, Depends(get_settings)]) -> SessionTokenVerifier:
+    return SessionTokenVerifier(settings=settings)
+
+async def protect_route_claims(
+        request: Request,
+        session_verifier: Annotated[SessionTokenVerifier, Depends(get_session_verifier)]
+    ) -> SessionClaims:
     try :
-        request_state: RequestState = await asyncio.to_thread(sync_authenticate_request,request,clerk_sdk)
-        if not request_state.is_signed_in :
+        token: str | None = session_verifier.extract_token(request)
+        if not token :
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
-                detail=f"{request_state.message}",
+                detail="Unauthorized - you must be logged in",
             )
 
-        user_id: str = request_state.payload.get("sub")
-        clerk_user: ClerkUser = await clerk_sdk.users.get_async(user_id=user_id)
+        session_claims: SessionClaims = await session_verifier.verify(token)
+
+        return session_claims
+
+    except InvalidSessionTokenError as token_err :
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail=token_err.message,
+        ) from token_err
+
+    except HTTPException as http_err :
+        raise http_err
+
+    except Exception as err :
+        raise InternalServerError() from err
+
+async def optional_route_claims(
+        request: Request,
+        session_verifier: Annotated[SessionTokenVerifier, Depends(get_session_verifier)]
+    ) -> SessionClaims | None:
+    # Public routes that personalize when a valid session is present.
+    try :
+        token: str | None = session_verifier.extract_token(request)
+        if not token :
+            return None
+
+        return await session_verifier.verify(token)
+
+    except Exception :
+        return None
+
+async def protect_route(
+        session_claims: Annotated[SessionClaims, Depends(protect_route_claims)],
+        clerk_sdk: Annotated[Clerk, Depends(get_clerk_sdk)],
+        user_cache: Annotated[ClerkUserCache, Depends(get_clerk_user_cache)]
+    ) -> ClerkUser:
+    try :
+        clerk_user: ClerkUser = await user_cache.get_user(clerk_sdk=clerk_sdk,user_id=session_claims.user_id)
 
         return clerk_user
 
@@ -73,26 +143,29 @@ async def protect_route(request: Request, clerk_sdk: Annotated[Clerk, Depends(ge
     except Exception as err :
         raise InternalServerError() from err
 
-async def require_admin(settings: Annotated[Settings, Depends(get_settings)], clerk_user: Annotated[ClerkUser, Depends(protect_route)]) -> ClerkUser:
-    primary_email_address_id: str | None = clerk_user.primary_email_address_id
+async def require_admin(
+        session_claims: Annotated[SessionClaims, Depends(protect_route_claims)],
+        clerk_sdk: Annotated[Clerk, Depends(get_clerk_sdk)],
+        user_cache: Annotated[ClerkUserCache, Depends(get_clerk_user_cache)]
+    ) -> ClerkUser:
+    try :
+        is_admin: bool = await user_cache.is_admin(clerk_sdk=clerk_sdk,user_id=session_claims.user_id)
 
-    admin_exception = HTTPException(
-        status_code=status.HTTP_403_FORBIDDEN,
-        detail="Unauthorized - you must be an admin",
-    )
+        if not is_admin:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Unauthorized - you must be an admin",
+            )
 
-    if not primary_email_address_id:
-        raise admin_exception
+        clerk_user: ClerkUser = await user_cache.get_user(clerk_sdk=clerk_sdk,user_id=session_claims.user_id)
 
-    primary_email_address = next(
-        (email.email_address for email in clerk_user.email_addresses if email.id == primary_email_address_id),
-        None
-    )
+        return clerk_user
 
-    if primary_email_address != settings.ADMIN_EMAIL:
-        raise admin_exception
+    except HTTPException as http_err :
+        raise http_err
 
-    return clerk_user
+    except Exception as err :
+        raise InternalServerError() from err
 
 def init_cloudinary(settings: Settings) -> None :
     cloudinary.config(
@@ -167,8 +240,58 @@ def custom_file_validation(max_size_mb: int, file_type: str):
 
     return validate_file
 
-def get_admin_service(db_instance: Annotated[DatabaseConnection, Depends(get_database_connection)]) -> AdminService:
-    return AdminService(db_instance=db_instance)
+def get_song_pool(
+        settings: Annotated[Settings, Depends(get_settings)],
+        db_instance: Annotated[DatabaseConnection, Depends(get_database_connection)]
+    ) -> SongPool:
+    return SongPool(db_instance=db_instance,settings=settings)
+
+def get_search_index(db_instance: Annotated[DatabaseConnection, Depends(get_database_connection)]) -> SearchIndex:
+    return SearchIndex(db_instance=db_instance)
+
+def get_response_cache(settings: Annotated[Settings, Depends(get_settings)]) -> ResponseCache:
+    return ResponseCache(settings=settings)
+
+def get_catalog_versions(
+        settings: Annotated[Settings, Depends(get_settings)],
+        db_instance: Annotated[DatabaseConnection, Depends(get_database_connection)],
+        response_cache: Annotated[ResponseCache, Depends(get_response_cache)],
+        search_index: Annotated[SearchIndex, Depends(get_search_index)]
+    ) -> CatalogVersions:
+    return CatalogVersions(db_instance=db_instance,response_cache=response_cache,search_index=search_index,settings=settings)
+
+def get_trending_service() -> TrendingService:
+    settings: Settings = get_settings()
+    db_instance: DatabaseConnection = DatabaseConnection(settings=settings)
+    return TrendingService(db_instance=db_instance,settings=settings)
+
+def get_recommendation_service() -> RecommendationService:
+    settings: Settings = get_settings()
+    db_instance: DatabaseConnection = DatabaseConnection(settings=settings)
+    return RecommendationService(db_instance=db_instance,settings=settings)
+
+def get_admin_service(
+        db_instance: Annotated[DatabaseConnection, Depends(get_database_connection)],
+        song_pool: Annotated[SongPool, Depends(get_song_pool)],
+        trending_service: Annotated[TrendingService, Depends(get_trending_service)],
+        search_index: Annotated[SearchIndex, Depends(get_search_index)],
+        recommendation_service: Annotated[RecommendationService, Depends(get_recommendation_service)],
+        response_cache: Annotated[ResponseCache, Depends(get_response_cache)],
+        catalog_versions: Annotated[CatalogVersions, Depends(get_catalog_versions)],
+        catalog_counters: Annotated[CatalogCounters, Depends(get_catalog_counters)],
+        analytics_service: Annotated[AnalyticsService, Depends(get_analytics_service)]
+    ) -> AdminService:
+    return AdminService(
+        db_instance=db_instance,
+        song_pool=song_pool,
+        trending_service=trending_service,
+        search_index=search_index,
+        recommendation_service=recommendation_service,
+        response_cache=response_cache,
+        catalog_versions=catalog_versions,
+        catalog_counters=catalog_counters,
+        analytics_service=analytics_service
+    )
 
 def extract_album_data(
         title: Annotated[str, Form(title="Title",description="Album's title")],
@@ -188,19 +311,55 @@ def extract_album_data(
     except Exception as err:
         raise InternalServerError() from err
 
-def get_album_service(db_instance: Annotated[DatabaseConnection, Depends(get_database_connection)]) -> AlbumService:
-    return AlbumService(db_instance=db_instance)
-
-def get_song_service(db_instance: Annotated[DatabaseConnection, Depends(get_database_connection)]) -> SongService:
-    return SongService(db_instance=db_instance)
+def get_album_service(
+        db_instance: Annotated[DatabaseConnection, Depends(get_database_connection)],
+        response_cache: Annotated[ResponseCache, Depends(get_response_cache)]
+    ) -> AlbumService:
+    return AlbumService(db_instance=db_instance,response_cache=response_cache)
+
+def get_song_service(
+        db_instance: Annotated[DatabaseConnection, Depends(get_database_connection)],
+        song_pool: Annotated[SongPool, Depends(get_song_pool)],
+        trending_service: Annotated[TrendingService, Depends(get_trending_service)],
+        recommendation_service: Annotated[RecommendationService, Depends(get_recommendation_service)],
+        response_cache: Annotated[ResponseCache, Depends(get_response_cache)]
+    ) -> SongService:
+    return SongService(
+        db_instance=db_instance,
+        song_pool=song_pool,
+        trending_service=trending_service,
+        recommendation_service=recommendation_service,
+        response_cache=response_cache
+    )
 
-def get_stat_service(db_instance: Annotated[DatabaseConnection, Depends(get_database_connection)]) -> StatService:
-    return StatService(db_instance=db_instance)
+def get_stat_service(catalog_counters: Annotated[CatalogCounters, Depends(get_catalog_counters)]) -> StatService:
+    return StatService(catalog_counters=catalog_counters)
 
 def get_user_service(db_instance: Annotated[DatabaseConnection, Depends(get_database_connection)]) -> UserService:
     return UserService(db_instance=db_instance)
 
+def get_message_writer() -> MessageWriter:
+    settings: Settings = get_settings()
+    db_instance: DatabaseConnection = DatabaseConnection(settings=settings)
+    return MessageWriter(db_instance=db_instance,settings=settings)
+
+def get_presence_store() -> LocalPresenceStore | MongoPresenceStore:
+    settings: Settings = get_settings()
+    if settings.SOCKET_MANAGER == "mongo":
+        db_instance: DatabaseConnection = DatabaseConnection(settings=settings)
+        return MongoPresenceStore(db_instance=db_instance,settings=settings)
+    return LocalPresenceStore()
+
+def get_activity_aggregator() -> ActivityAggregator:
+    settings: Settings = get_settings()
+    return ActivityAggregator(settings=settings)
+
 def get_socket_service() -> SocketService:
     settings: Settings = get_settings()
     db_instance: DatabaseConnection = DatabaseConnection(settings=settings)
-    return SocketService(db_instance=db_instance)
\ No newline at end of file
+    return SocketService(
+        db_instance=db_instance,
+        message_writer=get_message_writer(),
+        presence_store=get_presence_store(),
+        settings=settings
+    )
\ No newline at end of file
@@ -28,4 +28,11 @@ class AlbumInconsistencyError(Exception):
     """Raised when there is an inconsistency while creating the album."""
 
     def __init__(self, album_id: str):
-        self.album_id = album_id
\ No newline at end of file
+        self.album_id = album_id
+
+class InvalidSessionTokenError(Exception):
+    """Raised when a session token fails local verification."""
+
+    def __init__(self, message: str):
+        super().__init__(message)
+        self.message = message
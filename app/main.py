@@ -1,3 +1,5 @@
+import asyncio
+
 import uvicorn
 
 from socketio import ASGIApp
@@ -8,15 +10,39 @@ from fastapi import FastAPI, HTTPException, status
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.core.config import Settings
+from app.core.security import SessionTokenVerifier
 from app.db.connection import DatabaseConnection
-from app.web_socket.socket import sio as socket_server
-from app.routers import admin,album,auth,song,stat,user
-from app.dependencies.dependencies import get_settings, init_cloudinary, init_clerk_sdk
+from app.services.album import AlbumService
+from app.services.search import SearchIndex
+from app.services.song_pool import SongPool
+from app.services.trending import TrendingService
+from app.services.recommendation import RecommendationService
+from app.services.response_cache import ResponseCache
+from app.services.catalog_version import CatalogVersions
+from app.services.counter import CatalogCounters
+from app.services.analytics import AnalyticsService
+from app.services.message_writer import MessageWriter
+from app.services.presence import LocalPresenceStore, MongoPresenceStore
+from app.services.activity import ActivityAggregator
+from app.web_socket.socket import sio as socket_server, chat_namespace
+from app.routers import admin,album,auth,search,song,stat,user
+from app.dependencies.dependencies import get_settings, get_presence_store, init_cloudinary, init_clerk_sdk
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     db_instance: DatabaseConnection | None = None
+    index_task: asyncio.Task | None = None
+    session_verifier: SessionTokenVerifier | None = None
+    song_pool: SongPool | None = None
+    trending_service: TrendingService | None = None
+    recommendation_service: RecommendationService | None = None
+    catalog_versions: CatalogVersions | None = None
+    catalog_counters: CatalogCounters | None = None
+    analytics_service: AnalyticsService | None = None
+    message_writer: MessageWriter | None = None
+    presence_store: LocalPresenceStore | MongoPresenceStore | None = None
+    activity_aggregator: ActivityAggregator | None = None
     try :
 
         settings: Settings  = get_settings()
@@ -26,7 +52,52 @@ async def lifespan(app: FastAPI):
 
         _ = init_clerk_sdk(settings.CLERK_SECRET_KEY)
 
-        await db_instance.create_index()
+        session_verifier = SessionTokenVerifier(settings=settings)
+        await session_verifier.start()
+
+        index_task = asyncio.create_task(db_instance.sync_indexes())
+
+        song_pool = SongPool(db_instance=db_instance,settings=settings)
+        await song_pool.start()
+
+        trending_service = TrendingService(db_instance=db_instance,settings=settings)
+        await trending_service.start()
+
+        search_index = SearchIndex(db_instance=db_instance)
+        await search_index.load()
+
+        recommendation_service = RecommendationService(db_instance=db_instance,settings=settings)
+        await recommendation_service.start()
+
+        response_cache = ResponseCache(settings=settings)
+        catalog_versions = CatalogVersions(
+            db_instance=db_instance,
+            response_cache=response_cache,
+            search_index=search_index,
+            settings=settings
+        )
+        await catalog_versions.start()
+
+        catalog_counters = CatalogCounters(db_instance=db_instance,settings=settings)
+        await catalog_counters.start()
+
+        analytics_service = AnalyticsService(db_instance=db_instance,settings=settings)
+        await analytics_service.start()
+
+        message_writer = MessageWriter(db_instance=db_instance,settings=settings)
+        await message_writer.start()
+
+        presence_store = get_presence_store()
+        await presence_store.start(broadcast_left=chat_namespace.broadcast_departures)
+        analytics_service.sample_gauge("active_users",presence_store.count)
+
+        activity_aggregator = ActivityAggregator(settings=settings)
+        await activity_aggregator.start(broadcast=chat_namespace.broadcast_activities)
+
+        album_service = AlbumService(db_instance=db_instance,response_cache=response_cache)
+        await response_cache.warm_up([
+            lambda: album_service.render_all_albums(limit=settings.PAGE_SIZE_DEFAULT),
+        ])
 
         yield
 
@@ -37,6 +108,28 @@ async def lifespan(app: FastAPI):
         )
 
     finally :
+        if activity_aggregator :
+            await activity_aggregator.stop()
+        if presence_store :
+            await presence_store.stop()
+        if message_writer :
+            await message_writer.stop()
+        if analytics_service :
+            await analytics_service.stop()
+        if catalog_counters :
+            await catalog_counters.stop()
+        if catalog_versions :
+            await catalog_versions.stop()
+        if recommendation_service :
+            await recommendation_service.stop()
+        if trending_service :
+            await trending_service.stop()
+        if song_pool :
+            await song_pool.stop()
+        if session_verifier :
+            await session_verifier.stop()
+        if index_task and not index_task.done() :
+            index_task.cancel()
         if db_instance :
             db_instance.close_connection()
 
@@ -46,6 +139,7 @@ app = FastAPI(lifespan=lifespan)
 app.include_router(admin.router)
 app.include_router(album.router)
 app.include_router(auth.router)
+app.include_router(search.router)
 app.include_router(song.router)
 app.include_router(stat.router)
 app.include_router(user.router)
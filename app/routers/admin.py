@@ -1,17 +1,26 @@
-from typing import Annotated
+from typing import Annotated, List
 
 from fastapi.responses import JSONResponse
-from fastapi import APIRouter, Depends, UploadFile, BackgroundTasks, File, Path, status
+from fastapi import APIRouter, Body, Depends, UploadFile, BackgroundTasks, File, Path, status
 
 from clerk_backend_api.models.user import User as ClerkUser
 
 from app.core.config import Settings
+from app.schemas.user import UserIn
 from app.schemas.song import SongIn, SongOut
 from app.schemas.album import AlbumIn, AlbumOut
+from app.services.auth import AuthService
 from app.services.admin import AdminService
+from app.services.search import SearchIndex
+from app.services.clerk_user import ClerkUserCache
+from app.services.response_cache import ResponseCache
 from app.dependencies.dependencies import (
     get_settings,
     require_admin,
+    get_search_index,
+    get_clerk_user_cache,
+    get_response_cache,
+    get_auth_service,
     get_admin_service,
     extract_song_data,
     extract_album_data,
@@ -26,6 +35,8 @@ router = APIRouter(
 
 settings: Settings = get_settings()
 MAX_FILE_SIZE_MB: int = settings.MAX_FILE_SIZE_MB
+USER_SYNC_MAX_RECORDS: int = settings.USER_SYNC_MAX_RECORDS
+USER_SYNC_BATCH_SIZE: int = settings.USER_SYNC_BATCH_SIZE
 
 song_image_validation = custom_file_validation(MAX_FILE_SIZE_MB, "Image")
 song_audio_validation = custom_file_validation(MAX_FILE_SIZE_MB, "Audio")
@@ -39,6 +50,56 @@ async def check_admin(admin: Annotated[ClerkUser, Depends(require_admin)]):
     )
 
 
+@router.get("/cache/stats")
+async def get_cache_stats(
+        user_cache: Annotated[ClerkUserCache, Depends(get_clerk_user_cache)],
+        response_cache: Annotated[ResponseCache, Depends(get_response_cache)]
+    ) -> JSONResponse:
+    return JSONResponse(
+        status_code=status.HTTP_200_OK,
+        content={"users": user_cache.stats(), "responses": response_cache.stats()}
+    )
+
+
+@router.get("/search/stats")
+async def get_search_stats(search_index: Annotated[SearchIndex, Depends(get_search_index)]) -> JSONResponse:
+    return JSONResponse(
+        status_code=status.HTTP_200_OK,
+        content=search_index.stats()
+    )
+
+
+@router.delete("/cache/users/{id}")
+async def invalidate_cached_user(
+        id: Annotated[str, Path()],
+        user_cache: Annotated[ClerkUserCache, Depends(get_clerk_user_cache)]
+    ) -> JSONResponse:
+
+    user_cache.invalidate(user_id=id)
+
+    return JSONResponse(
+        status_code=status.HTTP_200_OK,
+        content={"message": "User cache entry invalidated"}
+    )
+
+
+@router.post("/users/sync")
+async def sync_users(
+        users_data: Annotated[List[UserIn], Body(max_length=USER_SYNC_MAX_RECORDS)],
+        auth_service: Annotated[AuthService, Depends(get_auth_service)]
+    ) -> JSONResponse:
+
+    response_data: dict = await auth_service.sync_users(
+        users_data=users_data,
+        batch_size=USER_SYNC_BATCH_SIZE
+    )
+
+    return JSONResponse(
+        status_code=status.HTTP_200_OK,
+        content=response_data,
+    )
+
+
 @router.post("/songs")
 async def create_song_with_files(
         image_file: Annotated[UploadFile, File(alias="imageFile")],
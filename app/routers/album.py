@@ -1,10 +1,14 @@
-from typing import List, Annotated
+from typing import List, Annotated, Optional
 
-from fastapi import APIRouter, Path, Depends
+from fastapi import APIRouter, HTTPException, Path, Depends, Query, Request, Response, status
 
+from app.core.config import Settings
 from app.services.album import AlbumService
-from app.schemas.album import AlbumOut, AlbumDetailOut
-from app.dependencies.dependencies import get_album_service
+from app.services.catalog_version import CatalogVersions
+from app.schemas.album import AlbumSummaryOut, AlbumDetailOut, AlbumSummaryPage
+from app.utils.utils import canonical_object_id, etag_matches
+from app.utils.encoders import EncodedJSONResponse
+from app.dependencies.dependencies import get_settings, get_album_service, get_catalog_versions
 
 
 router = APIRouter(
@@ -12,34 +16,107 @@ router = APIRouter(
     tags=["albums"]
 )
 
+settings: Settings = get_settings()
+PAGE_SIZE_DEFAULT: int = settings.PAGE_SIZE_DEFAULT
+PAGE_SIZE_MAX: int = settings.PAGE_SIZE_MAX
+SEARCH_LIMIT_DEFAULT: int = settings.SEARCH_LIMIT_DEFAULT
+SEARCH_LIMIT_MAX: int = settings.SEARCH_LIMIT_MAX
+ALBUM_BATCH_MAX: int = settings.ALBUM_BATCH_MAX
 
-@router.get("/search/{name}")
+
+@router.get("/search/{name}", response_model=List[AlbumSummaryOut])
 async def get_album_by_name(
+        request: Request,
         name: Annotated[str, Path()],
-        album_service: Annotated[AlbumService, Depends(get_album_service)]
-    ) -> List[AlbumOut]:
+        album_service: Annotated[AlbumService, Depends(get_album_service)],
+        catalog_versions: Annotated[CatalogVersions, Depends(get_catalog_versions)],
+        limit: Annotated[int, Query(ge=1, le=SEARCH_LIMIT_MAX)] = SEARCH_LIMIT_DEFAULT,
+        fields: Annotated[Optional[str], Query(description="Comma separated list of output fields")] = None
+    ) -> Response:
+
+    headers: dict = {"ETag": catalog_versions.etag("albums"), "Cache-Control": "no-cache"}
+    if etag_matches(request.headers.get("if-none-match"), headers['ETag']):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    album_list: bytes = await album_service.render_album_by_name(name=name,limit=limit,fields=fields)
+
+    return EncodedJSONResponse(
+        status_code=status.HTTP_200_OK,
+        content=album_list,
+        headers=headers,
+    )
+
+
+@router.get("/batch", response_model=List[AlbumDetailOut])
+async def get_albums_by_ids(
+        request: Request,
+        ids: Annotated[str, Query(min_length=1, description="Comma separated album ids")],
+        album_service: Annotated[AlbumService, Depends(get_album_service)],
+        catalog_versions: Annotated[CatalogVersions, Depends(get_catalog_versions)]
+    ) -> Response:
 
-    album_out_list: List[AlbumOut] = await album_service.fetch_album_by_name(name)
+    album_ids: List[str] = list(dict.fromkeys(canonical_object_id(album_id.strip()) for album_id in ids.split(",") if album_id.strip()))
 
-    return album_out_list
+    if len(album_ids) > ALBUM_BATCH_MAX:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"At most {ALBUM_BATCH_MAX} album ids can be requested at once."
+        )
 
+    headers: dict = {"ETag": catalog_versions.etag(*map(catalog_versions.album_key, album_ids)), "Cache-Control": "no-cache"}
+    if etag_matches(request.headers.get("if-none-match"), headers['ETag']):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
 
-@router.get("/{id}")
+    album_detail_list: bytes = await album_service.render_albums_by_ids(album_ids=album_ids)
+
+    return EncodedJSONResponse(
+        status_code=status.HTTP_200_OK,
+        content=album_detail_list,
+        headers=headers,
+    )
+
+
+@router.get("/{id}", response_model=AlbumDetailOut)
 async def get_album_by_id(
+        request: Request,
         id: Annotated[str, Path()],
-        album_service: Annotated[AlbumService, Depends(get_album_service)]
-    ) -> AlbumDetailOut:
+        album_service: Annotated[AlbumService, Depends(get_album_service)],
+        catalog_versions: Annotated[CatalogVersions, Depends(get_catalog_versions)]
+    ) -> Response:
 
-    album_detail_out: AlbumOut = await album_service.fetch_album_by_id(album_id=id)
+    id = canonical_object_id(id)
 
-    return album_detail_out
+    headers: dict = {"ETag": catalog_versions.etag(catalog_versions.album_key(id)), "Cache-Control": "no-cache"}
+    if etag_matches(request.headers.get("if-none-match"), headers['ETag']):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
 
+    album_detail: bytes = await album_service.render_album_by_id(album_id=id)
 
-@router.get("/")
-async def get_all_albums(
-        album_service: Annotated[AlbumService, Depends(get_album_service)]
-    ) -> List[AlbumOut]:
+    return EncodedJSONResponse(
+        status_code=status.HTTP_200_OK,
+        content=album_detail,
+        headers=headers,
+    )
 
-    album_out_list: List[AlbumOut] = await album_service.fetch_all_albums()
 
-    return album_out_list
+@router.get("/", response_model=AlbumSummaryPage)
+async def get_all_albums(
+        request: Request,
+        album_service: Annotated[AlbumService, Depends(get_album_service)],
+        catalog_versions: Annotated[CatalogVersions, Depends(get_catalog_versions)],
+        limit: Annotated[int, Query(ge=1, le=PAGE_SIZE_MAX)] = PAGE_SIZE_DEFAULT,
+        cursor: Annotated[Optional[str], Query()] = None,
+        fields: Annotated[Optional[str], Query(description="Comma separated list of output fields")] = None
+    ) -> Response:
+
+    headers: dict = {"ETag": catalog_versions.etag("albums"), "Cache-Control": "no-cache"}
+    if etag_matches(request.headers.get("if-none-match"), headers['ETag']):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    album_page: bytes = await album_service.render_all_albums(limit=limit,cursor=cursor,fields=fields)
+
+    return EncodedJSONResponse(
+        status_code=status.HTTP_200_OK,
+        content=album_page,
+        headers=headers,
+    )
@@ -5,7 +5,8 @@ from fastapi import APIRouter, Depends, Body, status
 
 from app.schemas.user import UserIn
 from app.services.auth import AuthService
-from app.dependencies.dependencies import get_auth_service
+from app.services.clerk_user import ClerkUserCache
+from app.dependencies.dependencies import get_auth_service, get_clerk_user_cache
 
 router = APIRouter(
     prefix="/api/auth",
@@ -15,11 +16,15 @@ router = APIRouter(
 @router.post('/callback')
 async def auth_callback_handler(
         auth_request_data: Annotated[UserIn, Body()],
-        auth_service: Annotated[AuthService, Depends(get_auth_service)]
+        auth_service: Annotated[AuthService, Depends(get_auth_service)],
+        user_cache: Annotated[ClerkUserCache, Depends(get_clerk_user_cache)]
     ) -> JSONResponse:
 
     response_data: dict = await auth_service.auth_callback(user_auth_data=auth_request_data)
 
+    # A fresh sign in may follow a profile or email change in Clerk.
+    user_cache.invalidate(user_id=auth_request_data.clerk_id)
+
     return JSONResponse(
         status_code=status.HTTP_200_OK,
         content=response_data,
@@ -0,0 +1,34 @@
+from typing import Annotated, Dict, List
+
+from fastapi import APIRouter, Depends, Query, status
+
+from app.core.config import Settings
+from app.schemas.search import SearchResults
+from app.services.search import SearchIndex
+from app.utils.encoders import EncodedJSONResponse
+from app.dependencies.dependencies import get_settings, get_search_index
+
+
+router = APIRouter(
+    prefix="/api/search",
+    tags=["search"]
+)
+
+settings: Settings = get_settings()
+SEARCH_LIMIT_DEFAULT: int = settings.SEARCH_LIMIT_DEFAULT
+SEARCH_LIMIT_MAX: int = settings.SEARCH_LIMIT_MAX
+
+
+@router.get("/", response_model=SearchResults)
+async def search_catalog(
+        q: Annotated[str, Query(min_length=1, max_length=100)],
+        search_index: Annotated[SearchIndex, Depends(get_search_index)],
+        limit: Annotated[int, Query(ge=1, le=SEARCH_LIMIT_MAX)] = SEARCH_LIMIT_DEFAULT
+    ) -> EncodedJSONResponse:
+
+    search_results: Dict[str, List[dict]] = search_index.search(query=q,limit=limit)
+
+    return EncodedJSONResponse(
+        status_code=status.HTTP_200_OK,
+        content=search_results,
+    )
@@ -1,14 +1,22 @@
-from typing import List, Annotated
+from typing import List, Annotated, Optional
 
-from fastapi import APIRouter, Depends, Path
+from fastapi import APIRouter, Depends, Path, Query, Request, Response, status
 
 from clerk_backend_api.models.user import User as ClerkUser
 
-from app.schemas.song import SongOut
+from app.core.config import Settings
+from app.schemas.auth import SessionClaims
+from app.schemas.song import SongOut, SongPage
 from app.services.song import SongService
+from app.services.catalog_version import CatalogVersions
+from app.utils.utils import etag_matches
+from app.utils.encoders import EncodedJSONResponse
 from app.dependencies.dependencies import(
+    get_settings,
     require_admin,
-    get_song_service
+    get_song_service,
+    get_catalog_versions,
+    optional_route_claims
 )
 
 
@@ -17,48 +25,85 @@ router = APIRouter(
     tags=["songs"]
 )
 
+settings: Settings = get_settings()
+PAGE_SIZE_DEFAULT: int = settings.PAGE_SIZE_DEFAULT
+PAGE_SIZE_MAX: int = settings.PAGE_SIZE_MAX
+SEARCH_LIMIT_DEFAULT: int = settings.SEARCH_LIMIT_DEFAULT
+SEARCH_LIMIT_MAX: int = settings.SEARCH_LIMIT_MAX
 
-@router.get("/featured")
-async def get_featured_songs(song_service: Annotated[SongService, Depends(get_song_service)]) -> List[SongOut]:
 
-    song_out_list: List[SongOut] = await song_service.fetch_featured_songs()
+@router.get("/featured", response_model=List[SongOut])
+async def get_featured_songs(song_service: Annotated[SongService, Depends(get_song_service)]) -> EncodedJSONResponse:
 
-    return song_out_list
+    song_list: List[dict] = await song_service.fetch_featured_songs()
 
+    return EncodedJSONResponse(
+        status_code=status.HTTP_200_OK,
+        content=song_list,
+    )
 
-@router.get("/made-for-you")
-async def get_made_for_you_songs(song_service: Annotated[SongService, Depends(get_song_service)]) -> List[SongOut]:
 
-    song_out_list: List[SongOut] = await song_service.fetch_made_for_you_songs()
+@router.get("/made-for-you", response_model=List[SongOut])
+async def get_made_for_you_songs(
+        session_claims: Annotated[Optional[SessionClaims], Depends(optional_route_claims)],
+        song_service: Annotated[SongService, Depends(get_song_service)]
+    ) -> EncodedJSONResponse:
+
+    user_id: Optional[str] = session_claims.user_id if session_claims else None
+    song_list: List[dict] = await song_service.fetch_made_for_you_songs(user_id=user_id)
 
-    return song_out_list
+    return EncodedJSONResponse(
+        status_code=status.HTTP_200_OK,
+        content=song_list,
+    )
 
 
-@router.get("/trending")
-async def get_trending_songs(song_service: Annotated[SongService, Depends(get_song_service)]) -> List[SongOut]:
+@router.get("/trending", response_model=List[SongOut])
+async def get_trending_songs(song_service: Annotated[SongService, Depends(get_song_service)]) -> EncodedJSONResponse:
 
-    song_out_list: List[SongOut] = await song_service.fetch_trending_songs()
+    song_list: List[dict] = await song_service.fetch_trending_songs()
 
-    return song_out_list
+    return EncodedJSONResponse(
+        status_code=status.HTTP_200_OK,
+        content=song_list,
+    )
 
 
-@router.get("/search/{name}")
+@router.get("/search/{name}", response_model=List[SongOut])
 async def get_song_by_name(
+        request: Request,
         name: Annotated[str, Path()],
-        song_service: Annotated[SongService, Depends(get_song_service)]
-    ) -> List[SongOut]:
+        song_service: Annotated[SongService, Depends(get_song_service)],
+        catalog_versions: Annotated[CatalogVersions, Depends(get_catalog_versions)],
+        limit: Annotated[int, Query(ge=1, le=SEARCH_LIMIT_MAX)] = SEARCH_LIMIT_DEFAULT,
+        fields: Annotated[Optional[str], Query(description="Comma separated list of output fields")] = None
+    ) -> Response:
+
+    headers: dict = {"ETag": catalog_versions.etag("songs"), "Cache-Control": "no-cache"}
+    if etag_matches(request.headers.get("if-none-match"), headers['ETag']):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
 
-    song_out_list: List[SongOut] = await song_service.fetch_song_by_name(name)
+    song_list: bytes = await song_service.render_song_by_name(name=name,limit=limit,fields=fields)
 
-    return song_out_list
+    return EncodedJSONResponse(
+        status_code=status.HTTP_200_OK,
+        content=song_list,
+        headers=headers,
+    )
 
 
-@router.get("/")
+@router.get("/", response_model=SongPage)
 async def get_all_songs(
         admin: Annotated[ClerkUser, Depends(require_admin)],
-        song_service: Annotated[SongService, Depends(get_song_service)]
-    ) -> List[SongOut]:
-
-    song_out_list: List[SongOut] = await song_service.fetch_all_songs()
-
-    return song_out_list
\ No newline at end of file
+        song_service: Annotated[SongService, Depends(get_song_service)],
+        limit: Annotated[int, Query(ge=1, le=PAGE_SIZE_MAX)] = PAGE_SIZE_DEFAULT,
+        cursor: Annotated[Optional[str], Query()] = None,
+        fields: Annotated[Optional[str], Query(description="Comma separated list of output fields")] = None
+    ) -> EncodedJSONResponse:
+
+    song_page: dict = await song_service.fetch_all_songs(limit=limit,cursor=cursor,fields=fields)
+
+    return EncodedJSONResponse(
+        status_code=status.HTTP_200_OK,
+        content=song_page,
+    )
@@ -1,12 +1,17 @@
-from typing import Annotated
+from typing import Annotated, Optional
 
-from fastapi import APIRouter, Depends
+from datetime import datetime
 
-from app.schemas.stat import Stats
+from fastapi import APIRouter, Depends, Query, status
+
+from app.schemas.stat import Stats, Timeseries, Metric, Bucket
 from app.services.stat import StatService
+from app.services.analytics import AnalyticsService
+from app.utils.encoders import EncodedJSONResponse
 from app.dependencies.dependencies import (
     require_admin,
-    get_stat_service
+    get_stat_service,
+    get_analytics_service
 )
 
 
@@ -22,4 +27,21 @@ async def get_stats(stat_service: Annotated[StatService, Depends(get_stat_servic
 
     stats: Stats = await stat_service.fetch_stats()
 
-    return stats
\ No newline at end of file
+    return stats
+
+
+@router.get("/timeseries", response_model=Timeseries)
+async def get_timeseries(
+        analytics_service: Annotated[AnalyticsService, Depends(get_analytics_service)],
+        metric: Annotated[Metric, Query()],
+        start: Annotated[datetime, Query(alias="from")],
+        end: Annotated[datetime, Query(alias="to")],
+        bucket: Annotated[Optional[Bucket], Query(description="Defaults to the metric's rollup bucket")] = None
+    ) -> EncodedJSONResponse:
+
+    timeseries: dict = await analytics_service.fetch_timeseries(metric=metric,start=start,end=end,bucket=bucket)
+
+    return EncodedJSONResponse(
+        status_code=status.HTTP_200_OK,
+        content=timeseries,
+    )
@@ -1,14 +1,17 @@
-from typing import Annotated, List
+from typing import Annotated, List, Optional
 
-from fastapi import APIRouter, Depends, Path
+from fastapi import APIRouter, Depends, Path, Query, status
 
-from clerk_backend_api.models.user import User as ClerkUser
-
-from app.schemas.user import UserOut
-from app.schemas.message import MessageOut
+from app.schemas.user import UserSummaryOut
+from app.schemas.auth import SessionClaims
+from app.core.config import Settings
+from app.schemas.message import MessagePage
+from app.schemas.conversation import ConversationPage
 from app.services.user import UserService
+from app.utils.encoders import EncodedJSONResponse
 from app.dependencies.dependencies import (
-    protect_route,
+    get_settings,
+    protect_route_claims,
     get_user_service
 )
 
@@ -18,27 +21,58 @@ router = APIRouter(
     tags=["users"]
 )
 
+settings: Settings = get_settings()
+PAGE_SIZE_DEFAULT: int = settings.PAGE_SIZE_DEFAULT
+MESSAGE_PAGE_SIZE_DEFAULT: int = settings.MESSAGE_PAGE_SIZE_DEFAULT
+PAGE_SIZE_MAX: int = settings.PAGE_SIZE_MAX
+
 
-@router.get("/")
+@router.get("/", response_model=List[UserSummaryOut])
 async def get_all_users(
-        user: Annotated[ClerkUser, Depends(protect_route)],
-        user_service: Annotated[UserService, Depends(get_user_service)]
-    ) -> List[UserOut]:
+        session_claims: Annotated[SessionClaims, Depends(protect_route_claims)],
+        user_service: Annotated[UserService, Depends(get_user_service)],
+        fields: Annotated[Optional[str], Query(description="Comma separated list of output fields")] = None
+    ) -> EncodedJSONResponse:
+
+    current_user_id: str = session_claims.user_id
+    user_list: List[dict] = await user_service.fetch_all_users(current_user_id,fields=fields)
+
+    return EncodedJSONResponse(
+        status_code=status.HTTP_200_OK,
+        content=user_list,
+    )
+
+
+@router.get("/conversations", response_model=ConversationPage)
+async def get_conversations(
+        session_claims: Annotated[SessionClaims, Depends(protect_route_claims)],
+        user_service: Annotated[UserService, Depends(get_user_service)],
+        limit: Annotated[int, Query(ge=1, le=PAGE_SIZE_MAX)] = PAGE_SIZE_DEFAULT,
+        cursor: Annotated[Optional[str], Query()] = None
+    ) -> EncodedJSONResponse:
 
-    current_user_id: str = user.id
-    user_out_list: List[UserOut] = await user_service.fetch_all_users(current_user_id)
+    current_user_id: str = session_claims.user_id
+    conversation_page: dict = await user_service.fetch_conversations(current_user_id,limit=limit,cursor=cursor)
 
-    return user_out_list
+    return EncodedJSONResponse(
+        status_code=status.HTTP_200_OK,
+        content=conversation_page,
+    )
 
 
-@router.get("/messages/{userId}")
+@router.get("/messages/{userId}", response_model=MessagePage)
 async def get_messages(
         userId: Annotated[str, Path()],
-        user: Annotated[ClerkUser, Depends(protect_route)],
-        user_service: Annotated[UserService, Depends(get_user_service)]
-    ) -> List[MessageOut]:
+        session_claims: Annotated[SessionClaims, Depends(protect_route_claims)],
+        user_service: Annotated[UserService, Depends(get_user_service)],
+        limit: Annotated[int, Query(ge=1, le=PAGE_SIZE_MAX)] = MESSAGE_PAGE_SIZE_DEFAULT,
+        before: Annotated[Optional[str], Query()] = None
+    ) -> EncodedJSONResponse:
 
-    current_user_id: str = user.id
-    message_out_list: List[MessageOut] = await user_service.fetch_messages(current_user_id,userId)
+    current_user_id: str = session_claims.user_id
+    message_page: dict = await user_service.fetch_messages(current_user_id,userId,limit=limit,before=before)
 
-    return message_out_list
\ No newline at end of file
+    return EncodedJSONResponse(
+        status_code=status.HTTP_200_OK,
+        content=message_page,
+    )
@@ -34,10 +34,46 @@ class AlbumOut(AlbumDB):
         return [str(id) for id in value] if value else []
 
 
+class AlbumSummaryOut(BaseModel):
+    id: ObjectId = Field(title="Id",description="Album's Id",alias="_id")
+    title: str = Field(title="Title",description="Album's title")
+    artist: str = Field(title="Artist",description="Album's artist")
+    image_url: Optional[HttpUrl] = Field(default=None,title="Image Url",description="Album's cover image",alias="imageUrl")
+    release_year: int = Field(title="Release Year",description="Album's release year",alias="releaseYear")
+    created_at: datetime = Field(title="Created At",description="Timestamp when the album was created",alias="createdAt")
+
+    @field_serializer('id')
+    def serialize_id(self, value: ObjectId, _info) -> str:
+        return str(value)
+
+    @field_serializer('image_url')
+    def serialize_image_url(self, value: Optional[HttpUrl], _info):
+        return str(value) if value else None
+
+    @field_serializer('created_at')
+    def serialize_created_at(self, value: datetime, _info) -> str:
+        return value.isoformat()
+
+    model_config = {
+        "arbitrary_types_allowed": True,
+        "populate_by_name": True,
+    }
+
+
 class AlbumDetailOut(AlbumOut):
 
     songs: List[SongOut] = Field(title="Songs",description="Album's song")
 
     @field_serializer('songs')
     def serialize_songs(self, value: List[SongOut], _info) -> List[SongOut]:
-        return value
\ No newline at end of file
+        return value
+
+
+class AlbumPage(BaseModel):
+    items: List[AlbumOut] = Field(title="Items",description="Albums in this page")
+    next: Optional[str] = Field(default=None,title="Next",description="Cursor of the next page, null on the last page")
+
+
+class AlbumSummaryPage(BaseModel):
+    items: List[AlbumSummaryOut] = Field(title="Items",description="Albums in this page, without their song ids")
+    next: Optional[str] = Field(default=None,title="Next",description="Cursor of the next page, null on the last page")
@@ -0,0 +1,21 @@
+from typing import Optional
+
+from pydantic import BaseModel, Field
+
+
+class SessionClaims(BaseModel):
+    user_id: str = Field(title="User Id",description="Clerk id of the signed in user",alias="sub")
+    session_id: Optional[str] = Field(default=None,title="Session Id",description="Clerk session id",alias="sid")
+    issued_at: int = Field(title="Issued At",description="Unix timestamp when the token was issued",alias="iat")
+    expires_at: int = Field(title="Expires At",description="Unix timestamp when the token expires",alias="exp")
+    authorized_party: Optional[str] = Field(
+                                                default=None,
+                                                title="Authorized Party",
+                                                description="Origin the token was issued for",
+                                                alias="azp"
+                                            )
+
+    model_config = {
+        "extra": "ignore",
+        "populate_by_name": True,
+    }
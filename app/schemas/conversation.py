@@ -0,0 +1,24 @@
+from typing import List, Optional
+
+from datetime import datetime
+
+from pydantic import BaseModel, Field
+
+
+class LastMessageOut(BaseModel):
+    id: str = Field(title="Id",description="Message's Id",alias="_id")
+    sender_id: str = Field(title="Sender Id",description="Clerk id of the sender",alias="senderId")
+    content: str = Field(title="Content",description="Beginning of the message's content")
+    created_at: datetime = Field(title="Created At",description="Timestamp when the message was created",alias="createdAt")
+
+
+class ConversationSummaryOut(BaseModel):
+    peer_id: str = Field(title="Peer Id",description="Clerk id of the other user",alias="peerId")
+    last_message: LastMessageOut = Field(title="Last Message",description="Preview of the latest message",alias="lastMessage")
+    last_message_at: datetime = Field(title="Last Message At",description="Timestamp of the latest message",alias="lastMessageAt")
+    unread_count: int = Field(title="Unread Count",description="Messages received since the conversation was last read",alias="unreadCount")
+
+
+class ConversationPage(BaseModel):
+    items: List[ConversationSummaryOut] = Field(title="Items",description="Conversations in this page, most recent first")
+    next: Optional[str] = Field(default=None,title="Next",description="Cursor of the next page, null on the last page")
@@ -2,7 +2,9 @@ from bson import ObjectId
 
 from datetime import datetime
 
-from pydantic import Field, field_serializer
+from typing import List, Optional
+
+from pydantic import BaseModel, Field, field_serializer
 
 from app.models.message import MessageDB
 
@@ -22,4 +24,9 @@ class MessageOut(MessageDB):
 
     @field_serializer('created_at')
     def serialize_created_at(self, value: datetime, _info) -> str:
-        return value.isoformat()
\ No newline at end of file
+        return value.isoformat()
+
+
+class MessagePage(BaseModel):
+    items: List[MessageOut] = Field(title="Items",description="Messages in this page, oldest first")
+    before: Optional[str] = Field(default=None,title="Before",description="Cursor of the older page, null once the start of the conversation is reached")
@@ -0,0 +1,11 @@
+from typing import List
+
+from pydantic import BaseModel, Field
+
+from app.schemas.song import SongOut
+from app.schemas.album import AlbumOut
+
+
+class SearchResults(BaseModel):
+    songs: List[SongOut] = Field(title="Songs",description="Matching songs, best match first")
+    albums: List[AlbumOut] = Field(title="Albums",description="Matching albums, best match first")
@@ -2,7 +2,7 @@ from bson import ObjectId
 
 from datetime import datetime
 
-from typing import Optional
+from typing import List, Optional
 
 from pydantic import BaseModel, Field, HttpUrl, field_validator, field_serializer
 
@@ -54,3 +54,8 @@ class SongOut(SongDB):
     @field_serializer('created_at')
     def serialize_created_at(self, value: datetime, _info) -> str:
         return value.isoformat()
+
+
+class SongPage(BaseModel):
+    items: List[SongOut] = Field(title="Items",description="Songs in this page")
+    next: Optional[str] = Field(default=None,title="Next",description="Cursor of the next page, null on the last page")
@@ -1,6 +1,14 @@
+from typing import List, Literal
+
+from datetime import datetime
+
 from pydantic import BaseModel, Field
 
 
+Metric = Literal["songs_added", "albums_added", "users_added", "messages_sent", "active_users"]
+Bucket = Literal["minute", "hour", "day", "week", "month"]
+
+
 class Stats(BaseModel):
     total_albums: int = Field(
         title="Total Albums",
@@ -26,3 +34,14 @@ class Stats(BaseModel):
     model_config = {
         'populate_by_name': True,
     }
+
+
+class TimeseriesPoint(BaseModel):
+    start: datetime = Field(title="Start",description="Start of the bucket, UTC")
+    value: int = Field(title="Value",description="Count in the bucket, or the peak for gauges like active_users")
+
+
+class Timeseries(BaseModel):
+    metric: Metric = Field(title="Metric",description="Name of the rolled up metric")
+    bucket: Bucket = Field(title="Bucket",description="Width of every point")
+    points: List[TimeseriesPoint] = Field(title="Points",description="Non empty buckets in ascending order")
@@ -30,4 +30,29 @@ class UserOut(UserDB):
 
     @field_serializer('created_at')
     def serialize_created_at(self, value: datetime, _info) -> str:
-        return value.isoformat()
\ No newline at end of file
+        return value.isoformat()
+
+
+class UserSummaryOut(BaseModel):
+    clerk_id: str = Field(title="Clerk Id",description="User's clerk id",alias="clerkId")
+    full_name: str = Field(title="Full Name",description="User's full name",alias="fullName")
+    image_url: HttpUrl = Field(title="Image Url",description="User's profile image",alias="imageUrl")
+    created_at: datetime = Field(title="Created At",description="Timestamp when the user was created",alias="createdAt")
+    id: ObjectId = Field(title="Id",description="User's db id",alias="_id")
+
+    @field_serializer('image_url')
+    def serialize_image_url(self, value: HttpUrl, _info):
+        return str(value)
+
+    @field_serializer('id')
+    def serialize_id(self, value: ObjectId, _info) -> str:
+        return str(value)
+
+    @field_serializer('created_at')
+    def serialize_created_at(self, value: datetime, _info) -> str:
+        return value.isoformat()
+
+    model_config = {
+        "populate_by_name": True,
+        "arbitrary_types_allowed": True,
+    }
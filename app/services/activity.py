@@ -0,0 +1,105 @@
+import time
+
+import asyncio
+
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+from app.core.config import Settings
+
+
+class ActivityAggregator():
+    """Coalesces activity updates into one broadcast frame per tick.
+
+    Only the latest activity of each user is kept. A frame goes out once
+    updates have been quiet for ``tick``, or ``max_latency`` after the
+    oldest pending update, whichever comes first, so a steady stream of
+    updates cannot hold a frame back indefinitely.
+    """
+
+    _instance = None
+    _initialized = False
+
+    def __new__(cls, *args, **kwargs):
+        if not cls._instance:
+            cls._instance = super(ActivityAggregator,cls).__new__(cls)
+        return cls._instance
+
+
+    def __init__(self, settings: Settings):
+        if ActivityAggregator._initialized:
+            return
+        self.tick_seconds: float = settings.ACTIVITY_TICK_MS / 1000
+        self.max_latency_seconds: float = max(settings.ACTIVITY_MAX_LATENCY_MS, settings.ACTIVITY_TICK_MS) / 1000
+        self._pending: Dict[str, str] = dict()
+        self._first_at: Optional[float] = None
+        self._last_at: float = 0.0
+        self._wakeup: asyncio.Event = asyncio.Event()
+        self._broadcast: Optional[Callable[[List[Tuple[str, str]]], Awaitable[None]]] = None
+        self._loop_task: Optional[asyncio.Task] = None
+        self.updates: int = 0
+        self.frames: int = 0
+        ActivityAggregator._initialized = True
+
+
+    def update(self, user_id: str, activity: str) -> None:
+        now: float = time.monotonic()
+        self._pending[user_id] = activity
+        if self._first_at is None:
+            self._first_at = now
+        self._last_at = now
+        self.updates += 1
+        self._wakeup.set()
+        return None
+
+
+    async def _wait_until_due(self) -> None:
+        while self._first_at is not None:
+            flush_at: float = min(self._last_at + self.tick_seconds, self._first_at + self.max_latency_seconds)
+            delay: float = flush_at - time.monotonic()
+            if delay <= 0:
+                return None
+            await asyncio.sleep(delay)
+        return None
+
+
+    async def flush(self) -> None:
+        pending, self._pending = self._pending, dict()
+        self._first_at = None
+        if pending and self._broadcast:
+            await self._broadcast(list(pending.items()))
+            self.frames += 1
+        return None
+
+
+    async def _flush_loop(self) -> None:
+        while True:
+            await self._wakeup.wait()
+            self._wakeup.clear()
+            await self._wait_until_due()
+            try :
+                await self.flush()
+            except Exception as err :
+                print("activity_broadcast_failed",err)
+
+
+    async def start(self, broadcast: Callable[[List[Tuple[str, str]]], Awaitable[None]]) -> None:
+        self._broadcast = broadcast
+        if not self._loop_task or self._loop_task.done():
+            self._loop_task = asyncio.create_task(self._flush_loop())
+        return None
+
+
+    async def stop(self) -> None:
+        if self._loop_task:
+            self._loop_task.cancel()
+            self._loop_task = None
+        self._pending, self._first_at = dict(), None
+        return None
+
+
+    def stats(self) -> dict:
+        return {
+            "pending": len(self._pending),
+            "updates": self.updates,
+            "frames": self.frames,
+        }
@@ -1,8 +1,11 @@
 import asyncio
 
+from collections import Counter
+
 from bson import ObjectId
 
-from pymongo.results import InsertOneResult, UpdateResult
+from pymongo import ReturnDocument
+from pymongo.results import InsertOneResult
 
 from fastapi import HTTPException, UploadFile, status, BackgroundTasks
 
@@ -13,12 +16,21 @@ from app.models.album import AlbumDB
 from app.schemas.song import SongIn, SongOut
 from app.schemas.album import AlbumIn, AlbumOut
 from app.db.connection import DatabaseConnection
+from app.services.search import SearchIndex
+from app.services.song_pool import SongPool
+from app.services.trending import TrendingService
+from app.services.recommendation import RecommendationService
+from app.services.response_cache import ResponseCache
+from app.services.catalog_version import CatalogVersions
+from app.services.counter import CatalogCounters
+from app.services.analytics import AnalyticsService
 from app.errors.exceptions import (
     InternalServerError,
     SongInconsistencyError,
     AlbumInconsistencyError
 )
 from app.utils.utils import (
+    normalize_search_key,
     sync_cloudinary_file_upload,
     delete_album_and_related_resources,
     delete_cloudinary_resource_based_on_id,
@@ -27,8 +39,39 @@ from app.utils.utils import (
 
 class AdminService():
 
-    def __init__(self, db_instance: DatabaseConnection):
+    def __init__(
+            self,
+            db_instance: DatabaseConnection,
+            song_pool: SongPool,
+            trending_service: TrendingService,
+            search_index: SearchIndex,
+            recommendation_service: RecommendationService,
+            response_cache: ResponseCache,
+            catalog_versions: CatalogVersions,
+            catalog_counters: CatalogCounters,
+            analytics_service: AnalyticsService
+        ):
         self.db_instance = db_instance
+        self.song_pool = song_pool
+        self.trending_service = trending_service
+        self.search_index = search_index
+        self.recommendation_service = recommendation_service
+        self.response_cache = response_cache
+        self.catalog_versions = catalog_versions
+        self.catalog_counters = catalog_counters
+        self.analytics_service = analytics_service
+
+    async def _bump_versions(self, *keys: str) -> None:
+        try :
+            await self.catalog_versions.bump(keys)
+        except Exception as err :
+            print("catalog_version_bump_failed",err) # the write itself succeeded
+
+    async def _apply_counters(self, **deltas) -> None:
+        try :
+            await self.catalog_counters.apply(**deltas)
+        except Exception as err :
+            print("counters_update_failed",err) # corrected by the next reconcile
 
     async def create_song(
             self,
@@ -62,21 +105,38 @@ class AdminService():
             song.image_url = image_response['secure_url']
             song.audio_url = audio_response['secure_url']
 
-            insert_result: InsertOneResult = await self.db_instance.songs.insert_one(song.model_dump(by_alias=True))
+            song_doc: dict = song.model_dump(by_alias=True)
+            song_doc['title_key'] = normalize_search_key(song.title)
+
+            insert_result: InsertOneResult = await self.db_instance.songs.insert_one(song_doc)
 
             if not insert_result.inserted_id:
                 raise SongInconsistencyError(song_id=song_id)
 
             if album_id :
-                update_result: UpdateResult = await self.db_instance.albums.update_one(
+                updated_album_doc = await self.db_instance.albums.find_one_and_update(
                     {"_id": album_id},
-                    {"$push": {"songs": insert_result.inserted_id}}
+                    {"$push": {"songs": insert_result.inserted_id}},
+                    return_document=ReturnDocument.AFTER
                 )
 
-                if update_result.modified_count < 1 :
+                if not updated_album_doc :
                     await self.delete_song(song_id=song_id,background_tasks=background_tasks)
                     raise InternalServerError()
 
+                self.search_index.add_album(updated_album_doc)
+
+            self.song_pool.invalidate()
+            self.search_index.add_song(song_doc)
+            self.response_cache.song_changed(song_doc)
+            await self._apply_counters(songs=1,artist_refs={song.artist: 1})
+            self.analytics_service.record("songs_added")
+
+            if album_id :
+                await self._bump_versions("songs","albums",self.catalog_versions.album_key(album_id))
+            else :
+                await self._bump_versions("songs")
+
             song_out_dict = song.model_dump()
             song_out = SongOut(**song_out_dict)
 
@@ -115,14 +175,30 @@ class AdminService():
                 )
 
             if song_doc['album_id']:
-                update_result: UpdateResult = await self.db_instance.albums.update_one(
-                    {"_id": song_doc['album_id']},
-                    {"$pull": {"songs": song_object_id}}
+                updated_album_doc = await self.db_instance.albums.find_one_and_update(
+                    {"_id": song_doc['album_id'], "songs": song_object_id},
+                    {"$pull": {"songs": song_object_id}},
+                    return_document=ReturnDocument.AFTER
                 )
 
-                if update_result.modified_count < 1:
+                if not updated_album_doc:
                     raise InternalServerError()
 
+                self.search_index.add_album(updated_album_doc)
+
+            self.song_pool.discard([song_id])
+            self.song_pool.invalidate()
+            self.trending_service.discard([song_id])
+            self.recommendation_service.discard([song_id])
+            self.search_index.remove(kind="song",doc_id=song_id)
+            self.response_cache.song_changed(song_doc)
+            await self._apply_counters(songs=-1,artist_refs={song_doc['artist']: -1})
+
+            if song_doc['album_id'] :
+                await self._bump_versions("songs","albums",self.catalog_versions.album_key(song_doc['album_id']))
+            else :
+                await self._bump_versions("songs")
+
             background_tasks.add_task(delete_cloudinary_resource_based_on_id,song_id)
 
             return {"message": "Song deleted successfully"}
@@ -150,11 +226,20 @@ class AdminService():
 
             album.image_url = image_response['secure_url']
 
-            insert_result: InsertOneResult = await self.db_instance.albums.insert_one(album.model_dump(by_alias=True))
+            album_doc: dict = album.model_dump(by_alias=True)
+            album_doc['title_key'] = normalize_search_key(album.title)
+
+            insert_result: InsertOneResult = await self.db_instance.albums.insert_one(album_doc)
 
             if not insert_result.inserted_id:
                 raise AlbumInconsistencyError(album_id=album_id)
 
+            self.search_index.add_album(album_doc)
+            self.response_cache.album_changed(album_doc)
+            await self._apply_counters(albums=1,artist_refs={album.artist: 1})
+            self.analytics_service.record("albums_added")
+            await self._bump_versions("albums",self.catalog_versions.album_key(album_id))
+
             album_out_dict = album.model_dump()
             album_out = AlbumOut(**album_out_dict)
 
@@ -195,8 +280,28 @@ class AdminService():
             song_ids = album_doc['songs']
             song_str_ids = [str(id) for id in song_ids] if song_ids else []
 
+            song_artist_docs = await self.db_instance.songs.find({"_id": {"$in": song_ids}}, {"artist": 1}).to_list()
+
             await self.db_instance.songs.delete_many({"_id": {"$in": song_ids}})
 
+            self.song_pool.discard(song_str_ids)
+            self.song_pool.invalidate()
+            self.trending_service.discard(song_str_ids)
+            self.recommendation_service.discard(song_str_ids)
+            self.search_index.remove(kind="album",doc_id=album_id)
+            for song_str_id in song_str_ids:
+                self.search_index.remove(kind="song",doc_id=song_str_id)
+            self.response_cache.album_changed(album_doc)
+
+            removed_artist_refs: Counter = Counter(song_artist_doc['artist'] for song_artist_doc in song_artist_docs)
+            removed_artist_refs[album_doc['artist']] += 1
+            await self._apply_counters(
+                songs=-len(song_artist_docs),
+                albums=-1,
+                artist_refs={ artist: -refs for artist, refs in removed_artist_refs.items() }
+            )
+            await self._bump_versions("songs","albums",self.catalog_versions.album_key(album_id))
+
             background_tasks.add_task(delete_album_and_related_resources,album_id,song_str_ids)
 
             return {"message": "Album deleted successfully"}
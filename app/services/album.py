@@ -1,5 +1,4 @@
-import re
-from typing import List
+from typing import List, Optional, Tuple
 
 from bson import ObjectId
 
@@ -7,29 +6,49 @@ from motor.motor_asyncio import AsyncIOMotorCursor
 
 from fastapi import HTTPException, status
 
-from app.schemas.song import SongOut
-from app.schemas.album import AlbumOut, AlbumDetailOut
 from app.db.connection import DatabaseConnection
 from app.errors.exceptions import InternalServerError
-from app.utils.utils import album_doc_to_dict, song_doc_to_dict
+from app.services.response_cache import ResponseCache
+from app.utils.encoders import ALBUM_FIELDS, ALBUM_SUMMARY_FIELDS, dumps, encode_fields, encode_album_detail
+from app.utils.utils import (
+    parse_fields,
+    fields_projection,
+    encode_page_cursor,
+    keyset_page_filter,
+    normalize_search_key,
+    prefix_range_filter,
+)
 
 
 class AlbumService():
 
-    def __init__(self, db_instance: DatabaseConnection):
+    def __init__(self, db_instance: DatabaseConnection, response_cache: ResponseCache):
         self.db_instance = db_instance
+        self.response_cache = response_cache
 
-    async def fetch_all_albums(self) -> List[AlbumOut]:
+    async def fetch_all_albums(self, limit: int, cursor: Optional[str] = None, fields: Optional[str] = None) -> dict:
         try :
+            field_list: List[str] = parse_fields(fields, ALBUM_FIELDS, ALBUM_SUMMARY_FIELDS)
+            projection: dict = fields_projection(field_list, ALBUM_FIELDS, 'created_at')
 
-            album_cursor: AsyncIOMotorCursor = self.db_instance.albums.find()
+            album_cursor: AsyncIOMotorCursor = (
+                self.db_instance.albums
+                    .find(keyset_page_filter(cursor), projection)
+                    .sort([("created_at", 1), ("_id", 1)])
+                    .limit(limit + 1)
+            )
 
-            album_doc_list = await album_cursor.to_list()
+            album_doc_list = await album_cursor.to_list(length=limit + 1)
 
-            album_dict_list: List[dict] = [ album_doc_to_dict(album_doc) for album_doc in album_doc_list ]
-            album_out_list: List[AlbumOut] = [ AlbumOut(**album_dict) for album_dict in album_dict_list ]
+            next_cursor: Optional[str] = None
+            if len(album_doc_list) > limit:
+                album_doc_list = album_doc_list[:limit]
+                last_album_doc = album_doc_list[-1]
+                next_cursor = encode_page_cursor(last_album_doc['created_at'], last_album_doc['_id'])
 
-            return album_out_list
+            album_list: List[dict] = [ encode_fields(album_doc, ALBUM_FIELDS, field_list) for album_doc in album_doc_list ]
+
+            return {"items": album_list, "next": next_cursor}
 
         except HTTPException as http_err:
             raise http_err
@@ -38,7 +57,23 @@ class AlbumService():
             raise InternalServerError() from err
 
 
-    async def fetch_album_by_id(self, album_id: str) -> AlbumDetailOut:
+    @staticmethod
+    def _album_detail_pipeline(match: dict) -> List[dict]:
+        # Served by the songs (album_id, created_at) index.
+        return [
+            {"$match": match},
+            {"$project": {"title_key": 0}},
+            {"$lookup": {
+                "from": "songs",
+                "localField": "_id",
+                "foreignField": "album_id",
+                "pipeline": [{"$sort": {"created_at": 1}}, {"$project": {"title_key": 0}}],
+                "as": "song_docs",
+            }},
+        ]
+
+
+    async def fetch_album_by_id(self, album_id: str) -> dict:
         try :
 
             if not ObjectId.is_valid(album_id):
@@ -49,25 +84,54 @@ class AlbumService():
 
             album_object_id = ObjectId(album_id)
 
-            album_doc = await self.db_instance.albums.find_one({"_id": album_object_id})
+            album_cursor: AsyncIOMotorCursor = self.db_instance.albums.aggregate(
+                pipeline=self._album_detail_pipeline({"_id": album_object_id})
+            )
 
-            if not album_doc:
+            album_doc_list = await album_cursor.to_list(length=1)
+
+            if not album_doc_list:
                 raise HTTPException(
                     status_code=status.HTTP_400_BAD_REQUEST,
                     detail=f"Album with a id {album_id} does not exists."
                 )
 
-            album_dict: dict = album_doc_to_dict(album_doc)
-            song_cursor: AsyncIOMotorCursor = self.db_instance.songs.find({'album_id': album_object_id})
+            album_doc: dict = album_doc_list[0]
+            album_detail: dict = encode_album_detail(album_doc, album_doc['song_docs'])
 
-            song_doc_list = await song_cursor.to_list()
+            return album_detail
 
-            song_dict_list: List[dict] = [ song_doc_to_dict(song_doc) for song_doc in song_doc_list ]
-            song_out_list: List[SongOut] = [ SongOut(**song_dict) for song_dict in song_dict_list]
-            album_dict['songs'] = song_out_list
-            album_detial_out = AlbumDetailOut(**album_dict)
+        except HTTPException as http_err:
+            raise http_err
 
-            return album_detial_out
+        except Exception as err :
+            raise InternalServerError() from err
+
+    async def fetch_albums_by_ids(self, album_ids: List[str]) -> List[dict]:
+        try :
+            invalid_ids: List[str] = [ album_id for album_id in album_ids if not ObjectId.is_valid(album_id) ]
+            if invalid_ids:
+                raise HTTPException(
+                    status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                    detail=f"{', '.join(invalid_ids)} is not a valid id."
+                )
+
+            album_object_ids: List[ObjectId] = [ ObjectId(album_id) for album_id in album_ids ]
+
+            album_cursor: AsyncIOMotorCursor = self.db_instance.albums.aggregate(
+                pipeline=self._album_detail_pipeline({"_id": {"$in": album_object_ids}})
+            )
+
+            album_doc_list = await album_cursor.to_list(length=len(album_object_ids))
+
+            # Requested order, albums that do not exist are left out.
+            album_doc_map: dict = { album_doc['_id']: album_doc for album_doc in album_doc_list }
+            album_detail_list: List[dict] = [
+                encode_album_detail(album_doc_map[album_object_id], album_doc_map[album_object_id]['song_docs'])
+                for album_object_id in album_object_ids if album_object_id in album_doc_map
+            ]
+
+            return album_detail_list
 
         except HTTPException as http_err:
             raise http_err
@@ -75,20 +139,71 @@ class AlbumService():
         except Exception as err :
             raise InternalServerError() from err
 
-    async def fetch_album_by_name(self, name: str) -> List[AlbumOut]:
+    async def fetch_album_by_name(self, name: str, limit: int, fields: Optional[str] = None) -> List[dict]:
         try :
-            escaped = re.escape(name)
-            album_cursor: AsyncIOMotorCursor = self.db_instance.albums.find({'title': { '$regex': f'^{escaped}', '$options': 'i' }})
+            field_list: List[str] = parse_fields(fields, ALBUM_FIELDS, ALBUM_SUMMARY_FIELDS)
+            search_key: str = normalize_search_key(name)
+
+            if not search_key:
+                return []
 
-            album_doc_list = await album_cursor.to_list()
+            album_cursor: AsyncIOMotorCursor = (
+                self.db_instance.albums
+                    .find(prefix_range_filter('title_key', search_key), fields_projection(field_list, ALBUM_FIELDS))
+                    .sort([("title_key", 1)])
+                    .limit(limit)
+            )
 
-            album_dict_list: List[dict] = [ album_doc_to_dict(album_doc) for album_doc in album_doc_list ]
-            album_out_list: List[AlbumOut] = [ AlbumOut(**album_dict) for album_dict in album_dict_list ]
+            album_doc_list = await album_cursor.to_list(length=limit)
 
-            return album_out_list
+            album_list: List[dict] = [ encode_fields(album_doc, ALBUM_FIELDS, field_list) for album_doc in album_doc_list ]
+
+            return album_list
 
         except HTTPException as http_err :
             raise http_err
 
         except Exception as err :
-            raise InternalServerError() from err
\ No newline at end of file
+            raise InternalServerError() from err
+
+
+    async def render_all_albums(self, limit: int, cursor: Optional[str] = None, fields: Optional[str] = None) -> bytes:
+
+        async def render() -> Tuple[bytes, List[str]]:
+            album_page: dict = await self.fetch_all_albums(limit=limit,cursor=cursor,fields=fields)
+            tags: List[str] = [ self.response_cache.album_tag(album['_id']) for album in album_page['items'] ]
+            if not album_page['next']:
+                tags.append("albums.tail")
+            return dumps(album_page), tags
+
+        return await self.response_cache.render(("albums", limit, cursor, fields), render)
+
+
+    async def render_album_by_id(self, album_id: str) -> bytes:
+
+        async def render() -> Tuple[bytes, List[str]]:
+            album_detail: dict = await self.fetch_album_by_id(album_id=album_id)
+            return dumps(album_detail), [ self.response_cache.album_tag(album_id) ]
+
+        return await self.response_cache.render(("album", album_id), render)
+
+
+    async def render_album_by_name(self, name: str, limit: int, fields: Optional[str] = None) -> bytes:
+        search_key: str = normalize_search_key(name)
+
+        async def render() -> Tuple[bytes, List[str]]:
+            album_list: List[dict] = await self.fetch_album_by_name(name=name,limit=limit,fields=fields)
+            tags: List[str] = [ self.response_cache.album_tag(album['_id']) for album in album_list ]
+            tags.append(self.response_cache.search_tag("albums", search_key))
+            return dumps(album_list), tags
+
+        return await self.response_cache.render(("albums.search", search_key, limit, fields), render)
+
+
+    async def render_albums_by_ids(self, album_ids: List[str]) -> bytes:
+
+        async def render() -> Tuple[bytes, List[str]]:
+            album_detail_list: List[dict] = await self.fetch_albums_by_ids(album_ids=album_ids)
+            return dumps(album_detail_list), [ self.response_cache.album_tag(album_id) for album_id in album_ids ]
+
+        return await self.response_cache.render(("albums.batch", tuple(album_ids)), render)
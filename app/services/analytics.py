@@ -0,0 +1,214 @@
+import asyncio
+
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+from datetime import datetime, timedelta, timezone
+
+from fastapi import HTTPException, status
+
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+
+from motor.motor_asyncio import AsyncIOMotorCursor
+
+from app.core.config import Settings
+from app.db.connection import DatabaseConnection
+from app.errors.exceptions import InternalServerError
+
+
+class AnalyticsService():
+    """Pre-aggregated rollups, one ``rollups`` document per metric and bucket.
+
+    Write paths and socket events only bump an in-memory map, which is
+    flushed with one unordered bulk write per tick. Counters are summed
+    with ``$inc``, gauges keep the peak seen in the bucket with ``$max``.
+    Gauges that are costly to read are sampled once per tick instead.
+    Time series are read from the rollups alone, optionally regrouped into
+    coarser buckets with ``$dateTrunc``.
+    """
+
+    # metric -> (native bucket, accumulator)
+    METRICS: Dict[str, Tuple[str, str]] = {
+        "songs_added": ("day", "sum"),
+        "albums_added": ("day", "sum"),
+        "users_added": ("day", "sum"),
+        "messages_sent": ("hour", "sum"),
+        "active_users": ("minute", "max"),
+    }
+    BUCKETS: Dict[str, timedelta] = {
+        "minute": timedelta(minutes=1),
+        "hour": timedelta(hours=1),
+        "day": timedelta(days=1),
+        "week": timedelta(weeks=1),
+        "month": timedelta(days=31),
+    }
+    FLUSH_BATCH_SIZE = 1000
+
+    _instance = None
+    _initialized = False
+
+    def __new__(cls, *args, **kwargs):
+        if not cls._instance:
+            cls._instance = super(AnalyticsService,cls).__new__(cls)
+        return cls._instance
+
+
+    def __init__(self, db_instance: DatabaseConnection, settings: Settings):
+        if AnalyticsService._initialized:
+            return
+        self.db_instance = db_instance
+        self.flush_seconds: int = settings.ANALYTICS_FLUSH_SECONDS
+        self.max_points: int = settings.ANALYTICS_MAX_POINTS
+        self._pending: Dict[Tuple[str, datetime], int] = dict()
+        self._gauges: Dict[str, int] = dict()
+        self._samplers: Dict[str, Callable[[], Awaitable[int]]] = dict()
+        self._loop_task: Optional[asyncio.Task] = None
+        AnalyticsService._initialized = True
+
+
+    @staticmethod
+    def bucket_start(moment: datetime, bucket: str) -> datetime:
+        if bucket == "minute":
+            return moment.replace(second=0, microsecond=0)
+        if bucket == "hour":
+            return moment.replace(minute=0, second=0, microsecond=0)
+        return moment.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+    def _key(self, metric: str) -> Tuple[str, datetime]:
+        bucket, _ = self.METRICS[metric]
+        return (metric, self.bucket_start(datetime.now(timezone.utc), bucket))
+
+
+    def record(self, metric: str, count: int = 1) -> None:
+        key = self._key(metric)
+        self._pending[key] = self._pending.get(key, 0) + count
+        return None
+
+
+    def set_gauge(self, metric: str, value: int) -> None:
+        # The last value is also carried into buckets without any event.
+        self._gauges[metric] = value
+        key = self._key(metric)
+        self._pending[key] = max(self._pending.get(key, 0), value)
+        return None
+
+
+    def sample_gauge(self, metric: str, sampler: Callable[[], Awaitable[int]]) -> None:
+        self._samplers[metric] = sampler
+        return None
+
+
+    async def flush(self) -> None:
+        for metric, sampler in self._samplers.items():
+            try :
+                self._gauges[metric] = await sampler()
+            except Exception as err :
+                print("gauge_sample_failed",metric,err) # the last value is carried instead
+
+        for metric, value in self._gauges.items():
+            self.set_gauge(metric, value)
+
+        pending, self._pending = self._pending, dict()
+        if not pending:
+            return None
+
+        now: datetime = datetime.now(timezone.utc)
+        keys: List[Tuple[str, datetime]] = list(pending)
+        operations: List[UpdateOne] = []
+        for metric, start in keys:
+            bucket, accumulator = self.METRICS[metric]
+            update_operator: str = "$inc" if accumulator == "sum" else "$max"
+            operations.append(UpdateOne(
+                {"metric": metric, "start": start},
+                {update_operator: {"value": pending[(metric, start)]}, "$set": {"bucket": bucket, "updated_at": now}},
+                upsert=True
+            ))
+
+        for offset in range(0, len(operations), self.FLUSH_BATCH_SIZE):
+            try :
+                await self.db_instance.rollups.bulk_write(operations[offset:offset + self.FLUSH_BATCH_SIZE], ordered=False)
+            except BulkWriteError as bulk_err :
+                print("rollups_flush_partial_failure",bulk_err.details.get('writeErrors', [])[:1])
+            except Exception :
+                # Earlier batches landed, only this one and the rest go back in for the next tick.
+                for metric, start in keys[offset:]:
+                    _, accumulator = self.METRICS[metric]
+                    current = self._pending.get((metric, start), 0)
+                    value = pending[(metric, start)]
+                    self._pending[(metric, start)] = current + value if accumulator == "sum" else max(current, value)
+                raise
+
+        return None
+
+
+    async def fetch_timeseries(self, metric: str, start: datetime, end: datetime, bucket: Optional[str] = None) -> dict:
+        try :
+            native_bucket, accumulator = self.METRICS[metric]
+            start = start if start.tzinfo else start.replace(tzinfo=timezone.utc)
+            end = end if end.tzinfo else end.replace(tzinfo=timezone.utc)
+            bucket = bucket or native_bucket
+
+            if self.BUCKETS[bucket] < self.BUCKETS[native_bucket]:
+                raise HTTPException(
+                    status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                    detail=f"{metric} is rolled up per {native_bucket}, bucket can not be finer."
+                )
+            if end <= start:
+                raise HTTPException(
+                    status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                    detail="to must be later than from."
+                )
+            if (end - start) / self.BUCKETS[native_bucket] > self.max_points:
+                raise HTTPException(
+                    status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                    detail=f"Range spans more than {self.max_points} {native_bucket} rollups, narrow it."
+                )
+
+            pipeline: List[dict] = [{"$match": {"metric": metric, "start": {"$gte": start, "$lt": end}}}]
+            if bucket != native_bucket:
+                pipeline.append({"$group": {
+                    "_id": {"$dateTrunc": {"date": "$start", "unit": bucket}},
+                    "value": {"$sum" if accumulator == "sum" else "$max": "$value"},
+                }})
+                pipeline.append({"$project": {"_id": 0, "start": "$_id", "value": 1}})
+            else:
+                pipeline.append({"$project": {"_id": 0, "start": 1, "value": 1}})
+            pipeline.append({"$sort": {"start": 1}})
+
+            rollup_cursor: AsyncIOMotorCursor = self.db_instance.rollups.aggregate(pipeline=pipeline)
+            points: List[dict] = await rollup_cursor.to_list(length=None)
+
+            return {"metric": metric, "bucket": bucket, "points": points}
+
+        except HTTPException as http_err :
+            raise http_err
+
+        except Exception as err :
+            raise InternalServerError() from err
+
+
+    async def _flush_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_seconds)
+            try :
+                await self.flush()
+            except Exception as err :
+                print("rollups_flush_failed",err)
+
+
+    async def start(self) -> None:
+        if not self._loop_task or self._loop_task.done():
+            self._loop_task = asyncio.create_task(self._flush_loop())
+        return None
+
+
+    async def stop(self) -> None:
+        if self._loop_task:
+            self._loop_task.cancel()
+            self._loop_task = None
+        try :
+            await self.flush()
+        except Exception as err :
+            print("rollups_flush_failed",err)
+        return None
@@ -1,30 +1,56 @@
+from typing import List
+
 from fastapi import HTTPException
 
-from pymongo.results import InsertOneResult
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+from pymongo.results import BulkWriteResult, UpdateResult
 
 from app.models.user import UserDB
 from app.schemas.user import UserIn
 from app.db.connection import DatabaseConnection
+from app.services.counter import CatalogCounters
+from app.services.analytics import AnalyticsService
 from app.errors.exceptions import InternalServerError
 
 class AuthService():
 
-    def __init__(self, db_instance: DatabaseConnection):
+    def __init__(self, db_instance: DatabaseConnection, catalog_counters: CatalogCounters, analytics_service: AnalyticsService):
         self.db_instance = db_instance
+        self.catalog_counters = catalog_counters
+        self.analytics_service = analytics_service
+
+    async def _count_new_users(self, count: int) -> None:
+        self.analytics_service.record("users_added",count)
+        try :
+            await self.catalog_counters.apply(users=count)
+        except Exception as err :
+            print("counters_update_failed",err) # corrected by the next reconcile
+
+    @staticmethod
+    def _build_user(user_auth_data: UserIn) -> UserDB:
+        user_db_dict = user_auth_data.model_dump()
+        user_db_dict['full_name'] = user_auth_data.first_name + user_auth_data.last_name
+        return UserDB(**user_db_dict)
 
     async def auth_callback(self, user_auth_data: UserIn) -> dict:
         try :
 
-            user_doc = await self.db_instance.users.find_one({"clerk_id": user_auth_data.clerk_id})
+            user: UserDB = self._build_user(user_auth_data)
+
+            # A single upsert keyed on the unique clerk_id index, concurrent
+            # logins for the same user can no longer race each other.
+            update_result: UpdateResult = await self.db_instance.users.update_one(
+                {"clerk_id": user.clerk_id},
+                {"$setOnInsert": user.model_dump()},
+                upsert=True
+            )
 
-            if not user_doc:
-                user_db_dict = user_auth_data.model_dump()
-                user_db_dict['full_name'] = user_auth_data.first_name + user_auth_data.last_name
-                user: UserDB = UserDB(**user_db_dict)
-                insert_result: InsertOneResult = await self.db_instance.users.insert_one(user.model_dump())
+            if not update_result.acknowledged:
+                raise InternalServerError()
 
-                if not insert_result.inserted_id:
-                    raise InternalServerError()
+            if update_result.upserted_id:
+                await self._count_new_users(1)
 
             return {'success': True}
 
@@ -33,3 +59,47 @@ class AuthService():
 
         except Exception as err:
             raise InternalServerError() from err
+
+    async def sync_users(self, users_data: List[UserIn], batch_size: int) -> dict:
+        try :
+
+            operations: List[UpdateOne] = []
+            for user_auth_data in users_data:
+                user_doc: dict = self._build_user(user_auth_data).model_dump()
+                created_at = user_doc.pop('created_at')
+                operations.append(
+                    UpdateOne(
+                        {"clerk_id": user_doc['clerk_id']},
+                        {"$set": user_doc, "$setOnInsert": {"created_at": created_at}},
+                        upsert=True
+                    )
+                )
+
+            summary: dict = {"received": len(operations), "matched": 0, "modified": 0, "upserted": 0, "failed": []}
+
+            for start in range(0, len(operations), batch_size):
+                batch: List[UpdateOne] = operations[start:start + batch_size]
+                try :
+                    bulk_result: BulkWriteResult = await self.db_instance.users.bulk_write(batch, ordered=False)
+                    result_details: dict = bulk_result.bulk_api_result
+
+                except BulkWriteError as bulk_err:
+                    result_details = bulk_err.details
+                    for write_error in result_details.get('writeErrors', []):
+                        failed_data: UserIn = users_data[start + write_error['index']]
+                        summary['failed'].append({"clerkId": failed_data.clerk_id, "error": write_error.get('errmsg')})
+
+                summary['matched'] += result_details.get('nMatched', 0)
+                summary['modified'] += result_details.get('nModified', 0)
+                summary['upserted'] += result_details.get('nUpserted', 0)
+
+            if summary['upserted']:
+                await self._count_new_users(summary['upserted'])
+
+            return summary
+
+        except HTTPException as http_err:
+            raise http_err
+
+        except Exception as err:
+            raise InternalServerError() from err
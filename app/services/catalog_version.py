@@ -0,0 +1,130 @@
+import asyncio
+import hashlib
+
+from typing import Dict, Iterable, List, Optional
+
+from datetime import datetime
+
+from pymongo import ReturnDocument
+
+from app.core.config import Settings
+from app.db.connection import DatabaseConnection
+from app.services.search import SearchIndex
+from app.services.response_cache import ResponseCache
+
+
+class CatalogVersions():
+    """Monotonic versions of the catalog, read from memory to build ETags.
+
+    ``songs`` and ``albums`` move on every write to their collection and
+    ``album:<id>`` on every change to one album or its track list. Versions
+    live in ``catalog_versions`` so they survive restarts, and are polled
+    so writes made by other processes also retire their cached responses
+    and refresh the search index.
+    """
+
+    _instance = None
+    _initialized = False
+
+    def __new__(cls, *args, **kwargs):
+        if not cls._instance:
+            cls._instance = super(CatalogVersions,cls).__new__(cls)
+        return cls._instance
+
+
+    def __init__(self, db_instance: DatabaseConnection, response_cache: ResponseCache, search_index: SearchIndex, settings: Settings):
+        if CatalogVersions._initialized:
+            return
+        self.db_instance = db_instance
+        self.response_cache = response_cache
+        self.search_index = search_index
+        self.sync_seconds: int = settings.CATALOG_VERSION_SYNC_SECONDS
+        self._versions: Dict[str, int] = dict()
+        self._synced_until: Optional[datetime] = None
+        self._loop_task: Optional[asyncio.Task] = None
+        CatalogVersions._initialized = True
+
+
+    @staticmethod
+    def album_key(album_id: object) -> str:
+        return f"album:{album_id}"
+
+
+    def version(self, key: str) -> int:
+        return self._versions.get(key, 0)
+
+
+    def etag(self, *keys: str) -> str:
+        versions: str = "|".join(f"{key}.{self.version(key)}" for key in keys)
+        return f'W/"{hashlib.blake2b(versions.encode(), digest_size=12).hexdigest()}"'
+
+
+    def _apply(self, key: str, version: int) -> bool:
+        if version <= self._versions.get(key, 0):
+            return False
+        self._versions[key] = version
+        return True
+
+
+    async def bump(self, keys: Iterable[str]) -> None:
+        # Call only after the write and the response cache invalidation, a
+        # request that sees the new ETag must never be served an old body.
+        for key in dict.fromkeys(keys):
+            version_doc: dict = await self.db_instance.catalog_versions.find_one_and_update(
+                {"_id": key},
+                {"$inc": {"version": 1}, "$currentDate": {"updated_at": True}},
+                upsert=True,
+                return_document=ReturnDocument.AFTER
+            )
+            self._apply(key, version_doc['version'])
+        return None
+
+
+    async def sync(self) -> None:
+        query: dict = {"updated_at": {"$gte": self._synced_until}} if self._synced_until else {}
+        first_sync: bool = self._synced_until is None
+
+        changed_keys: List[str] = []
+        async for version_doc in self.db_instance.catalog_versions.find(query):
+            if self._apply(version_doc['_id'], version_doc['version']):
+                changed_keys.append(version_doc['_id'])
+            if not self._synced_until or version_doc['updated_at'] > self._synced_until:
+                self._synced_until = version_doc['updated_at']
+
+        if first_sync or not changed_keys:
+            return None
+
+        # Writes from another process: drop what they may have touched.
+        if "songs" in changed_keys or "albums" in changed_keys:
+            # The search index only gets incremental updates from writes made here.
+            await self.search_index.load()
+            self.response_cache.clear()
+        else:
+            self.response_cache.invalidate_tags(
+                self.response_cache.album_tag(key.split(":", 1)[1]) for key in changed_keys if key.startswith("album:")
+            )
+
+        return None
+
+
+    async def _sync_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.sync_seconds)
+            try :
+                await self.sync()
+            except Exception as err :
+                print("catalog_version_sync_failed",err)
+
+
+    async def start(self) -> None:
+        await self.sync()
+        if not self._loop_task or self._loop_task.done():
+            self._loop_task = asyncio.create_task(self._sync_loop())
+        return None
+
+
+    async def stop(self) -> None:
+        if self._loop_task:
+            self._loop_task.cancel()
+            self._loop_task = None
+        return None
@@ -0,0 +1,89 @@
+from typing import Optional
+
+from fastapi import HTTPException, status
+
+from clerk_backend_api import Clerk
+from clerk_backend_api.models.user import User as ClerkUser
+
+from app.core.config import Settings
+from app.utils.cache import AsyncTTLCache
+
+
+class ClerkUserCache():
+
+    _instance = None
+    _initialized = False
+
+    def __new__(cls, *args, **kwargs):
+        if not cls._instance:
+            cls._instance = super(ClerkUserCache,cls).__new__(cls)
+        return cls._instance
+
+
+    def __init__(self, settings: Settings):
+        if ClerkUserCache._initialized:
+            return
+        self.admin_email: str = settings.ADMIN_EMAIL
+        self.profiles: AsyncTTLCache = AsyncTTLCache(
+            ttl_seconds=settings.CLERK_USER_CACHE_TTL_SECONDS,
+            max_entries=settings.CLERK_USER_CACHE_MAX_ENTRIES,
+        )
+        self.admin_roles: AsyncTTLCache = AsyncTTLCache(
+            ttl_seconds=settings.ADMIN_ROLE_CACHE_TTL_SECONDS,
+            max_entries=settings.CLERK_USER_CACHE_MAX_ENTRIES,
+        )
+        ClerkUserCache._initialized = True
+
+
+    async def get_user(self, clerk_sdk: Clerk, user_id: str) -> ClerkUser:
+
+        async def load_user() -> ClerkUser:
+            clerk_user: Optional[ClerkUser] = await clerk_sdk.users.get_async(user_id=user_id)
+
+            if not clerk_user:
+                raise HTTPException(
+                    status_code=status.HTTP_401_UNAUTHORIZED,
+                    detail="Unauthorized - user does not exist",
+                )
+
+            return clerk_user
+
+        return await self.profiles.get_or_load(user_id, load_user)
+
+
+    async def is_admin(self, clerk_sdk: Clerk, user_id: str) -> bool:
+
+        async def load_admin_role() -> bool:
+            clerk_user: ClerkUser = await self.get_user(clerk_sdk=clerk_sdk, user_id=user_id)
+            primary_email_address_id: str | None = clerk_user.primary_email_address_id
+
+            if not primary_email_address_id:
+                return False
+
+            primary_email_address = next(
+                (email.email_address for email in clerk_user.email_addresses if email.id == primary_email_address_id),
+                None
+            )
+
+            return primary_email_address == self.admin_email
+
+        return await self.admin_roles.get_or_load(user_id, load_admin_role)
+
+
+    def invalidate(self, user_id: str) -> None:
+        self.profiles.invalidate(user_id)
+        self.admin_roles.invalidate(user_id)
+        return None
+
+
+    def clear(self) -> None:
+        self.profiles.clear()
+        self.admin_roles.clear()
+        return None
+
+
+    def stats(self) -> dict:
+        return {
+            "profiles": self.profiles.stats(),
+            "adminRoles": self.admin_roles.stats(),
+        }
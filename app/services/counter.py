@@ -0,0 +1,155 @@
+import asyncio
+
+from typing import Dict, List, Optional
+
+from datetime import datetime, timezone
+
+from pymongo import ReturnDocument, UpdateOne
+
+from motor.motor_asyncio import AsyncIOMotorCursor
+
+from app.core.config import Settings
+from app.db.connection import DatabaseConnection
+
+
+class CatalogCounters():
+    """Catalog totals kept in one ``counters`` document.
+
+    Writers apply deltas with ``$inc``. The distinct artist total is derived
+    from per-artist reference counts in ``artist_refs`` (songs plus albums
+    by that artist): only the write that moves an artist between zero and
+    non-zero references touches ``artists``. A periodic reconcile recomputes
+    everything from the collections and overwrites any drift.
+    """
+
+    COUNTERS_ID = "catalog"
+    RECONCILE_BATCH_SIZE = 1000
+
+    _instance = None
+    _initialized = False
+
+    def __new__(cls, *args, **kwargs):
+        if not cls._instance:
+            cls._instance = super(CatalogCounters,cls).__new__(cls)
+        return cls._instance
+
+
+    def __init__(self, db_instance: DatabaseConnection, settings: Settings):
+        if CatalogCounters._initialized:
+            return
+        self.db_instance = db_instance
+        self.reconcile_seconds: int = settings.COUNTERS_RECONCILE_SECONDS
+        self.reconciled_at: Optional[datetime] = None
+        self._loop_task: Optional[asyncio.Task] = None
+        CatalogCounters._initialized = True
+
+
+    async def _apply_artist_delta(self, artist: str, delta: int) -> int:
+        artist_doc: dict = await self.db_instance.artist_refs.find_one_and_update(
+            {"_id": artist},
+            {"$inc": {"refs": delta}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+        refs: int = artist_doc['refs']
+        previous_refs: int = refs - delta
+
+        if previous_refs <= 0 < refs:
+            return 1
+        if refs <= 0 < previous_refs:
+            # Only removed if nobody referenced the artist again in between.
+            await self.db_instance.artist_refs.delete_one({"_id": artist, "refs": {"$lte": 0}})
+            return -1
+        return 0
+
+
+    async def apply(self, songs: int = 0, albums: int = 0, users: int = 0, artist_refs: Optional[Dict[str, int]] = None) -> None:
+        distinct_artists: int = 0
+        for artist, delta in (artist_refs or {}).items():
+            if delta:
+                distinct_artists += await self._apply_artist_delta(artist, delta)
+
+        increments: Dict[str, int] = { name: value for name, value in {
+            "songs": songs,
+            "albums": albums,
+            "users": users,
+            "artists": distinct_artists,
+        }.items() if value }
+
+        if increments:
+            await self.db_instance.counters.update_one({"_id": self.COUNTERS_ID}, {"$inc": increments}, upsert=True)
+
+        return None
+
+
+    async def read(self) -> dict:
+        counters_doc: Optional[dict] = await self.db_instance.counters.find_one({"_id": self.COUNTERS_ID})
+        if not counters_doc or 'reconciled_at' not in counters_doc:
+            return await self.reconcile()
+        return counters_doc
+
+
+    async def reconcile(self) -> dict:
+        # Concurrent writes may be missed by one run, the next one fixes them.
+        now: datetime = datetime.now(timezone.utc)
+
+        pipeline = [
+            {"$project": {"_id": 0, "artist": 1}},
+            {"$unionWith": {"coll": "albums", "pipeline": [{"$project": {"_id": 0, "artist": 1}}]}},
+            {"$group": {"_id": "$artist", "refs": {"$sum": 1}}},
+        ]
+        artist_cursor: AsyncIOMotorCursor = self.db_instance.songs.aggregate(pipeline=pipeline)
+
+        artist_count: int = 0
+        operations: List[UpdateOne] = []
+        async for artist_doc in artist_cursor:
+            artist_count += 1
+            operations.append(UpdateOne({"_id": artist_doc['_id']}, {"$set": {"refs": artist_doc['refs'], "reconciled_at": now}}, upsert=True))
+            if len(operations) >= self.RECONCILE_BATCH_SIZE:
+                await self.db_instance.artist_refs.bulk_write(operations, ordered=False)
+                operations = []
+        if operations:
+            await self.db_instance.artist_refs.bulk_write(operations, ordered=False)
+        # Stale artists only, docs upserted by apply() while this ran have no reconciled_at yet.
+        await self.db_instance.artist_refs.delete_many({"reconciled_at": {"$lt": now}})
+
+        song_count, album_count, user_count = await asyncio.gather(
+            self.db_instance.songs.count_documents({}),
+            self.db_instance.albums.count_documents({}),
+            self.db_instance.users.count_documents({}),
+        )
+
+        counters_doc: dict = {
+            "_id": self.COUNTERS_ID,
+            "songs": song_count,
+            "albums": album_count,
+            "users": user_count,
+            "artists": artist_count,
+            "reconciled_at": now,
+        }
+        await self.db_instance.counters.replace_one({"_id": self.COUNTERS_ID}, counters_doc, upsert=True)
+        self.reconciled_at = now
+
+        return counters_doc
+
+
+    async def _reconcile_loop(self) -> None:
+        while True:
+            try :
+                await self.reconcile()
+            except Exception as err :
+                print("counters_reconcile_failed",err)
+            await asyncio.sleep(self.reconcile_seconds)
+
+
+    async def start(self) -> None:
+        if not self._loop_task or self._loop_task.done():
+            self._loop_task = asyncio.create_task(self._reconcile_loop())
+        return None
+
+
+    async def stop(self) -> None:
+        if self._loop_task:
+            self._loop_task.cancel()
+            self._loop_task = None
+        return None
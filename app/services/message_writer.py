@@ -0,0 +1,186 @@
+import asyncio
+
+from typing import List, Optional, Set, Tuple
+
+from datetime import datetime
+
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+
+from app.core.config import Settings
+from app.db.connection import DatabaseConnection
+from app.utils.utils import EPOCH
+
+
+def conversation_updates(message_doc: dict, preview_length: int) -> List[UpdateOne]:
+    created_at: datetime = message_doc['created_at']
+    last_message: dict = {
+        "_id": message_doc['_id'],
+        "sender_id": message_doc['sender_id'],
+        "content": {"$literal": message_doc['content'][:preview_length]},
+        "created_at": created_at,
+    }
+    # Messages can land out of order, only a newer one replaces the preview.
+    is_newer: dict = {"$gt": [created_at, {"$ifNull": ["$last_message_at", EPOCH]}]}
+
+    operations: List[UpdateOne] = []
+    for user_id, peer_id, unread_increment in (
+        (message_doc['sender_id'], message_doc['receiver_id'], 0),
+        (message_doc['receiver_id'], message_doc['sender_id'], 1),
+    ):
+        operations.append(UpdateOne(
+            {"user_id": user_id, "peer_id": peer_id},
+            [{"$set": {
+                "conversation_id": message_doc['conversation_id'],
+                "last_message": {"$cond": [is_newer, last_message, "$last_message"]},
+                "last_message_at": {"$cond": [is_newer, created_at, "$last_message_at"]},
+                "unread": {"$add": [{"$ifNull": ["$unread", 0]}, unread_increment]},
+            }}],
+            upsert=True
+        ))
+
+    return operations
+
+
+class MessageWriter():
+    """Group commit for chat messages.
+
+    Senders enqueue a document and await its future. One writer task drains
+    the queue, lingering a few milliseconds after the first message for up
+    to ``batch_size`` of them, and persists each batch with one unordered
+    ``insert_many``, keeping a few batches in flight. Each future resolves
+    once its own document is durable, or fails with that document's write
+    error. The queue is bounded, so a slow database pushes back on senders
+    instead of growing memory.
+    """
+
+    _instance = None
+    _initialized = False
+
+    def __new__(cls, *args, **kwargs):
+        if not cls._instance:
+            cls._instance = super(MessageWriter,cls).__new__(cls)
+        return cls._instance
+
+
+    def __init__(self, db_instance: DatabaseConnection, settings: Settings):
+        if MessageWriter._initialized:
+            return
+        self.db_instance = db_instance
+        self.batch_size: int = settings.MESSAGE_BATCH_SIZE
+        self.linger_seconds: float = settings.MESSAGE_BATCH_LINGER_MS / 1000
+        self.preview_length: int = settings.CONVERSATION_PREVIEW_LENGTH
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=settings.MESSAGE_QUEUE_MAX)
+        self._write_slots: asyncio.Semaphore = asyncio.Semaphore(settings.MESSAGE_WRITE_CONCURRENCY)
+        self._write_tasks: Set[asyncio.Task] = set()
+        self._loop_task: Optional[asyncio.Task] = None
+        self.batches: int = 0
+        self.messages: int = 0
+        MessageWriter._initialized = True
+
+
+    async def write(self, message_doc: dict) -> None:
+        future: asyncio.Future = asyncio.get_running_loop().create_future()
+        await self._queue.put((message_doc, future))
+        await future
+        return None
+
+
+    def _drain(self, batch: List[Tuple[dict, asyncio.Future]]) -> None:
+        while len(batch) < self.batch_size and not self._queue.empty():
+            batch.append(self._queue.get_nowait())
+        return None
+
+
+    async def _next_batch(self) -> List[Tuple[dict, asyncio.Future]]:
+        batch: List[Tuple[dict, asyncio.Future]] = [await self._queue.get()]
+        self._drain(batch)
+
+        if len(batch) < self.batch_size and self.linger_seconds > 0:
+            await asyncio.sleep(self.linger_seconds)
+            self._drain(batch)
+
+        return batch
+
+
+    async def _write_batch(self, batch: List[Tuple[dict, asyncio.Future]]) -> None:
+        message_doc_list: List[dict] = [ message_doc for message_doc, _ in batch ]
+        failed: dict = dict()
+
+        try :
+            await self.db_instance.messages.insert_many(message_doc_list, ordered=False)
+        except BulkWriteError as bulk_err :
+            for write_error in bulk_err.details.get('writeErrors', []):
+                failed[write_error['index']] = Exception(write_error.get('errmsg', "Message was not saved."))
+        except Exception as err :
+            failed = { index: err for index in range(len(batch)) }
+
+        written: List[dict] = [ message_doc for index, message_doc in enumerate(message_doc_list) if index not in failed ]
+        if written:
+            # Those messages are saved, nothing about their summaries may fail them now.
+            try :
+                operations: List[UpdateOne] = [
+                    operation for message_doc in written for operation in conversation_updates(message_doc, self.preview_length)
+                ]
+                await self.db_instance.conversations.bulk_write(operations, ordered=False)
+            except Exception as err :
+                print("conversation_summary_failed",err) # messages are saved, the inbox catches up on the next one
+
+        for index, (_, future) in enumerate(batch):
+            if future.done():
+                continue
+            if index in failed:
+                future.set_exception(failed[index])
+            else:
+                future.set_result(None)
+
+        self.batches += 1
+        self.messages += len(written)
+        return None
+
+
+    async def _commit(self, batch: List[Tuple[dict, asyncio.Future]]) -> None:
+        try :
+            await self._write_batch(batch)
+        except Exception as err :
+            print("message_batch_failed",err)
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(err)
+        finally :
+            self._write_slots.release()
+            for _ in batch:
+                self._queue.task_done()
+
+
+    async def _write_loop(self) -> None:
+        while True:
+            batch = await self._next_batch()
+            # The next batch fills up while earlier ones are still in flight.
+            await self._write_slots.acquire()
+            self._write_tasks.add(asyncio.create_task(self._commit(batch)))
+            self._write_tasks = { task for task in self._write_tasks if not task.done() }
+
+
+    async def start(self) -> None:
+        if not self._loop_task or self._loop_task.done():
+            self._loop_task = asyncio.create_task(self._write_loop())
+        return None
+
+
+    async def stop(self) -> None:
+        if self._loop_task:
+            # Drain what was accepted before shutdown so no sender is left hanging.
+            await self._queue.join()
+            self._loop_task.cancel()
+            self._loop_task = None
+        return None
+
+
+    def stats(self) -> dict:
+        return {
+            "queued": self._queue.qsize(),
+            "batches": self.batches,
+            "messages": self.messages,
+            "averageBatchSize": round(self.messages / self.batches, 2) if self.batches else 0,
+        }
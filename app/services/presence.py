@@ -0,0 +1,331 @@
+import os
+import socket
+
+import asyncio
+
+from typing import Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+from datetime import datetime, timedelta, timezone
+
+from pymongo import ReturnDocument
+
+from app.core.config import Settings
+from app.db.connection import DatabaseConnection
+from app.utils.utils import EPOCH
+
+
+class PresenceRegistry():
+    """Who is online, on how many sockets, doing what.
+
+    Three flat dicts and no record per user: ``sid -> user_id`` makes a
+    disconnect one lookup instead of a scan over every user, and a socket
+    count is all it takes to tell a user's first and last socket apart,
+    since nothing needs to list a user's sids. The counts are small ints,
+    which Python shares, so a connection costs three dict slots.
+    """
+
+    DEFAULT_ACTIVITY = "Idle"
+
+    def __init__(self):
+        self._user_of: Dict[str, str] = dict()
+        self._socket_counts: Dict[str, int] = dict()
+        self._activities: Dict[str, str] = dict()
+
+
+    def __len__(self) -> int:
+        return len(self._socket_counts)
+
+
+    # True when this is the user's first socket.
+    def add(self, sid: str, user_id: str) -> bool:
+        self.remove(sid)
+
+        self._user_of[sid] = user_id
+        socket_count: int = self._socket_counts.get(user_id, 0)
+        self._socket_counts[user_id] = socket_count + 1
+        if socket_count:
+            return False
+
+        self._activities[user_id] = self.DEFAULT_ACTIVITY
+        return True
+
+
+    # The user id once their last socket is gone.
+    def remove(self, sid: str) -> Optional[str]:
+        user_id: Optional[str] = self._user_of.pop(sid, None)
+        if user_id is None:
+            return None
+
+        socket_count: int = self._socket_counts[user_id] - 1
+        if socket_count:
+            self._socket_counts[user_id] = socket_count
+            return None
+
+        del self._socket_counts[user_id]
+        del self._activities[user_id]
+        return user_id
+
+
+    def set_activity(self, user_id: str, activity: str) -> bool:
+        if user_id not in self._activities:
+            return False
+        self._activities[user_id] = activity
+        return True
+
+
+    def online_user_ids(self) -> List[str]:
+        return list(self._socket_counts)
+
+
+    def activities(self) -> List[Tuple[str, str]]:
+        return list(self._activities.items())
+
+
+class LocalPresenceStore():
+    """Presence kept in this process, for a single worker."""
+
+    _instance = None
+    _initialized = False
+
+    def __new__(cls, *args, **kwargs):
+        if not cls._instance:
+            cls._instance = super(LocalPresenceStore,cls).__new__(cls)
+        return cls._instance
+
+
+    def __init__(self):
+        if LocalPresenceStore._initialized:
+            return
+        self.registry: PresenceRegistry = PresenceRegistry()
+        self._version: int = 0
+        LocalPresenceStore._initialized = True
+
+
+    async def add(self, sid: str, user_id: str) -> bool:
+        return self.registry.add(sid=sid, user_id=user_id)
+
+
+    async def remove(self, sid: str) -> Optional[str]:
+        return self.registry.remove(sid=sid)
+
+
+    async def set_activity(self, user_id: str, activity: str) -> bool:
+        return self.registry.set_activity(user_id=user_id, activity=activity)
+
+
+    async def online_user_ids(self) -> List[str]:
+        return self.registry.online_user_ids()
+
+
+    async def activities(self) -> List[Tuple[str, str]]:
+        return self.registry.activities()
+
+
+    async def count(self) -> int:
+        return len(self.registry)
+
+
+    async def version(self) -> int:
+        return self._version
+
+
+    async def bump_version(self) -> int:
+        self._version += 1
+        return self._version
+
+
+    async def start(self, broadcast_left: Callable[[List[str]], Awaitable[None]]) -> None:
+        # Nothing outlives this process, so there is never anyone to reap.
+        return None
+
+
+    async def stop(self) -> None:
+        return None
+
+
+class MongoPresenceStore():
+    """Presence shared by every worker through the ``presence`` collection.
+
+    One document per sid, tagged with the worker that holds the socket. Each
+    worker refreshes ``seen_at`` on its own sids every heartbeat and reaps
+    the sids of workers that missed ``EXPIRE_HEARTBEATS`` of theirs, then
+    broadcasts the users that left with them.
+
+    A user's first and last socket are told apart on one document per user
+    in ``presence_users``: ``$addToSet`` and ``$pull`` of the sid, read back
+    in the same operation, so two workers can never both see themselves as
+    the first socket, or the last.
+    """
+
+    VERSION_ID = "presence"
+    EXPIRE_HEARTBEATS = 3
+
+    _instance = None
+    _initialized = False
+
+    def __new__(cls, *args, **kwargs):
+        if not cls._instance:
+            cls._instance = super(MongoPresenceStore,cls).__new__(cls)
+        return cls._instance
+
+
+    def __init__(self, db_instance: DatabaseConnection, settings: Settings):
+        if MongoPresenceStore._initialized:
+            return
+        self.db_instance = db_instance
+        self.worker_id: str = f"{socket.gethostname()}:{os.getpid()}"
+        self.heartbeat_seconds: int = settings.SOCKET_PRESENCE_HEARTBEAT_SECONDS
+        self.expire_seconds: int = settings.SOCKET_PRESENCE_HEARTBEAT_SECONDS * self.EXPIRE_HEARTBEATS
+        self._broadcast_left: Optional[Callable[[List[str]], Awaitable[None]]] = None
+        self._loop_task: Optional[asyncio.Task] = None
+        MongoPresenceStore._initialized = True
+
+
+    async def add(self, sid: str, user_id: str) -> bool:
+        await self.db_instance.presence.update_one(
+            {"_id": sid},
+            {
+                "$set": {"user_id": user_id, "worker_id": self.worker_id, "activity": PresenceRegistry.DEFAULT_ACTIVITY, "activity_at": EPOCH},
+                "$currentDate": {"seen_at": True},
+            },
+            upsert=True
+        )
+
+        user_doc: Optional[dict] = await self.db_instance.presence_users.find_one_and_update(
+            {"_id": user_id},
+            {"$addToSet": {"sids": sid}},
+            projection={"sids": 1},
+            upsert=True,
+            return_document=ReturnDocument.BEFORE
+        )
+        return not (user_doc and user_doc['sids'])
+
+
+    async def _release(self, sid: str, user_id: str) -> bool:
+        # True for the one caller whose pull took the user's last sid.
+        user_doc: Optional[dict] = await self.db_instance.presence_users.find_one_and_update(
+            {"_id": user_id, "sids": sid},
+            {"$pull": {"sids": sid}},
+            projection={"sids": 1},
+            return_document=ReturnDocument.AFTER
+        )
+        if user_doc is None or user_doc['sids']:
+            return False
+
+        # Only while still empty, a socket added in between keeps the document.
+        await self.db_instance.presence_users.delete_one({"_id": user_id, "sids": {"$size": 0}})
+        return True
+
+
+    async def remove(self, sid: str) -> Optional[str]:
+        presence_doc: Optional[dict] = await self.db_instance.presence.find_one_and_delete({"_id": sid}, {"user_id": 1})
+        if not presence_doc:
+            return None
+
+        user_id: str = presence_doc['user_id']
+        return user_id if await self._release(sid, user_id) else None
+
+
+    async def set_activity(self, user_id: str, activity: str) -> bool:
+        update_result = await self.db_instance.presence.update_many(
+            {"user_id": user_id},
+            {"$set": {"activity": activity}, "$currentDate": {"activity_at": True}}
+        )
+        return update_result.matched_count > 0
+
+
+    async def online_user_ids(self) -> List[str]:
+        return await self.db_instance.presence.distinct("user_id")
+
+
+    async def activities(self) -> List[Tuple[str, str]]:
+        pipeline = [
+            {"$sort": {"activity_at": 1}},
+            {"$group": {"_id": "$user_id", "activity": {"$last": "$activity"}}},
+        ]
+        return [
+            (activity_doc['_id'], activity_doc['activity'])
+            async for activity_doc in self.db_instance.presence.aggregate(pipeline=pipeline)
+        ]
+
+
+    async def count(self) -> int:
+        # Counted on the server, distinct would ship every user id back in one 16 MB document.
+        pipeline = [
+            {"$group": {"_id": "$user_id"}},
+            {"$count": "users"},
+        ]
+        count_doc_list: List[dict] = await self.db_instance.presence.aggregate(pipeline=pipeline).to_list(length=1)
+        return count_doc_list[0]['users'] if count_doc_list else 0
+
+
+    async def version(self) -> int:
+        version_doc: Optional[dict] = await self.db_instance.counters.find_one({"_id": self.VERSION_ID}, {"version": 1})
+        return version_doc['version'] if version_doc else 0
+
+
+    async def bump_version(self) -> int:
+        # One sequence for all workers, so a client sees gaps whichever worker changed presence.
+        version_doc: dict = await self.db_instance.counters.find_one_and_update(
+            {"_id": self.VERSION_ID},
+            {"$inc": {"version": 1}},
+            projection={"version": 1},
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+        return version_doc['version']
+
+
+    async def _reap(self) -> List[str]:
+        expired_before: datetime = datetime.now(timezone.utc) - timedelta(seconds=self.expire_seconds)
+        expired_filter: dict = {"seen_at": {"$lt": expired_before}, "worker_id": {"$ne": self.worker_id}}
+
+        # Every live worker reaps, a sid counts for whoever actually deleted it.
+        user_ids: Set[str] = set()
+        async for presence_doc in self.db_instance.presence.find(expired_filter, {"user_id": 1}):
+            delete_result = await self.db_instance.presence.delete_one({"_id": presence_doc['_id'], **expired_filter})
+            # Gone only if no other worker still holds a socket of theirs.
+            if delete_result.deleted_count and await self._release(presence_doc['_id'], presence_doc['user_id']):
+                user_ids.add(presence_doc['user_id'])
+
+        return list(user_ids)
+
+
+    async def _remove_own_sids(self) -> None:
+        async for presence_doc in self.db_instance.presence.find({"worker_id": self.worker_id}, {"user_id": 1}):
+            await self.db_instance.presence.delete_one({"_id": presence_doc['_id']})
+            await self._release(presence_doc['_id'], presence_doc['user_id'])
+        return None
+
+
+    async def _heartbeat_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.heartbeat_seconds)
+            try :
+                await self.db_instance.presence.update_many({"worker_id": self.worker_id}, {"$currentDate": {"seen_at": True}})
+
+                left_user_ids: List[str] = await self._reap()
+                if left_user_ids and self._broadcast_left:
+                    await self._broadcast_left(left_user_ids)
+            except Exception as err :
+                print("presence_heartbeat_failed",err)
+
+
+    async def start(self, broadcast_left: Callable[[List[str]], Awaitable[None]]) -> None:
+        self._broadcast_left = broadcast_left
+        # Sids left behind by a previous run of this worker are gone for good.
+        await self._remove_own_sids()
+        if not self._loop_task or self._loop_task.done():
+            self._loop_task = asyncio.create_task(self._heartbeat_loop())
+        return None
+
+
+    async def stop(self) -> None:
+        if self._loop_task:
+            self._loop_task.cancel()
+            self._loop_task = None
+        try :
+            await self._remove_own_sids()
+        except Exception as err :
+            print("presence_cleanup_failed",err)
+        return None
@@ -0,0 +1,273 @@
+import asyncio
+
+import numpy as np
+
+from scipy import sparse
+
+from bson import ObjectId
+
+from multiprocessing import get_context
+
+from concurrent.futures import ProcessPoolExecutor
+
+from typing import Dict, List, Optional, Tuple
+
+from datetime import datetime, timedelta, timezone
+
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+
+from app.core.config import Settings
+from app.utils.encoders import encode_song
+from app.db.connection import DatabaseConnection
+
+
+def build_recommendations(
+        user_ids: List[str],
+        song_ids: List[str],
+        user_rows: List[int],
+        song_cols: List[int],
+        play_counts: List[int],
+        top_n: int,
+        max_chunk_cells: int = 1 << 22
+    ) -> Dict[str, List[str]]:
+    """Item-item collaborative filtering over a sparse user x song play matrix.
+
+    Runs in a worker process. Scores for every user are computed in row
+    chunks sized so that the dense score block stays under
+    ``max_chunk_cells`` float32 values.
+    """
+    user_count, song_count = len(user_ids), len(song_ids)
+    if not user_count or not song_count:
+        return dict()
+
+    weights = np.log1p(np.asarray(play_counts, dtype=np.float32))
+    interactions = sparse.csr_matrix((weights, (user_rows, song_cols)), shape=(user_count, song_count), dtype=np.float32)
+
+    # Cosine-normalized co-occurrence, a song never recommends itself.
+    co_occurrence = (interactions.T @ interactions).tocsr()
+    norms = np.sqrt(co_occurrence.diagonal())
+    norms[norms == 0] = 1.0
+    inverse_norms = sparse.diags(1.0 / norms)
+    similarity = (inverse_norms @ co_occurrence @ inverse_norms).tocsr()
+    similarity.setdiag(0)
+    similarity.eliminate_zeros()
+
+    k = min(top_n, song_count)
+    chunk_rows = max(1, max_chunk_cells // song_count)
+    recommendations: Dict[str, List[str]] = dict()
+
+    for start in range(0, user_count, chunk_rows):
+        chunk = interactions[start:start + chunk_rows]
+        scores = np.asarray((chunk @ similarity).todense(), dtype=np.float32)
+
+        listened_rows, listened_cols = chunk.nonzero()
+        scores[listened_rows, listened_cols] = 0.0
+
+        top_cols = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        top_scores = np.take_along_axis(scores, top_cols, axis=1)
+        order = np.argsort(-top_scores, axis=1)
+        top_cols = np.take_along_axis(top_cols, order, axis=1)
+        top_scores = np.take_along_axis(top_scores, order, axis=1)
+
+        for row in range(chunk.shape[0]):
+            recommended_ids = [ song_ids[col] for col, score in zip(top_cols[row], top_scores[row]) if score > 0 ]
+            if recommended_ids:
+                recommendations[user_ids[start + row]] = recommended_ids
+
+    return recommendations
+
+
+class RecommendationService():
+
+    FLUSH_BATCH_SIZE = 1000
+    SONG_FETCH_BATCH_SIZE = 1000
+
+    _instance = None
+    _initialized = False
+
+    def __new__(cls, *args, **kwargs):
+        if not cls._instance:
+            cls._instance = super(RecommendationService,cls).__new__(cls)
+        return cls._instance
+
+
+    def __init__(self, db_instance: DatabaseConnection, settings: Settings):
+        if RecommendationService._initialized:
+            return
+        self.db_instance = db_instance
+        self.top_n: int = settings.RECOMMENDATION_TOP_N
+        self.window_days: int = settings.RECOMMENDATION_WINDOW_DAYS
+        self.flush_seconds: int = settings.RECOMMENDATION_FLUSH_SECONDS
+        self.rebuild_seconds: int = settings.RECOMMENDATION_REBUILD_SECONDS
+        self.max_pending_plays: int = settings.RECOMMENDATION_MAX_PENDING_PLAYS
+        self._pending: Dict[Tuple[str, str], int] = dict()
+        self._flush_lock: asyncio.Lock = asyncio.Lock()
+        self._early_flush_task: Optional[asyncio.Task] = None
+        self._table: Dict[str, List[dict]] = dict()
+        self.built_at: Optional[datetime] = None
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._flush_task: Optional[asyncio.Task] = None
+        self._rebuild_task: Optional[asyncio.Task] = None
+        RecommendationService._initialized = True
+
+
+    def record_play(self, user_id: str, song_id: str) -> None:
+        if not ObjectId.is_valid(song_id):
+            return None
+        key = (user_id, song_id)
+        self._pending[key] = self._pending.get(key, 0) + 1
+
+        if len(self._pending) >= self.max_pending_plays and not (self._early_flush_task and not self._early_flush_task.done()):
+            self._early_flush_task = asyncio.create_task(self._safe_flush())
+
+        return None
+
+
+    def recommend(self, user_id: str, count: int) -> List[dict]:
+        return self._table.get(user_id, [])[:count]
+
+
+    def discard(self, song_ids: List[str]) -> None:
+        discarded_ids = set(song_ids)
+        if discarded_ids:
+            self._table = {
+                user_id: [ song for song in songs if song['_id'] not in discarded_ids ]
+                for user_id, songs in self._table.items()
+            }
+        return None
+
+
+    def _fold_back(self, pending: Dict[Tuple[str, str], int], keys: List[Tuple[str, str]]) -> None:
+        # Unwritten plays go back into the map and are retried on the next flush.
+        for key in keys:
+            self._pending[key] = self._pending.get(key, 0) + pending[key]
+        return None
+
+
+    async def flush(self) -> None:
+        async with self._flush_lock:
+            pending, self._pending = self._pending, dict()
+            if not pending:
+                return None
+
+            now: datetime = datetime.now(timezone.utc)
+            keys: List[Tuple[str, str]] = list(pending)
+            operations: List[UpdateOne] = [
+                UpdateOne(
+                    {"user_id": user_id, "song_id": ObjectId(song_id)},
+                    {"$inc": {"count": pending[(user_id, song_id)]}, "$max": {"last_played_at": now}},
+                    upsert=True
+                )
+                for user_id, song_id in keys
+            ]
+
+            for start in range(0, len(operations), self.FLUSH_BATCH_SIZE):
+                try :
+                    await self.db_instance.listens.bulk_write(operations[start:start + self.FLUSH_BATCH_SIZE], ordered=False)
+                except BulkWriteError as bulk_err :
+                    write_errors: List[dict] = bulk_err.details.get('writeErrors', [])
+                    print("listens_flush_partial_failure",write_errors[:1])
+                    self._fold_back(pending, [ keys[start + write_error['index']] for write_error in write_errors ])
+                except Exception :
+                    # Nothing from this batch on is known to be written.
+                    self._fold_back(pending, keys[start:])
+                    raise
+
+        return None
+
+
+    async def _safe_flush(self) -> None:
+        try :
+            await self.flush()
+        except Exception as err :
+            print("listens_flush_failed",err) # retried on the next tick
+
+
+    async def rebuild(self) -> None:
+        since: datetime = datetime.now(timezone.utc) - timedelta(days=self.window_days)
+
+        user_positions: Dict[str, int] = dict()
+        song_positions: Dict[ObjectId, int] = dict()
+        user_rows: List[int] = []
+        song_cols: List[int] = []
+        play_counts: List[int] = []
+
+        projection = {"_id": 0, "user_id": 1, "song_id": 1, "count": 1}
+        async for listen_doc in self.db_instance.listens.find({"last_played_at": {"$gte": since}}, projection):
+            user_rows.append(user_positions.setdefault(listen_doc['user_id'], len(user_positions)))
+            song_cols.append(song_positions.setdefault(listen_doc['song_id'], len(song_positions)))
+            play_counts.append(listen_doc['count'])
+
+        user_ids: List[str] = list(user_positions)
+        song_object_ids: List[ObjectId] = list(song_positions)
+
+        loop = asyncio.get_running_loop()
+        recommendations: Dict[str, List[str]] = await loop.run_in_executor(
+            self._executor,
+            build_recommendations,
+            user_ids,
+            [ str(song_id) for song_id in song_object_ids ],
+            user_rows,
+            song_cols,
+            play_counts,
+            self.top_n,
+        )
+
+        recommended_ids = { ObjectId(song_id) for song_ids in recommendations.values() for song_id in song_ids }
+        recommended_ids_list = list(recommended_ids)
+
+        songs_by_id: Dict[str, dict] = dict()
+        for start in range(0, len(recommended_ids_list), self.SONG_FETCH_BATCH_SIZE):
+            batch_ids = recommended_ids_list[start:start + self.SONG_FETCH_BATCH_SIZE]
+            async for song_doc in self.db_instance.songs.find({"_id": {"$in": batch_ids}}):
+                song_payload = encode_song(song_doc)
+                songs_by_id[song_payload['_id']] = song_payload
+
+        # Payloads are shared between users, the table only holds references.
+        self._table = {
+            user_id: [ songs_by_id[song_id] for song_id in song_ids if song_id in songs_by_id ]
+            for user_id, song_ids in recommendations.items()
+        }
+        self.built_at = datetime.now(timezone.utc)
+
+        return None
+
+
+    async def _flush_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_seconds)
+            await self._safe_flush()
+
+
+    async def _rebuild_loop(self) -> None:
+        while True:
+            try :
+                await self.rebuild()
+            except Exception as err :
+                print("recommendation_rebuild_failed",err) # keep serving the previous table
+            await asyncio.sleep(self.rebuild_seconds)
+
+
+    async def start(self) -> None:
+        if not self._executor:
+            self._executor = ProcessPoolExecutor(max_workers=1, mp_context=get_context("spawn"))
+        if not self._flush_task or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._flush_loop())
+        if not self._rebuild_task or self._rebuild_task.done():
+            self._rebuild_task = asyncio.create_task(self._rebuild_loop())
+        return None
+
+
+    async def stop(self) -> None:
+        for task in (self._flush_task, self._rebuild_task):
+            if task:
+                task.cancel()
+        self._flush_task, self._rebuild_task = None, None
+
+        await self._safe_flush()
+
+        if self._executor:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+        return None
@@ -0,0 +1,97 @@
+from typing import Awaitable, Callable, Hashable, Iterable, List, Tuple
+
+from app.core.config import Settings
+from app.utils.cache import TaggedBytesCache
+from app.utils.utils import normalize_search_key
+
+
+class ResponseCache():
+    """Encoded bodies of the public catalog reads, invalidated by admin writes.
+
+    Pages and search results are tagged with the id of every song or album
+    they contain, searches also with their normalized query and the last
+    album page with ``albums.tail``. A write then only has to drop the tags
+    of the documents it touched, plus the search prefixes of a new title.
+    """
+
+    _instance = None
+    _initialized = False
+
+    def __new__(cls, *args, **kwargs):
+        if not cls._instance:
+            cls._instance = super(ResponseCache,cls).__new__(cls)
+        return cls._instance
+
+
+    def __init__(self, settings: Settings):
+        if ResponseCache._initialized:
+            return
+        self.responses: TaggedBytesCache = TaggedBytesCache(
+            max_bytes=settings.RESPONSE_CACHE_MAX_BYTES,
+            max_entries=settings.RESPONSE_CACHE_MAX_ENTRIES,
+            ttl_seconds=settings.RESPONSE_CACHE_TTL_SECONDS,
+        )
+        ResponseCache._initialized = True
+
+
+    @staticmethod
+    def song_tag(song_id: object) -> str:
+        return f"song:{song_id}"
+
+
+    @staticmethod
+    def album_tag(album_id: object) -> str:
+        return f"album:{album_id}"
+
+
+    @staticmethod
+    def search_tag(scope: str, search_key: str) -> str:
+        return f"{scope}.search:{search_key}"
+
+
+    def _prefix_tags(self, scope: str, title: str) -> List[str]:
+        # A new title can only show up in searches for one of its prefixes.
+        title_key: str = normalize_search_key(title)
+        return [ self.search_tag(scope, title_key[:end]) for end in range(1, len(title_key) + 1) ]
+
+
+    async def render(self, key: Hashable, render: Callable[[], Awaitable[Tuple[bytes, Iterable[str]]]]) -> bytes:
+        return await self.responses.get_or_render(key, render)
+
+
+    def song_changed(self, song_doc: dict) -> None:
+        tags: List[str] = [ self.song_tag(song_doc['_id']) ] + self._prefix_tags("songs", song_doc['title'])
+        if song_doc.get('album_id'):
+            tags.append(self.album_tag(song_doc['album_id']))
+        self.invalidate_tags(tags)
+        return None
+
+
+    def album_changed(self, album_doc: dict) -> None:
+        tags: List[str] = [ self.album_tag(album_doc['_id']), "albums.tail" ] + self._prefix_tags("albums", album_doc['title'])
+        tags.extend(self.song_tag(song_id) for song_id in album_doc.get('songs') or [])
+        self.invalidate_tags(tags)
+        return None
+
+
+    def invalidate_tags(self, tags: Iterable[str]) -> None:
+        self.responses.invalidate_tags(tags)
+        return None
+
+
+    async def warm_up(self, renderers: Iterable[Callable[[], Awaitable[bytes]]]) -> None:
+        for render in renderers:
+            try :
+                await render()
+            except Exception as err :
+                print("response_cache_warm_up_failed",err)
+        return None
+
+
+    def clear(self) -> None:
+        self.responses.clear()
+        return None
+
+
+    def stats(self) -> dict:
+        return self.responses.stats()
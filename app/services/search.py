@@ -0,0 +1,232 @@
+import sys
+import math
+import time
+
+from collections import Counter
+
+from typing import Dict, FrozenSet, List, Optional, Set, Tuple
+
+from app.db.connection import DatabaseConnection
+from app.utils.utils import normalize_search_key
+from app.utils.encoders import encode_album, encode_song
+
+
+class SearchEntry():
+    __slots__ = ("kind", "doc_id", "title_key", "tokens", "grams", "payload")
+
+    def __init__(self, kind: str, doc_id: str, title_key: str, tokens: FrozenSet[str], grams: FrozenSet[str], payload: dict):
+        self.kind = kind
+        self.doc_id = doc_id
+        self.title_key = title_key
+        self.tokens = tokens
+        self.grams = grams
+        self.payload = payload
+
+
+class SearchIndex():
+    """In-memory trigram and token index over song and album titles and artists.
+
+    Candidates are generated from the rarest query trigrams only: a document
+    matching at least ``min_match`` of ``n`` query trigrams must appear in
+    one of the ``n - min_match + 1`` shortest posting lists, so common
+    trigrams never have to be walked. Candidates are then scored exactly.
+    """
+
+    MIN_SIMILARITY = 0.5
+    MAX_CANDIDATES = 200
+
+    _instance = None
+    _initialized = False
+
+    def __new__(cls, *args, **kwargs):
+        if not cls._instance:
+            cls._instance = super(SearchIndex,cls).__new__(cls)
+        return cls._instance
+
+
+    def __init__(self, db_instance: DatabaseConnection):
+        if SearchIndex._initialized:
+            return
+        self.db_instance = db_instance
+        self._entries: List[Optional[SearchEntry]] = []
+        self._free_slots: List[int] = []
+        self._slots: Dict[Tuple[str, str], int] = dict()
+        self._postings: Dict[str, Set[int]] = dict()
+        self.loaded_at: Optional[float] = None
+        SearchIndex._initialized = True
+
+
+    @staticmethod
+    def _grams(text: str) -> FrozenSet[str]:
+        grams: Set[str] = set()
+        for token in text.split():
+            padded = f"  {token} "
+            grams.update(padded[index:index + 3] for index in range(len(padded) - 2))
+        return frozenset(grams)
+
+
+    def _add(self, kind: str, doc_id: str, title: str, artist: str, payload: dict) -> None:
+        self.remove(kind=kind, doc_id=doc_id)
+
+        title_key: str = normalize_search_key(title)
+        text: str = f"{title_key} {normalize_search_key(artist)}"
+        entry = SearchEntry(
+            kind=kind,
+            doc_id=doc_id,
+            title_key=title_key,
+            tokens=frozenset(text.split()),
+            grams=self._grams(text),
+            payload=payload,
+        )
+
+        if self._free_slots:
+            slot = self._free_slots.pop()
+            self._entries[slot] = entry
+        else:
+            slot = len(self._entries)
+            self._entries.append(entry)
+
+        self._slots[(kind, doc_id)] = slot
+        for gram in entry.grams:
+            self._postings.setdefault(gram, set()).add(slot)
+
+        return None
+
+
+    def add_song(self, song_doc: dict) -> None:
+        payload: dict = encode_song(song_doc)
+        self._add(kind="song", doc_id=payload['_id'], title=song_doc['title'], artist=song_doc['artist'], payload=payload)
+        return None
+
+
+    def add_album(self, album_doc: dict) -> None:
+        payload: dict = encode_album(album_doc)
+        self._add(kind="album", doc_id=payload['_id'], title=album_doc['title'], artist=album_doc['artist'], payload=payload)
+        return None
+
+
+    def has_song(self, song_id: str) -> bool:
+        # The index holds the whole catalog, so this doubles as an existence check.
+        return ("song", song_id) in self._slots
+
+
+    def remove(self, kind: str, doc_id: str) -> None:
+        slot: Optional[int] = self._slots.pop((kind, doc_id), None)
+        if slot is None:
+            return None
+
+        entry: SearchEntry = self._entries[slot]
+        for gram in entry.grams:
+            posting = self._postings.get(gram)
+            if posting is not None:
+                posting.discard(slot)
+                if not posting:
+                    del self._postings[gram]
+
+        self._entries[slot] = None
+        self._free_slots.append(slot)
+        return None
+
+
+    async def load(self) -> None:
+        # Read everything first and rebuild without awaiting in between, so
+        # searches during a reload see the old index, never a partial one.
+        song_doc_list: List[dict] = await self.db_instance.songs.find().to_list(length=None)
+        album_doc_list: List[dict] = await self.db_instance.albums.find().to_list(length=None)
+
+        self._entries, self._free_slots, self._slots = [], [], dict()
+        self._postings = dict()
+
+        for song_doc in song_doc_list:
+            self.add_song(song_doc)
+        for album_doc in album_doc_list:
+            self.add_album(album_doc)
+
+        self.loaded_at = time.time()
+        return None
+
+
+    def _score(self, entry: SearchEntry, query_key: str, query_tokens: List[str], query_grams: FrozenSet[str]) -> float:
+        coverage: float = len(entry.grams & query_grams) / len(query_grams)
+        if coverage < self.MIN_SIMILARITY:
+            return 0.0
+
+        exact_tokens: int = sum(1 for token in query_tokens if token in entry.tokens)
+        score: float = coverage + 0.5 * exact_tokens / len(query_tokens)
+
+        if entry.title_key.startswith(query_key):
+            score += 0.5
+        elif query_key in entry.title_key:
+            score += 0.25
+
+        # Prefer the shorter title when everything else ties.
+        return score - 0.001 * len(entry.title_key)
+
+
+    def search(self, query: str, limit: int) -> Dict[str, List[dict]]:
+        results: Dict[str, List[dict]] = {"songs": [], "albums": []}
+
+        query_key: str = normalize_search_key(query)
+        query_grams: FrozenSet[str] = self._grams(query_key)
+        if not query_grams:
+            return results
+
+        query_tokens: List[str] = query_key.split()
+        min_match: int = max(1, math.ceil(self.MIN_SIMILARITY * len(query_grams)))
+
+        postings: List[Set[int]] = sorted((self._postings.get(gram, set()) for gram in query_grams), key=len)
+        candidate_counts: Counter = Counter()
+        for posting in postings[:len(query_grams) - min_match + 1]:
+            candidate_counts.update(posting)
+
+        scored: List[Tuple[float, SearchEntry]] = []
+        for slot, _ in candidate_counts.most_common(self.MAX_CANDIDATES):
+            entry: Optional[SearchEntry] = self._entries[slot]
+            if entry:
+                score = self._score(entry, query_key, query_tokens, query_grams)
+                if score > 0:
+                    scored.append((score, entry))
+
+        scored.sort(key=lambda scored_entry: scored_entry[0], reverse=True)
+
+        for _, entry in scored:
+            bucket: List[dict] = results["songs" if entry.kind == "song" else "albums"]
+            if len(bucket) < limit:
+                bucket.append(entry.payload)
+
+        return results
+
+
+    @staticmethod
+    def _deep_size(value: object) -> int:
+        size: int = sys.getsizeof(value)
+        if isinstance(value, dict):
+            size += sum(SearchIndex._deep_size(key) + SearchIndex._deep_size(item) for key, item in value.items())
+        elif isinstance(value, (list, tuple, set, frozenset)):
+            size += sum(SearchIndex._deep_size(item) for item in value)
+        return size
+
+
+    def stats(self) -> dict:
+        entries: List[SearchEntry] = [ entry for entry in self._entries if entry ]
+
+        entry_bytes: int = sum(
+            sys.getsizeof(entry)
+            + self._deep_size(entry.title_key)
+            + self._deep_size(entry.tokens)
+            + self._deep_size(entry.grams)
+            + self._deep_size(entry.payload)
+            for entry in entries
+        )
+        posting_bytes: int = self._deep_size(self._postings)
+        total_bytes: int = entry_bytes + posting_bytes + sys.getsizeof(self._entries) + self._deep_size(self._slots)
+
+        return {
+            "documents": len(entries),
+            "songs": sum(1 for entry in entries if entry.kind == "song"),
+            "albums": sum(1 for entry in entries if entry.kind == "album"),
+            "grams": len(self._postings),
+            "approxBytes": total_bytes,
+            "approxBytesPerDocument": total_bytes // len(entries) if entries else 0,
+            "loadedAt": self.loaded_at,
+        }
@@ -1,10 +1,37 @@
-from typing import Any, Optional
+import orjson
 
-from pymongo.results import InsertOneResult
+from bson import ObjectId
 
-from app.models.message import MessageDB
-from app.schemas.message import MessageOut
+from typing import Any, List, Optional, Tuple
+
+from datetime import datetime, timezone
+
+from motor.motor_asyncio import AsyncIOMotorCollection, AsyncIOMotorCursor
+
+from app.core.config import Settings
 from app.db.connection import DatabaseConnection
+from app.services.presence import LocalPresenceStore, MongoPresenceStore
+from app.services.message_writer import MessageWriter
+from app.utils.utils import conversation_id, decode_page_cursor, encode_page_cursor, keyset_filter
+from app.utils.encoders import dumps, encode_message
+
+
+async def sync_filter(messages: AsyncIOMotorCollection, last_seen: str) -> dict:
+    # last_seen is a sync cursor, the id of the last message seen or an ISO timestamp.
+    if ObjectId.is_valid(last_seen):
+        message_id: ObjectId = ObjectId(last_seen)
+        message_doc: Optional[dict] = await messages.find_one({"_id": message_id}, {"created_at": 1})
+        if not message_doc:
+            return {"created_at": {"$gte": message_id.generation_time}, "_id": {"$ne": message_id}}
+        created_at, doc_id = message_doc['created_at'], message_id
+    else:
+        try :
+            created_at = datetime.fromisoformat(last_seen)
+            return {"created_at": {"$gt": created_at if created_at.tzinfo else created_at.replace(tzinfo=timezone.utc)}}
+        except ValueError :
+            created_at, doc_id = decode_page_cursor(last_seen)
+
+    return keyset_filter(created_at, doc_id)
 
 
 class SocketService():
@@ -18,38 +45,86 @@ class SocketService():
         return cls._instance
 
 
-    def __init__(self, db_instance: DatabaseConnection):
+    def __init__(
+            self,
+            db_instance: DatabaseConnection,
+            message_writer: MessageWriter,
+            presence_store: LocalPresenceStore | MongoPresenceStore,
+            settings: Settings
+        ):
         if SocketService._initialized:
             return
-        self.user_sockets = dict()
-        self.user_activities = dict()
+        self.presence = presence_store
         self.db_instance = db_instance
+        self.message_writer = message_writer
+        self.sync_max: int = settings.MESSAGE_SYNC_MAX
+        self._snapshot: Optional[Tuple[int, orjson.Fragment]] = None
         SocketService._initialized = True
 
 
-    async def handle_message(self, sender_id: str, receiver_id: str, content: str) -> dict:
-
-        message: MessageDB = MessageDB(sender_id=sender_id,receiver_id=receiver_id,content=content)
-        insert_result: InsertOneResult = await self.db_instance.messages.insert_one(message.model_dump(by_alias=True))
-
-        if not insert_result.inserted_id:
-            raise Exception("Internal server error.")
+    async def presence_snapshot(self) -> orjson.Fragment:
+        # Encoded once per presence version and reused for every new socket until it changes.
+        version: int = await self.presence.version()
+        if self._snapshot and self._snapshot[0] == version:
+            return self._snapshot[1]
 
-        message_dict = message.model_dump()
-        message_out = MessageOut(**message_dict)
+        activities: List[Tuple[str, str]] = await self.presence.activities()
+        snapshot: orjson.Fragment = orjson.Fragment(dumps({"version": version, "users": activities}))
+        self._snapshot = (version, snapshot)
 
-        return message_out.model_dump(mode="json",by_alias=True)
+        return snapshot
 
 
-    def remove_user(self, sid:str) -> Optional[str]:
-        removed_user_id: Optional[str] = None
+    async def mark_read(self, user_id: str, peer_id: str) -> None:
+        await self.db_instance.conversations.update_one(
+            {"user_id": user_id, "peer_id": peer_id},
+            {"$set": {"unread": 0, "read_at": datetime.now(timezone.utc)}}
+        )
+        return None
 
-        for user_id, user_sid in self.user_sockets.items():
-            if user_sid == sid:
-                removed_user_id = user_id
 
-        if removed_user_id:
-            self.user_sockets.pop(removed_user_id)
-            self.user_activities.pop(removed_user_id)
-
-        return removed_user_id
+    async def handle_message(self, sender_id: str, receiver_id: str, content: str) -> dict:
+        # Straight from the socket payload, nothing else checks it before the batch.
+        if not isinstance(receiver_id, str) or not receiver_id:
+            raise ValueError("receiverId must be a non-empty string.")
+        if not isinstance(content, str):
+            raise ValueError("content must be a string.")
+
+        message_doc: dict = {
+            "_id": ObjectId(),
+            "sender_id": sender_id,
+            "receiver_id": receiver_id,
+            "content": content,
+            "created_at": datetime.now(timezone.utc),
+            "conversation_id": conversation_id(sender_id, receiver_id),
+        }
+
+        await self.message_writer.write(message_doc)
+
+        return encode_message(message_doc)
+
+
+    async def sync_messages(self, user_id: str, last_seen: str) -> dict:
+        message_filter: dict = {"receiver_id": user_id}
+        message_filter.update(await sync_filter(self.db_instance.messages, last_seen=last_seen))
+
+        message_cursor: AsyncIOMotorCursor = (
+            self.db_instance.messages
+                .find(message_filter)
+                .sort([("created_at", 1), ("_id", 1)])
+                .limit(self.sync_max + 1)
+        )
+        message_doc_list: List[dict] = await message_cursor.to_list(length=self.sync_max + 1)
+
+        has_more: bool = len(message_doc_list) > self.sync_max
+        message_doc_list = message_doc_list[:self.sync_max]
+
+        next_last_seen: str = last_seen
+        if message_doc_list:
+            next_last_seen = encode_page_cursor(message_doc_list[-1]['created_at'], message_doc_list[-1]['_id'])
+
+        return {
+            "items": [ encode_message(message_doc) for message_doc in message_doc_list ],
+            "lastSeen": next_last_seen,
+            "hasMore": has_more,
+        }
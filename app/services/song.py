@@ -1,32 +1,65 @@
-import re
-from typing import List
+from typing import List, Optional, Tuple
 
 from fastapi import HTTPException
 
 from motor.motor_asyncio import AsyncIOMotorCursor
 
-from app.schemas.song import SongOut
-from app.utils.utils import song_doc_to_dict
+from app.utils.encoders import SONG_FIELDS, SONG_DEFAULT_FIELDS, dumps, encode_fields
+from app.utils.utils import (
+    parse_fields,
+    fields_projection,
+    encode_page_cursor,
+    keyset_page_filter,
+    normalize_search_key,
+    prefix_range_filter,
+)
 from app.db.connection import DatabaseConnection
+from app.services.song_pool import SongPool
+from app.services.response_cache import ResponseCache
+from app.services.trending import TrendingService
+from app.services.recommendation import RecommendationService
 from app.errors.exceptions import InternalServerError
 
 
 class SongService():
 
-    def __init__(self, db_instance: DatabaseConnection):
+    def __init__(
+            self,
+            db_instance: DatabaseConnection,
+            song_pool: SongPool,
+            trending_service: TrendingService,
+            recommendation_service: RecommendationService,
+            response_cache: ResponseCache
+        ):
         self.db_instance = db_instance
+        self.song_pool = song_pool
+        self.trending_service = trending_service
+        self.recommendation_service = recommendation_service
+        self.response_cache = response_cache
 
-    async def _fetch_random_songs(self, count: int) -> List[SongOut]:
+    async def fetch_all_songs(self, limit: int, cursor: Optional[str] = None, fields: Optional[str] = None) -> dict:
         try :
-            pipeline = [{ "$sample": { "size": count } }]
-            song_cursor:  AsyncIOMotorCursor = self.db_instance.songs.aggregate(pipeline=pipeline)
+            field_list: List[str] = parse_fields(fields, SONG_FIELDS, SONG_DEFAULT_FIELDS)
+            projection: dict = fields_projection(field_list, SONG_FIELDS, 'created_at')
 
-            song_doc_list = await song_cursor.to_list(length=count)
+            song_cursor: AsyncIOMotorCursor = (
+                self.db_instance.songs
+                    .find(keyset_page_filter(cursor), projection)
+                    .sort([("created_at", 1), ("_id", 1)])
+                    .limit(limit + 1)
+            )
 
-            song_dict_list: List[dict] = [ song_doc_to_dict(song_doc) for song_doc in song_doc_list ]
-            song_out_list: List[SongOut] = [ SongOut(**song_dict) for song_dict in song_dict_list ]
+            song_doc_list = await song_cursor.to_list(length=limit + 1)
 
-            return song_out_list
+            next_cursor: Optional[str] = None
+            if len(song_doc_list) > limit:
+                song_doc_list = song_doc_list[:limit]
+                last_song_doc = song_doc_list[-1]
+                next_cursor = encode_page_cursor(last_song_doc['created_at'], last_song_doc['_id'])
+
+            song_list: List[dict] = [ encode_fields(song_doc, SONG_FIELDS, field_list) for song_doc in song_doc_list ]
+
+            return {"items": song_list, "next": next_cursor}
 
         except HTTPException as http_err :
             raise http_err
@@ -35,16 +68,11 @@ class SongService():
             raise InternalServerError() from err
 
 
-    async def fetch_all_songs(self) -> List[SongOut]:
+    async def fetch_featured_songs(self) -> List[dict]:
         try :
-            song_cursor: AsyncIOMotorCursor = self.db_instance.songs.find()
-
-            song_doc_list = await song_cursor.to_list()
+            song_list: List[dict] = await self.song_pool.draw(channel="featured",count=6)
 
-            song_dict_list: List[dict] = [ song_doc_to_dict(song_doc) for song_doc in song_doc_list ]
-            song_out_list: List[SongOut] = [ SongOut(**song_dict) for song_dict in song_dict_list ]
-
-            return song_out_list
+            return song_list
 
         except HTTPException as http_err :
             raise http_err
@@ -53,11 +81,17 @@ class SongService():
             raise InternalServerError() from err
 
 
-    async def fetch_featured_songs(self) -> List[SongOut]:
+    async def fetch_made_for_you_songs(self, user_id: Optional[str] = None) -> List[dict]:
         try :
-            song_out_list: List[SongOut] = await self._fetch_random_songs(count=6)
+            song_list: List[dict] = self.recommendation_service.recommend(user_id=user_id,count=4) if user_id else []
+
+            # Anonymous listeners and users without listening history get the rotating pool.
+            if len(song_list) < 4:
+                recommended_ids = { song['_id'] for song in song_list }
+                pool_song_list: List[dict] = await self.song_pool.draw(channel="made_for_you",count=4)
+                song_list = song_list + [ song for song in pool_song_list if song['_id'] not in recommended_ids ][:4 - len(song_list)]
 
-            return song_out_list
+            return song_list
 
         except HTTPException as http_err :
             raise http_err
@@ -66,11 +100,17 @@ class SongService():
             raise InternalServerError() from err
 
 
-    async def fetch_made_for_you_songs(self) -> List[SongOut]:
+    async def fetch_trending_songs(self) -> List[dict]:
         try :
-            song_out_list: List[SongOut] = await self._fetch_random_songs(count=4)
+            song_list: List[dict] = self.trending_service.top(count=4)
 
-            return song_out_list
+            # Until enough plays are recorded, top up from the rotating pool.
+            if len(song_list) < 4:
+                trending_ids = { song['_id'] for song in song_list }
+                pool_song_list: List[dict] = await self.song_pool.draw(channel="trending",count=4)
+                song_list = song_list + [ song for song in pool_song_list if song['_id'] not in trending_ids ][:4 - len(song_list)]
+
+            return song_list
 
         except HTTPException as http_err :
             raise http_err
@@ -78,12 +118,26 @@ class SongService():
         except Exception as err :
             raise InternalServerError() from err
 
-
-    async def fetch_trending_songs(self) -> List[SongOut]:
+    async def fetch_song_by_name(self, name: str, limit: int, fields: Optional[str] = None) -> List[dict]:
         try :
-            song_out_list: List[SongOut] = await self._fetch_random_songs(count=4)
+            field_list: List[str] = parse_fields(fields, SONG_FIELDS, SONG_DEFAULT_FIELDS)
+            search_key: str = normalize_search_key(name)
+
+            if not search_key:
+                return []
+
+            song_cursor:  AsyncIOMotorCursor = (
+                self.db_instance.songs
+                    .find(prefix_range_filter('title_key', search_key), fields_projection(field_list, SONG_FIELDS))
+                    .sort([("title_key", 1)])
+                    .limit(limit)
+            )
 
-            return song_out_list
+            song_doc_list = await song_cursor.to_list(length=limit)
+
+            song_list: List[dict] = [ encode_fields(song_doc, SONG_FIELDS, field_list) for song_doc in song_doc_list ]
+
+            return song_list
 
         except HTTPException as http_err :
             raise http_err
@@ -91,20 +145,14 @@ class SongService():
         except Exception as err :
             raise InternalServerError() from err
 
-    async def fetch_song_by_name(self, name: str) -> List[SongOut]:
-        try :
-            escaped = re.escape(name)
-            song_cursor:  AsyncIOMotorCursor = self.db_instance.songs.find({'title': { '$regex': f'^{escaped}', '$options': 'i' }})
-
-            song_doc_list = await song_cursor.to_list()
 
-            song_dict_list: List[dict] = [ song_doc_to_dict(song_doc) for song_doc in song_doc_list ]
-            song_out_list: List[SongOut] = [ SongOut(**song_dict) for song_dict in song_dict_list ]
+    async def render_song_by_name(self, name: str, limit: int, fields: Optional[str] = None) -> bytes:
+        search_key: str = normalize_search_key(name)
 
-            return song_out_list
+        async def render() -> Tuple[bytes, List[str]]:
+            song_list: List[dict] = await self.fetch_song_by_name(name=name,limit=limit,fields=fields)
+            tags: List[str] = [ self.response_cache.song_tag(song['_id']) for song in song_list ]
+            tags.append(self.response_cache.search_tag("songs", search_key))
+            return dumps(song_list), tags
 
-        except HTTPException as http_err :
-            raise http_err
-
-        except Exception as err :
-            raise InternalServerError() from err
\ No newline at end of file
+        return await self.response_cache.render(("songs.search", search_key, limit, fields), render)
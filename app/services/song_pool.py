@@ -0,0 +1,144 @@
+import random
+
+import asyncio
+
+from typing import Dict, Iterable, List, Optional
+
+from motor.motor_asyncio import AsyncIOMotorCursor
+
+from app.core.config import Settings
+from app.utils.encoders import encode_song
+from app.db.connection import DatabaseConnection
+
+
+class SongPool():
+
+    CHANNELS = ("featured", "made_for_you", "trending")
+
+    _instance = None
+    _initialized = False
+
+    def __new__(cls, *args, **kwargs):
+        if not cls._instance:
+            cls._instance = super(SongPool,cls).__new__(cls)
+        return cls._instance
+
+
+    def __init__(self, db_instance: DatabaseConnection, settings: Settings):
+        if SongPool._initialized:
+            return
+        self.db_instance = db_instance
+        self.pool_size: int = settings.SONG_POOL_SIZE
+        self.refresh_seconds: int = settings.SONG_POOL_REFRESH_SECONDS
+        self._songs: List[dict] = []
+        self._offsets: Dict[str, int] = dict()
+        self._stale: bool = False
+        self._refresh_task: Optional[asyncio.Task] = None
+        self._loop_task: Optional[asyncio.Task] = None
+        SongPool._initialized = True
+
+
+    async def _load(self) -> None:
+        pipeline = [{ "$sample": { "size": self.pool_size } }]
+        song_cursor: AsyncIOMotorCursor = self.db_instance.songs.aggregate(pipeline=pipeline)
+
+        song_doc_list = await song_cursor.to_list(length=self.pool_size)
+
+        # Serialized once per refresh, requests only slice this list.
+        songs: List[dict] = [ encode_song(song_doc) for song_doc in song_doc_list ]
+        random.shuffle(songs)
+
+        # Channels start evenly spread so the home screen rows do not overlap.
+        song_count = len(songs)
+        self._offsets = {
+            channel: index * song_count // len(self.CHANNELS)
+            for index, channel in enumerate(self.CHANNELS)
+        }
+        self._songs = songs
+
+        return None
+
+
+    async def _refresh_until_clean(self) -> None:
+        # An invalidation that lands mid-load triggers one more load, so the
+        # writes it announced are never lost to an in-flight sample.
+        while self._stale:
+            self._stale = False
+            await self._load()
+        return None
+
+
+    def _on_refreshed(self, task: asyncio.Task) -> None:
+        if not task.cancelled() and task.exception() is not None:
+            print("song_pool_refresh_failed",task.exception()) # keep serving the previous pool
+        return None
+
+
+    def _ensure_refresh(self) -> asyncio.Task:
+        if not self._refresh_task or self._refresh_task.done():
+            self._stale = True
+            self._refresh_task = asyncio.create_task(self._refresh_until_clean())
+            self._refresh_task.add_done_callback(self._on_refreshed)
+        return self._refresh_task
+
+
+    async def refresh(self) -> None:
+        # Concurrent refreshes share the one already in flight.
+        await asyncio.shield(self._ensure_refresh())
+        return None
+
+
+    async def _safe_refresh(self) -> None:
+        try :
+            await self.refresh()
+        except Exception :
+            pass # already reported by _on_refreshed
+
+
+    async def draw(self, channel: str, count: int) -> List[dict]:
+        if not self._songs:
+            await self.refresh()
+
+        songs: List[dict] = self._songs
+        song_count = len(songs)
+
+        if song_count <= count:
+            return list(songs)
+
+        offset = self._offsets.get(channel, 0) % song_count
+        self._offsets[channel] = (offset + count) % song_count
+
+        return [ songs[(offset + index) % song_count] for index in range(count) ]
+
+
+    def discard(self, song_ids: Iterable[str]) -> None:
+        discarded_ids = set(song_ids)
+        if discarded_ids:
+            self._songs = [ song for song in self._songs if song['_id'] not in discarded_ids ]
+        return None
+
+
+    def invalidate(self) -> None:
+        self._stale = True
+        self._ensure_refresh()
+        return None
+
+
+    async def _refresh_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.refresh_seconds)
+            await self._safe_refresh()
+
+
+    async def start(self) -> None:
+        await self._safe_refresh()
+        if not self._loop_task or self._loop_task.done():
+            self._loop_task = asyncio.create_task(self._refresh_loop())
+        return None
+
+
+    async def stop(self) -> None:
+        if self._loop_task:
+            self._loop_task.cancel()
+            self._loop_task = None
+        return None
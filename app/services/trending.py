@@ -0,0 +1,189 @@
+import math
+import time
+
+import asyncio
+
+from bson import ObjectId
+
+from typing import Dict, Iterable, List, Optional
+
+from datetime import datetime, timedelta, timezone
+
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+
+from motor.motor_asyncio import AsyncIOMotorCursor
+
+from app.core.config import Settings
+from app.utils.encoders import encode_song
+from app.db.connection import DatabaseConnection
+
+
+class TrendingService():
+    """Ranks songs by exponentially time-decayed play counts.
+
+    Plays are folded into an in-memory map on the event path and written to
+    ``song_scores`` in one unordered bulk write per flush, where each score
+    is decayed to the flush time before the new plays are added. The top-K
+    is recomputed after every flush and served from memory.
+    """
+
+    FLUSH_BATCH_SIZE = 1000
+
+    _instance = None
+    _initialized = False
+
+    def __new__(cls, *args, **kwargs):
+        if not cls._instance:
+            cls._instance = super(TrendingService,cls).__new__(cls)
+        return cls._instance
+
+
+    def __init__(self, db_instance: DatabaseConnection, settings: Settings):
+        if TrendingService._initialized:
+            return
+        self.db_instance = db_instance
+        self.half_life_seconds: int = settings.TRENDING_HALF_LIFE_SECONDS
+        self.decay_rate: float = math.log(2) / settings.TRENDING_HALF_LIFE_SECONDS
+        self.flush_seconds: int = settings.TRENDING_FLUSH_SECONDS
+        self.top_k: int = settings.TRENDING_TOP_K
+        self.max_pending_songs: int = settings.TRENDING_MAX_PENDING_SONGS
+        # Pending weights are growth factors relative to _pending_ref, so a
+        # play is a single dict update and decay is applied once at flush.
+        self._pending: Dict[str, float] = dict()
+        self._pending_ref: float = time.time()
+        self._top_songs: List[dict] = []
+        self._flush_lock: asyncio.Lock = asyncio.Lock()
+        self._early_flush_task: Optional[asyncio.Task] = None
+        self._loop_task: Optional[asyncio.Task] = None
+        TrendingService._initialized = True
+
+
+    def record_play(self, song_id: str) -> None:
+        if not ObjectId.is_valid(song_id):
+            return None
+
+        growth = math.exp(self.decay_rate * (time.time() - self._pending_ref))
+        self._pending[song_id] = self._pending.get(song_id, 0.0) + growth
+
+        if len(self._pending) >= self.max_pending_songs and not (self._early_flush_task and not self._early_flush_task.done()):
+            self._early_flush_task = asyncio.create_task(self._safe_flush())
+
+        return None
+
+
+    def top(self, count: int) -> List[dict]:
+        return self._top_songs[:count]
+
+
+    def discard(self, song_ids: Iterable[str]) -> None:
+        discarded_ids = set(song_ids)
+        if discarded_ids:
+            self._top_songs = [ song for song in self._top_songs if song['_id'] not in discarded_ids ]
+            for song_id in discarded_ids:
+                self._pending.pop(song_id, None)
+        return None
+
+
+    def _decayed_score(self, now: datetime) -> dict:
+        elapsed_seconds = {"$divide": [{"$subtract": [now, {"$ifNull": ["$updated_at", now]}]}, 1000]}
+        return {"$multiply": [{"$ifNull": ["$score", 0]}, {"$exp": {"$multiply": [-self.decay_rate, elapsed_seconds]}}]}
+
+
+    def _fold_back(self, pending: Dict[str, float], pending_ref: float, song_ids: List[str]) -> None:
+        # Unwritten plays go back in, rebased to the current reference time.
+        rebase = math.exp(self.decay_rate * (pending_ref - self._pending_ref))
+        for song_id in song_ids:
+            self._pending[song_id] = self._pending.get(song_id, 0.0) + pending[song_id] * rebase
+        return None
+
+
+    async def _write_scores(self, pending: Dict[str, float], pending_ref: float) -> None:
+        now: datetime = datetime.now(timezone.utc)
+        decay_to_now = math.exp(-self.decay_rate * (now.timestamp() - pending_ref))
+
+        song_ids: List[str] = list(pending)
+        operations: List[UpdateOne] = [
+            UpdateOne(
+                {"_id": ObjectId(song_id)},
+                [{"$set": {"score": {"$add": [self._decayed_score(now), pending[song_id] * decay_to_now]}, "updated_at": now}}],
+                upsert=True
+            )
+            for song_id in song_ids
+        ]
+
+        for start in range(0, len(operations), self.FLUSH_BATCH_SIZE):
+            try :
+                await self.db_instance.song_scores.bulk_write(operations[start:start + self.FLUSH_BATCH_SIZE], ordered=False)
+            except BulkWriteError as bulk_err :
+                print("trending_flush_partial_failure",bulk_err.details.get('writeErrors', [])[:1])
+            except Exception :
+                # Earlier batches landed, only this one and the rest are retried.
+                self._fold_back(pending, pending_ref, song_ids[start:])
+                raise
+
+        return None
+
+
+    async def _compute_top(self) -> None:
+        now: datetime = datetime.now(timezone.utc)
+        # Scores older than ten half-lives weigh less than 0.1% of a fresh play.
+        horizon: datetime = now - timedelta(seconds=self.half_life_seconds * 10)
+
+        pipeline = [
+            {"$match": {"updated_at": {"$gte": horizon}}},
+            {"$addFields": {"trend": self._decayed_score(now)}},
+            {"$sort": {"trend": -1}},
+            {"$limit": self.top_k},
+            {"$lookup": {"from": "songs", "localField": "_id", "foreignField": "_id", "as": "song"}},
+            {"$unwind": "$song"},
+            {"$replaceRoot": {"newRoot": "$song"}},
+        ]
+
+        song_cursor: AsyncIOMotorCursor = self.db_instance.song_scores.aggregate(pipeline=pipeline)
+        song_doc_list = await song_cursor.to_list(length=self.top_k)
+
+        self._top_songs = [ encode_song(song_doc) for song_doc in song_doc_list ]
+
+        return None
+
+
+    async def flush(self) -> None:
+        async with self._flush_lock:
+            pending, pending_ref = self._pending, self._pending_ref
+            self._pending, self._pending_ref = dict(), time.time()
+
+            if pending:
+                await self._write_scores(pending=pending, pending_ref=pending_ref)
+
+            await self._compute_top()
+
+        return None
+
+
+    async def _safe_flush(self) -> None:
+        try :
+            await self.flush()
+        except Exception as err :
+            print("trending_flush_failed",err) # retried on the next tick
+
+
+    async def _flush_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_seconds)
+            await self._safe_flush()
+
+
+    async def start(self) -> None:
+        await self._safe_flush()
+        if not self._loop_task or self._loop_task.done():
+            self._loop_task = asyncio.create_task(self._flush_loop())
+        return None
+
+
+    async def stop(self) -> None:
+        if self._loop_task:
+            self._loop_task.cancel()
+            self._loop_task = None
+        await self._safe_flush()
+        return None
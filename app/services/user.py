@@ -1,14 +1,19 @@
-from typing import List
+from typing import List, Optional
 
 from fastapi import HTTPException
 
 from motor.motor_asyncio import AsyncIOMotorCursor
 
-from app.schemas.user import UserOut
-from app.schemas.message import MessageOut
 from app.db.connection import DatabaseConnection
 from app.errors.exceptions import InternalServerError
-from app.utils.utils import user_doc_to_dict, message_doc_to_dic
+from app.utils.utils import (
+    parse_fields,
+    conversation_id,
+    fields_projection,
+    encode_page_cursor,
+    keyset_page_filter,
+)
+from app.utils.encoders import USER_FIELDS, USER_SUMMARY_FIELDS, encode_fields, encode_message, encode_conversation
 
 
 class UserService():
@@ -16,16 +21,51 @@ class UserService():
     def __init__(self, db_instance: DatabaseConnection):
         self.db_instance = db_instance
 
-    async def fetch_all_users(self, current_user_id: str) -> List[UserOut]:
+    async def fetch_all_users(self, current_user_id: str, fields: Optional[str] = None) -> List[dict]:
         try :
-            user_cursor: AsyncIOMotorCursor = self.db_instance.users.find({ 'clerk_id': { '$ne': current_user_id } })
+            field_list: List[str] = parse_fields(fields, USER_FIELDS, USER_SUMMARY_FIELDS)
+
+            user_cursor: AsyncIOMotorCursor = self.db_instance.users.find(
+                    { 'clerk_id': { '$ne': current_user_id } },
+                    fields_projection(field_list, USER_FIELDS)
+                )
 
             user_doc_list = await user_cursor.to_list()
 
-            user_dict_list: List[dict] = [ user_doc_to_dict(user_doc) for user_doc in user_doc_list ]
-            user_out_list: List[UserOut] = [ UserOut(**user_dict) for user_dict in user_dict_list ]
+            user_list: List[dict] = [ encode_fields(user_doc, USER_FIELDS, field_list) for user_doc in user_doc_list ]
+
+            return user_list
+
+        except HTTPException as http_err :
+            raise http_err
+
+        except Exception as err :
+            raise InternalServerError() from err
+
 
-            return user_out_list
+    async def fetch_messages(self, current_user_id: str, receiver_id: str, limit: int, before: Optional[str] = None) -> dict:
+        try :
+            message_filter: dict = {'conversation_id': conversation_id(current_user_id, receiver_id)}
+            message_filter.update(keyset_page_filter(before, descending=True))
+
+            message_cursor: AsyncIOMotorCursor = (
+                self.db_instance.messages
+                    .find(message_filter, {'conversation_id': 0})
+                    .sort([("created_at", -1), ("_id", -1)])
+                    .limit(limit + 1)
+            )
+
+            message_doc_list = await message_cursor.to_list(length=limit + 1)
+
+            before_cursor: Optional[str] = None
+            if len(message_doc_list) > limit:
+                message_doc_list = message_doc_list[:limit]
+                oldest_message_doc = message_doc_list[-1]
+                before_cursor = encode_page_cursor(oldest_message_doc['created_at'], oldest_message_doc['_id'])
+
+            message_list: List[dict] = [ encode_message(message_doc) for message_doc in reversed(message_doc_list) ]
+
+            return {"items": message_list, "before": before_cursor}
 
         except HTTPException as http_err :
             raise http_err
@@ -34,24 +74,32 @@ class UserService():
             raise InternalServerError() from err
 
 
-    async def fetch_messages(self, current_user_id: str, receiver_id: str) -> List[MessageOut]:
+    async def fetch_conversations(self, current_user_id: str, limit: int, cursor: Optional[str] = None) -> dict:
         try :
-            message_cursor: AsyncIOMotorCursor = self.db_instance.messages.find({
-                    '$or': [
-                        {"sender_id": current_user_id, "receiver_id": receiver_id},
-                        {"sender_id":receiver_id , "receiver_id": current_user_id}
-                    ]
-                })
+            conversation_filter: dict = {'user_id': current_user_id}
+            conversation_filter.update(keyset_page_filter(cursor, descending=True, field='last_message_at'))
+
+            conversation_cursor: AsyncIOMotorCursor = (
+                self.db_instance.conversations
+                    .find(conversation_filter)
+                    .sort([("last_message_at", -1), ("_id", -1)])
+                    .limit(limit + 1)
+            )
 
-            message_doc_list = await message_cursor.to_list()
+            conversation_doc_list = await conversation_cursor.to_list(length=limit + 1)
 
-            message_dict_list: List[dict] = [ message_doc_to_dic(message_doc) for message_doc in message_doc_list ]
-            message_out_list: List[MessageOut] = [ MessageOut(**message_dict) for message_dict in message_dict_list ]
+            next_cursor: Optional[str] = None
+            if len(conversation_doc_list) > limit:
+                conversation_doc_list = conversation_doc_list[:limit]
+                last_conversation_doc = conversation_doc_list[-1]
+                next_cursor = encode_page_cursor(last_conversation_doc['last_message_at'], last_conversation_doc['_id'])
 
-            return message_out_list
+            conversation_list: List[dict] = [ encode_conversation(conversation_doc) for conversation_doc in conversation_doc_list ]
+
+            return {"items": conversation_list, "next": next_cursor}
 
         except HTTPException as http_err :
             raise http_err
 
         except Exception as err :
-            raise InternalServerError() from err
\ No newline at end of file
+            raise InternalServerError() from err
@@ -0,0 +1,249 @@
+import time
+
+import asyncio
+
+from collections import OrderedDict
+
+from typing import Any, Awaitable, Callable, Dict, FrozenSet, Hashable, Iterable, Optional, Set, Tuple
+
+
+class AsyncTTLCache():
+    """In-process cache with per-entry TTL, LRU eviction and request coalescing.
+
+    Concurrent ``get_or_load`` calls for a key that is not cached share a
+    single in-flight ``loader`` call. Failed loads are never cached.
+    """
+
+    def __init__(self, ttl_seconds: float, max_entries: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: OrderedDict[Hashable, Tuple[float, Any]] = OrderedDict()
+        self._pending: Dict[Hashable, asyncio.Task] = dict()
+        self.hits: int = 0
+        self.misses: int = 0
+        self.coalesced: int = 0
+        self.evictions: int = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        entry = self._entries.get(key)
+        if not entry:
+            return default
+
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            self._entries.pop(key, None)
+            return default
+
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+        self._entries.move_to_end(key)
+
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+        return None
+
+    async def get_or_load(self, key: Hashable, loader: Callable[[], Awaitable[Any]]) -> Any:
+        missing = object()
+        value = self.get(key, missing)
+        if value is not missing:
+            self.hits += 1
+            return value
+
+        pending: asyncio.Task | None = self._pending.get(key)
+        if pending:
+            self.coalesced += 1
+            return await asyncio.shield(pending)
+
+        self.misses += 1
+        task: asyncio.Task = asyncio.ensure_future(loader())
+        self._pending[key] = task
+        task.add_done_callback(lambda done_task: self._on_loaded(key, done_task))
+
+        return await asyncio.shield(task)
+
+    def _on_loaded(self, key: Hashable, task: asyncio.Task) -> None:
+        # An invalidation while loading drops the pending entry, the stale
+        # result must then not be stored.
+        if self._pending.get(key) is not task:
+            return None
+
+        self._pending.pop(key, None)
+        if task.cancelled() or task.exception() is not None:
+            return None
+
+        self.set(key, task.result())
+        return None
+
+    def invalidate(self, key: Hashable) -> None:
+        self._entries.pop(key, None)
+        self._pending.pop(key, None)
+        return None
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._pending.clear()
+        return None
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses + self.coalesced
+        return {
+            "size": len(self._entries),
+            "maxEntries": self.max_entries,
+            "ttlSeconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "evictions": self.evictions,
+            "hitRatio": round((self.hits + self.coalesced) / lookups, 4) if lookups else 0.0,
+        }
+
+
+class TaggedBytesCache():
+    """LRU cache of encoded bodies bounded by total size, with tag invalidation.
+
+    Every entry carries the tags it was rendered from and invalidating a tag
+    drops exactly those entries. A render that overlaps any invalidation is
+    still returned to its callers but never stored.
+    """
+
+    ENTRY_OVERHEAD_BYTES = 256
+
+    def __init__(self, max_bytes: int, max_entries: int, ttl_seconds: float):
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: OrderedDict[Hashable, Tuple[float, bytes, FrozenSet[str]]] = OrderedDict()
+        self._tag_keys: Dict[str, Set[Hashable]] = dict()
+        self._pending: Dict[Hashable, asyncio.Task] = dict()
+        self._generation: int = 0
+        self.size_bytes: int = 0
+        self.hits: int = 0
+        self.misses: int = 0
+        self.coalesced: int = 0
+        self.evictions: int = 0
+        self.invalidations: int = 0
+
+    def _entry_bytes(self, body: bytes) -> int:
+        return len(body) + self.ENTRY_OVERHEAD_BYTES
+
+    def _remove(self, key: Hashable) -> None:
+        entry = self._entries.pop(key, None)
+        if not entry:
+            return None
+
+        _, body, tags = entry
+        self.size_bytes -= self._entry_bytes(body)
+        for tag in tags:
+            tag_keys = self._tag_keys.get(tag)
+            if tag_keys is not None:
+                tag_keys.discard(key)
+                if not tag_keys:
+                    del self._tag_keys[tag]
+        return None
+
+    def get(self, key: Hashable) -> Optional[bytes]:
+        entry = self._entries.get(key)
+        if not entry:
+            return None
+
+        expires_at, body, _ = entry
+        if expires_at <= time.monotonic():
+            self._remove(key)
+            return None
+
+        self._entries.move_to_end(key)
+        return body
+
+    def set(self, key: Hashable, body: bytes, tags: Iterable[str]) -> None:
+        self._remove(key)
+
+        entry_bytes = self._entry_bytes(body)
+        if entry_bytes > self.max_bytes:
+            return None
+
+        tag_set: FrozenSet[str] = frozenset(tags)
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, body, tag_set)
+        self.size_bytes += entry_bytes
+        for tag in tag_set:
+            self._tag_keys.setdefault(tag, set()).add(key)
+
+        while self.size_bytes > self.max_bytes or len(self._entries) > self.max_entries:
+            self._remove(next(iter(self._entries)))
+            self.evictions += 1
+
+        return None
+
+    async def get_or_render(self, key: Hashable, render: Callable[[], Awaitable[Tuple[bytes, Iterable[str]]]]) -> bytes:
+        body = self.get(key)
+        if body is not None:
+            self.hits += 1
+            return body
+
+        pending: asyncio.Task | None = self._pending.get(key)
+        if pending:
+            self.coalesced += 1
+            body, _ = await asyncio.shield(pending)
+            return body
+
+        self.misses += 1
+        generation: int = self._generation
+        task: asyncio.Task = asyncio.ensure_future(render())
+        self._pending[key] = task
+        task.add_done_callback(lambda done_task: self._on_rendered(key, generation, done_task))
+
+        body, _ = await asyncio.shield(task)
+        return body
+
+    def _on_rendered(self, key: Hashable, generation: int, task: asyncio.Task) -> None:
+        if self._pending.get(key) is task:
+            self._pending.pop(key, None)
+
+        if task.cancelled() or task.exception() is not None or generation != self._generation:
+            return None
+
+        body, tags = task.result()
+        self.set(key, body, tags)
+        return None
+
+    def invalidate_tags(self, tags: Iterable[str]) -> int:
+        removed: int = 0
+        for tag in set(tags):
+            for key in list(self._tag_keys.get(tag, ())):
+                self._remove(key)
+                removed += 1
+
+        # In-flight renders may have read the old data.
+        self._generation += 1
+        self._pending.clear()
+        self.invalidations += removed
+        return removed
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._tag_keys.clear()
+        self._generation += 1
+        self._pending.clear()
+        self.size_bytes = 0
+        return None
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses + self.coalesced
+        return {
+            "size": len(self._entries),
+            "maxEntries": self.max_entries,
+            "bytes": self.size_bytes,
+            "maxBytes": self.max_bytes,
+            "ttlSeconds": self.ttl_seconds,
+            "tags": len(self._tag_keys),
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+            "hitRatio": round((self.hits + self.coalesced) / lookups, 4) if lookups else 0.0,
+        }
@@ -0,0 +1,148 @@
+import orjson
+
+from bson import ObjectId
+
+from datetime import datetime
+
+from typing import Any, Dict, List, Optional, Tuple
+
+from starlette.responses import Response
+
+
+# Trusted read path: documents we wrote ourselves are mapped straight to the
+# aliased output shape of SongOut, AlbumOut, AlbumDetailOut, UserOut and
+# MessageOut, skipping the Pydantic round trip. Key order matches the models.
+
+
+def _default(value: Any) -> Any:
+    if isinstance(value, ObjectId):
+        return str(value)
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+def dumps(content: Any) -> bytes:
+    return orjson.dumps(content, default=_default, option=orjson.OPT_PASSTHROUGH_DATETIME)
+
+
+class EncodedJSONResponse(Response):
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        if isinstance(content, bytes):
+            return content
+        return dumps(content)
+
+
+# Output field name -> document field, in model key order. Sparse reads
+# project and encode only the requested subset of these.
+SONG_FIELDS: Dict[str, str] = {
+    "_id": "_id",
+    "title": "title",
+    "artist": "artist",
+    "imageUrl": "image_url",
+    "audioUrl": "audio_url",
+    "duration": "duration",
+    "createdAt": "created_at",
+    "albumId": "album_id",
+}
+
+ALBUM_FIELDS: Dict[str, str] = {
+    "_id": "_id",
+    "title": "title",
+    "artist": "artist",
+    "imageUrl": "image_url",
+    "releaseYear": "release_year",
+    "songs": "songs",
+    "createdAt": "created_at",
+}
+
+USER_FIELDS: Dict[str, str] = {
+    "clerkId": "clerk_id",
+    "fullName": "full_name",
+    "email": "email",
+    "imageUrl": "image_url",
+    "createdAt": "created_at",
+    "_id": "_id",
+}
+
+SONG_DEFAULT_FIELDS: Tuple[str, ...] = tuple(SONG_FIELDS)
+ALBUM_SUMMARY_FIELDS: Tuple[str, ...] = ("_id", "title", "artist", "imageUrl", "releaseYear", "createdAt")
+USER_SUMMARY_FIELDS: Tuple[str, ...] = ("clerkId", "fullName", "imageUrl", "createdAt", "_id")
+
+
+def encode_fields(doc: dict, field_map: Dict[str, str], fields: List[str]) -> dict:
+    # ObjectIds and datetimes are left to dumps().
+    return { name: doc.get(field_map[name]) for name in fields }
+
+
+def _optional_id(value: Optional[ObjectId]) -> Optional[str]:
+    return str(value) if value else None
+
+
+def encode_song(song_doc: dict) -> dict:
+    return {
+        "_id": str(song_doc['_id']),
+        "title": song_doc['title'],
+        "artist": song_doc['artist'],
+        "imageUrl": song_doc['image_url'],
+        "audioUrl": song_doc['audio_url'],
+        "duration": song_doc['duration'],
+        "createdAt": song_doc['created_at'].isoformat(),
+        "albumId": _optional_id(song_doc['album_id']),
+    }
+
+
+def encode_album(album_doc: dict) -> dict:
+    return {
+        "_id": str(album_doc['_id']),
+        "title": album_doc['title'],
+        "artist": album_doc['artist'],
+        "imageUrl": album_doc['image_url'],
+        "releaseYear": album_doc['release_year'],
+        "songs": [ str(song_id) for song_id in album_doc['songs'] ] if album_doc['songs'] else [],
+        "createdAt": album_doc['created_at'].isoformat(),
+    }
+
+
+def encode_album_detail(album_doc: dict, song_doc_list: List[dict]) -> dict:
+    album_detail: dict = encode_album(album_doc)
+    album_detail['songs'] = [ encode_song(song_doc) for song_doc in song_doc_list ]
+    return album_detail
+
+
+def encode_user(user_doc: dict) -> dict:
+    return {
+        "clerkId": user_doc['clerk_id'],
+        "fullName": user_doc['full_name'],
+        "email": user_doc['email'],
+        "imageUrl": user_doc['image_url'],
+        "createdAt": user_doc['created_at'].isoformat(),
+        "_id": str(user_doc['_id']),
+    }
+
+
+def encode_conversation(conversation_doc: dict) -> dict:
+    last_message: dict = conversation_doc['last_message']
+    return {
+        "peerId": conversation_doc['peer_id'],
+        "lastMessage": {
+            "_id": str(last_message['_id']),
+            "senderId": last_message['sender_id'],
+            "content": last_message['content'],
+            "createdAt": last_message['created_at'].isoformat(),
+        },
+        "lastMessageAt": conversation_doc['last_message_at'].isoformat(),
+        "unreadCount": conversation_doc['unread'],
+    }
+
+
+def encode_message(message_doc: dict) -> dict:
+    return {
+        "_id": str(message_doc['_id']),
+        "senderId": message_doc['sender_id'],
+        "receiverId": message_doc['receiver_id'],
+        "content": message_doc['content'],
+        "createdAt": message_doc['created_at'].isoformat(),
+    }
@@ -1,4 +1,11 @@
-from typing import Any
+import base64
+import unicodedata
+
+from bson import ObjectId
+
+from typing import Any, Dict, List, Optional, Tuple
+
+from datetime import datetime, timedelta, timezone
 
 from fastapi import HTTPException, status, UploadFile
 
@@ -112,4 +119,115 @@ def message_doc_to_dic(message_doc: Any) -> dict:
     message_dict['created_at'] = message_doc['created_at']
     message_dict['receiver_id'] = message_doc['receiver_id']
 
-    return message_dict
\ No newline at end of file
+    return message_dict
+
+
+EPOCH: datetime = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+def encode_page_cursor(created_at: datetime, doc_id: ObjectId) -> str:
+    if not created_at.tzinfo:
+        created_at = created_at.replace(tzinfo=timezone.utc)
+
+    # BSON dates have millisecond precision, so the cursor round trips exactly.
+    created_at_ms: int = (created_at - EPOCH) // timedelta(milliseconds=1)
+    raw_cursor: bytes = f"{created_at_ms}:{doc_id}".encode()
+
+    return base64.urlsafe_b64encode(raw_cursor).decode().rstrip("=")
+
+
+def decode_page_cursor(cursor: str) -> Tuple[datetime, ObjectId]:
+    try :
+        padded_cursor: str = cursor + "=" * (-len(cursor) % 4)
+        raw_cursor: str = base64.urlsafe_b64decode(padded_cursor.encode()).decode()
+        created_at_ms, doc_id = raw_cursor.split(":", 1)
+
+        return EPOCH + timedelta(milliseconds=int(created_at_ms)), ObjectId(doc_id)
+
+    except Exception as err:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"{cursor} is not a valid cursor."
+        ) from err
+
+
+def keyset_filter(created_at: datetime, doc_id: ObjectId, descending: bool = False, field: str = 'created_at') -> dict:
+    operator: str = '$lt' if descending else '$gt'
+
+    return {
+        '$or': [
+            {field: {operator: created_at}},
+            {field: created_at, '_id': {operator: doc_id}},
+        ]
+    }
+
+
+def keyset_page_filter(cursor: Optional[str], descending: bool = False, field: str = 'created_at') -> dict:
+    if not cursor:
+        return {}
+
+    created_at, doc_id = decode_page_cursor(cursor)
+    return keyset_filter(created_at, doc_id, descending=descending, field=field)
+
+
+def canonical_object_id(value: str) -> str:
+    # ObjectId accepts upper case hex, cache keys and tags are always built from the lower case form.
+    if not ObjectId.is_valid(value):
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"{value} is not a valid id."
+        )
+    return str(ObjectId(value))
+
+
+def conversation_id(user_id: str, other_user_id: str) -> str:
+    # Same id whichever side sends.
+    return ":".join(sorted((user_id, other_user_id)))
+
+
+def normalize_search_key(value: str) -> str:
+    decomposed: str = unicodedata.normalize("NFKD", value)
+    folded: str = "".join(char for char in decomposed if not unicodedata.combining(char))
+
+    return " ".join(folded.casefold().split())
+
+
+def prefix_range_filter(field: str, prefix: str) -> dict:
+    # [prefix, prefix with its last character incremented) is exactly the set
+    # of keys starting with prefix, and maps to a single index range scan.
+    upper_bound: str = prefix[:-1] + chr(ord(prefix[-1]) + 1)
+
+    return {field: {'$gte': prefix, '$lt': upper_bound}}
+
+
+def parse_fields(fields: Optional[str], field_map: Dict[str, str], default: Tuple[str, ...]) -> List[str]:
+    if fields is None:
+        return list(default)
+
+    requested = { name.strip() for name in fields.split(",") if name.strip() }
+    unknown = requested - field_map.keys()
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"Unknown fields: {', '.join(sorted(unknown))}. Allowed fields: {', '.join(field_map)}."
+        )
+
+    requested.add("_id")
+    return [ name for name in field_map if name in requested ]
+
+
+def fields_projection(fields: List[str], field_map: Dict[str, str], *required: str) -> dict:
+    projection: dict = { field_map[name]: 1 for name in fields }
+    projection.update({ field: 1 for field in required })
+    return projection
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+
+    # If-None-Match uses the weak comparison.
+    opaque_tag: str = etag.removeprefix("W/")
+    return any(candidate.strip().removeprefix("W/") == opaque_tag for candidate in if_none_match.split(","))
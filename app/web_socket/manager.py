@@ -0,0 +1,144 @@
+import asyncio
+
+import orjson
+
+from typing import Dict, List, Optional
+
+from bson import ObjectId
+
+from pymongo import CursorType, ReturnDocument
+from pymongo.errors import CollectionInvalid
+
+from motor.motor_asyncio import AsyncIOMotorCollection
+
+from socketio import AsyncManager
+from socketio.async_pubsub_manager import AsyncPubSubManager
+
+from app.core.config import Settings
+from app.db.connection import DatabaseConnection
+from app.utils.encoders import dumps
+
+
+class LocalPubSubManager(AsyncPubSubManager):
+    """In-process bus between several servers on one event loop, for tests.
+
+    Messages go through a JSON round trip like they would between processes,
+    so a payload that cannot cross workers fails here too.
+    """
+
+    name = "local"
+
+    _inboxes: Dict[str, List[asyncio.Queue]] = dict()
+
+    def __init__(self, channel: str = "socketio", write_only: bool = False, logger=None):
+        super().__init__(channel=channel, write_only=write_only, logger=logger)
+        self._inbox: asyncio.Queue = asyncio.Queue()
+        if not write_only:
+            LocalPubSubManager._inboxes.setdefault(channel, []).append(self._inbox)
+
+
+    async def _publish(self, data: dict) -> None:
+        encoded: bytes = dumps(data)
+        for inbox in LocalPubSubManager._inboxes.get(self.channel, []):
+            inbox.put_nowait(orjson.loads(encoded))
+        return None
+
+
+    async def _listen(self):
+        while True:
+            yield await self._inbox.get()
+
+
+class MongoPubSubManager(AsyncPubSubManager):
+    """Fans socket emits out to every worker through a capped collection.
+
+    Each worker tails ``socket_events`` with a tailable await cursor, the
+    capped size bounds how far a slow worker can fall behind. Events carry a
+    ``seq`` from a shared counter, ObjectIds from different processes do not
+    sort in insert order, and a cursor that dies is re-opened at the last
+    event it returned.
+    """
+
+    name = "mongo"
+
+    RETRY_SECONDS = 1
+
+    def __init__(self, collection: AsyncIOMotorCollection, capped_bytes: int, channel: str = "socketio", write_only: bool = False, logger=None):
+        super().__init__(channel=channel, write_only=write_only, logger=logger)
+        self.collection = collection
+        self.capped_bytes = capped_bytes
+        self.sequence_id: str = f"{collection.name}:{channel}"
+        self._collection_ready: bool = False
+
+
+    async def _ensure_collection(self) -> None:
+        if self._collection_ready:
+            return None
+        try :
+            await self.collection.database.create_collection(self.collection.name, capped=True, size=self.capped_bytes)
+        except CollectionInvalid :
+            pass # already there
+        self._collection_ready = True
+        return None
+
+
+    async def _next_seq(self) -> int:
+        counter_doc: dict = await self.collection.database.counters.find_one_and_update(
+            {"_id": self.sequence_id},
+            {"$inc": {"seq": 1}},
+            projection={"seq": 1},
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+        return counter_doc['seq']
+
+
+    async def _publish(self, data: dict) -> None:
+        await self._ensure_collection()
+        await self.collection.insert_one({"channel": self.channel, "seq": await self._next_seq(), "data": dumps(data)})
+        return None
+
+
+    async def _listen(self):
+        await self._ensure_collection()
+
+        # Start after whatever is already in the collection, older emits are not ours to replay.
+        last_doc: Optional[dict] = await self.collection.find_one({"channel": self.channel, "seq": {"$exists": True}}, {"seq": 1}, sort=[("$natural", -1)])
+        if not last_doc:
+            # A tailable cursor that matches nothing dies at once, give it an event to sit on.
+            last_doc = {"_id": ObjectId(), "seq": await self._next_seq()}
+            await self.collection.insert_one({**last_doc, "channel": self.channel, "data": None})
+        last_id: ObjectId = last_doc['_id']
+        last_seq: int = last_doc['seq']
+
+        while True:
+            # $gte matches the last event already returned, so the new cursor is never empty
+            # and stays parked at the end of the collection instead of dying when idle.
+            event_cursor = self.collection.find({"channel": self.channel, "seq": {"$gte": last_seq}}, cursor_type=CursorType.TAILABLE_AWAIT)
+            try :
+                while event_cursor.alive:
+                    async for event_doc in event_cursor:
+                        if event_doc['_id'] == last_id:
+                            continue
+                        # A publisher that took its seq before another one inserts after it, keep the highest.
+                        if event_doc['seq'] > last_seq:
+                            last_id, last_seq = event_doc['_id'], event_doc['seq']
+                        if event_doc['data'] is not None:
+                            yield orjson.loads(event_doc['data'])
+            except asyncio.CancelledError :
+                raise
+            except Exception as err :
+                print("socket_events_tail_failed",err)
+
+            # Only after an error or once the last seen event was overwritten by the capped collection.
+            await asyncio.sleep(self.RETRY_SECONDS)
+
+
+def create_client_manager(settings: Settings) -> AsyncManager:
+    # "single" keeps routing in this process, "local" is for tests with several servers in one process.
+    if settings.SOCKET_MANAGER == "mongo":
+        db_instance: DatabaseConnection = DatabaseConnection(settings=settings)
+        return MongoPubSubManager(collection=db_instance.socket_events, capped_bytes=settings.SOCKET_EVENTS_CAPPED_BYTES)
+    if settings.SOCKET_MANAGER == "local":
+        return LocalPubSubManager()
+    return AsyncManager()
@@ -0,0 +1,186 @@
+from socketio import AsyncNamespace
+from socketio.exceptions import ConnectionRefusedError
+
+from typing import List, Tuple
+
+from app.core.security import SessionTokenVerifier
+from app.errors.exceptions import InvalidSessionTokenError
+from app.schemas.auth import SessionClaims
+from app.services.search import SearchIndex
+from app.services.socket import SocketService
+from app.services.activity import ActivityAggregator
+from app.services.trending import TrendingService
+from app.services.analytics import AnalyticsService
+from app.services.recommendation import RecommendationService
+
+
+def user_room(user_id: str) -> str:
+    # Every socket of a user joins this room, the client manager routes it across workers.
+    return f"user:{user_id}"
+
+
+class ChatNamespace(AsyncNamespace):
+    """Socket events for one server, on the services it is given.
+
+    Emits go through the server the namespace is registered on, so several
+    servers sharing a client manager behave like separate workers.
+    """
+
+    def __init__(
+            self,
+            namespace: str,
+            session_verifier: SessionTokenVerifier,
+            search_index: SearchIndex,
+            socket_service: SocketService,
+            trending_service: TrendingService,
+            recommendation_service: RecommendationService,
+            analytics_service: AnalyticsService,
+            activity_aggregator: ActivityAggregator
+        ):
+        super().__init__(namespace)
+        self.session_verifier = session_verifier
+        self.search_index = search_index
+        self.socket_service = socket_service
+        self.trending_service = trending_service
+        self.recommendation_service = recommendation_service
+        self.analytics_service = analytics_service
+        self.activity_aggregator = activity_aggregator
+
+
+    async def _broadcast_presence(self, skip_sid: str | None = None, **changes) -> None:
+        # Deltas carry the presence version, a client that sees a gap asks for presence_resync.
+        version: int = await self.socket_service.presence.bump_version()
+        await self.emit(event="presence_delta",data={"version": version, **changes},skip_sid=skip_sid)
+
+
+    async def _session_user_id(self, sid: str) -> str:
+        # Set once in connect from the verified token, payloads never name the user.
+        session: dict = await self.get_session(sid)
+        return session['user_id']
+
+
+    async def on_connect(self, sid: str, environ: dict, auth: dict | None = None):
+        token: str | None = auth.get('token') if isinstance(auth, dict) else None
+        if not token:
+            raise ConnectionRefusedError("Unauthorized - you must be logged in")
+
+        try:
+            session_claims: SessionClaims = await self.session_verifier.verify(token)
+        except InvalidSessionTokenError as token_err:
+            raise ConnectionRefusedError(token_err.message) from token_err
+        except Exception as err:
+            print("socket_auth_failed",err)
+            raise ConnectionRefusedError("Unauthorized - could not verify session") from err
+
+        await self.save_session(sid,{"user_id": session_claims.user_id})
+
+
+    async def _sync_messages(self, sid: str, user_id: str, last_seen: str) -> None:
+        try:
+            sync_frame: dict = await self.socket_service.sync_messages(user_id=user_id,last_seen=last_seen)
+
+            await self.emit(event="messages_synced",data=sync_frame,to=sid)
+
+        except Exception as err:
+            await self.emit(event="sync_error",data=str(err),to=sid)
+
+
+    async def on_user_connected(self, sid: str, data: str | dict | None = None):
+        # Older clients send their user id, newer ones {userId, lastSeen}. Either way the id is ignored.
+        user_id: str = await self._session_user_id(sid)
+        last_seen: str | None = data.get('lastSeen') if isinstance(data, dict) else None
+
+        await self.enter_room(sid,user_room(user_id))
+        is_new_user: bool = await self.socket_service.presence.add(sid=sid,user_id=user_id)
+
+        # A second tab or device is not news to anyone else.
+        if is_new_user:
+            await self._broadcast_presence(skip_sid=sid,joined=[user_id])
+
+        # Only the new socket gets the full state, taken after the join so it already includes it.
+        await self.emit(event="presence_snapshot",data=await self.socket_service.presence_snapshot(),to=sid)
+
+        # Registered above first, so anything written from here on is delivered live.
+        if last_seen:
+            await self._sync_messages(sid=sid,user_id=user_id,last_seen=last_seen)
+
+
+    async def on_sync_messages(self, sid: str, data: dict):
+        await self._sync_messages(sid=sid,user_id=await self._session_user_id(sid),last_seen=data['lastSeen'])
+
+
+    async def on_presence_resync(self, sid: str, data: dict | None = None):
+        await self.emit(event="presence_snapshot",data=await self.socket_service.presence_snapshot(),to=sid)
+
+
+    async def on_update_activity(self, sid: str, data: dict):
+        self.activity_aggregator.update(user_id=await self._session_user_id(sid),activity=data['activity'])
+
+
+    async def broadcast_activities(self, activities: List[Tuple[str, str]]) -> None:
+        # One frame per tick for everyone, users who went offline in between are dropped.
+        changed: List[Tuple[str, str]] = [
+            (user_id, activity) for user_id, activity in activities
+            if await self.socket_service.presence.set_activity(user_id=user_id,activity=activity)
+        ]
+
+        if changed:
+            await self._broadcast_presence(activities=changed)
+
+
+    async def broadcast_departures(self, user_ids: List[str]) -> None:
+        # Users whose last socket was held by a worker that died, found by the presence heartbeat.
+        await self._broadcast_presence(left=user_ids)
+
+
+    async def on_song_played(self, sid: str, data: dict):
+        song_id: None | str = data.get('songId')
+
+        # Only songs in the catalog count, anything else would be a junk upsert and push out real plays.
+        if isinstance(song_id, str) and self.search_index.has_song(song_id):
+            self.trending_service.record_play(song_id=song_id)
+            self.recommendation_service.record_play(user_id=await self._session_user_id(sid),song_id=song_id)
+
+
+    async def on_send_message(self, sid: str, data: dict):
+        sender_id: str = await self._session_user_id(sid)
+
+        try:
+            if not isinstance(data, dict):
+                raise ValueError("send_message expects {receiverId, content}.")
+
+            # Checked in handle_message before anything is queued for writing.
+            message: dict = await self.socket_service.handle_message(
+                sender_id=sender_id,
+                receiver_id=data.get('receiverId'),
+                content=data.get('content')
+            )
+            self.analytics_service.record("messages_sent")
+
+            await self.emit(event="receive_message",data=message,to=user_room(message['receiverId']))
+
+            await self.emit(event="message_sent",data=message,to=sid)
+
+        except Exception as err:
+            err_msg: str = str(err)
+            await self.emit(event="message_error",data=err_msg,to=sid)
+
+
+    async def on_mark_read(self, sid: str, data: dict):
+        user_id: str = await self._session_user_id(sid)
+        peer_id: str = data['peerId']
+
+        try:
+            await self.socket_service.mark_read(user_id=user_id,peer_id=peer_id)
+
+            await self.emit(event="conversation_read",data={"peerId": peer_id},to=sid)
+
+        except Exception as err:
+            print("mark_read_failed",err)
+
+
+    async def on_disconnect(self, sid: str, reason: str | None = None):
+        disconnected_user_id: None | str = await self.socket_service.presence.remove(sid=sid)
+
+        if disconnected_user_id:
+            await self._broadcast_presence(left=[disconnected_user_id])
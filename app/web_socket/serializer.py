@@ -0,0 +1,18 @@
+import orjson
+
+from typing import Any
+
+from app.utils.encoders import dumps as dumps_bytes
+
+
+# JSON module handed to the socket server. orjson output is already compact,
+# so the separators socketio asks for are ignored, and payloads encoded ahead
+# of time as orjson.Fragment are embedded without being parsed again.
+
+
+def dumps(content: Any, *args, **kwargs) -> str:
+    return dumps_bytes(content).decode()
+
+
+def loads(content: str | bytes, *args, **kwargs) -> Any:
+    return orjson.loads(content)
@@ -0,0 +1,65 @@
+import sys
+import random
+import asyncio
+
+from typing import List, Tuple
+
+from app.core.config import Settings
+from app.services.activity import ActivityAggregator
+
+
+# Frames pushed to clients for activity changes, one broadcast per update
+# as update_activity used to do against ActivityAggregator's one frame per
+# tick. Every user changes activity as a Poisson process, every broadcast
+# reaches every connected user. Runs in real time on the real aggregator.
+#
+#   python -m benchmarks.activity [seconds] [mean seconds between changes]
+
+
+async def simulate(users: int, mean_interval: float, seconds: float, settings: Settings, seed: int = 7) -> Tuple[int, int]:
+    ActivityAggregator._instance = None
+    ActivityAggregator._initialized = False
+    activity_aggregator: ActivityAggregator = ActivityAggregator(settings=settings)
+
+    async def broadcast(activities: List[Tuple[str, str]]) -> None:
+        return None
+
+    await activity_aggregator.start(broadcast)
+
+    # All users together change activity at users / mean_interval per second.
+    rng: random.Random = random.Random(seed)
+    loop = asyncio.get_running_loop()
+    deadline: float = loop.time() + seconds
+    while True:
+        await asyncio.sleep(rng.expovariate(users / mean_interval))
+        if loop.time() >= deadline:
+            break
+        activity_aggregator.update(user_id=f"user_{rng.randrange(users)}", activity=rng.choice(("Listening", "Idle", "Browsing")))
+
+    # Let the last pending frame go out before counting.
+    await asyncio.sleep(settings.ACTIVITY_MAX_LATENCY_MS / 1000)
+    await activity_aggregator.stop()
+    return activity_aggregator.updates, activity_aggregator.frames
+
+
+def main(argv: List[str]) -> None:
+    seconds: float = float(argv[0]) if argv else 10.0
+    mean_interval: float = float(argv[1]) if len(argv) > 1 else 180.0
+    settings: Settings = Settings(APP_NAME="benchmark")
+
+    print(
+        f"one change per user every {mean_interval:.0f} s on average, {settings.ACTIVITY_TICK_MS} ms tick,"
+        f" {settings.ACTIVITY_MAX_LATENCY_MS} ms max latency, {seconds} s per run"
+    )
+    for users in (1000, 10000):
+        updates, frames = asyncio.run(simulate(users, mean_interval, seconds, settings))
+        before: float = updates * users / seconds
+        after: float = frames * users / seconds
+        print(
+            f"  {users:>6} users  {updates / seconds:6.1f} updates/s  per update {before:10.0f} frames/s"
+            f"  per tick {after:8.0f} frames/s  {before / after if after else 0:5.1f}x fewer"
+        )
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,78 @@
+import sys
+import time
+
+from bson import ObjectId
+
+from typing import Callable, List
+
+from datetime import datetime, timedelta, timezone
+
+from app.schemas.song import SongOut, SongPage
+from app.utils.encoders import EncodedJSONResponse, SONG_DEFAULT_FIELDS, SONG_FIELDS, dumps, encode_fields, encode_song
+
+
+# Trusted read path against the Pydantic path it replaced, on a list page
+# of song documents shaped like the ones AdminService writes.
+#
+#   python -m benchmarks.encoders [documents] [rounds]
+
+
+def song_docs(count: int) -> List[dict]:
+    created_at: datetime = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    album_ids: List[ObjectId] = [ ObjectId() for _ in range(max(1, count // 12)) ]
+    return [
+        {
+            "_id": ObjectId(),
+            "title": f"Song number {index}",
+            "title_key": f"song number {index}",
+            "artist": f"Artist {index % 500}",
+            "image_url": f"https://res.cloudinary.com/demo/image/upload/v1700000000/{index}/cover.jpg",
+            "audio_url": f"https://res.cloudinary.com/demo/video/upload/v1700000000/{index}/audio.mp3",
+            "duration": 180 + index % 240,
+            "created_at": created_at + timedelta(seconds=index),
+            "album_id": album_ids[index % len(album_ids)] if index % 5 else None,
+        }
+        for index in range(count)
+    ]
+
+
+def pydantic_page(docs: List[dict]) -> bytes:
+    # Before: full model per document, then FastAPI style serialization of the page.
+    song_list = [ SongOut(**doc) for doc in docs ]
+    return SongPage(items=song_list, next=None).model_dump_json(by_alias=True).encode()
+
+
+def encoded_page(docs: List[dict]) -> bytes:
+    return EncodedJSONResponse(content={"items": [ encode_song(doc) for doc in docs ], "next": None}).body
+
+
+def sparse_page(docs: List[dict]) -> bytes:
+    fields: List[str] = list(SONG_DEFAULT_FIELDS)
+    return dumps({"items": [ encode_fields(doc, SONG_FIELDS, fields) for doc in docs ], "next": None})
+
+
+def best_of(render: Callable[[List[dict]], bytes], docs: List[dict], rounds: int) -> float:
+    timings: List[float] = []
+    for _ in range(rounds):
+        started: float = time.perf_counter()
+        render(docs)
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def main(argv: List[str]) -> None:
+    count: int = int(argv[0]) if argv else 10000
+    rounds: int = int(argv[1]) if len(argv) > 1 else 5
+    docs: List[dict] = song_docs(count)
+
+    baseline: float = best_of(pydantic_page, docs, rounds)
+    print(f"{count} songs, best of {rounds}")
+    print(f"  pydantic         {baseline * 1000:8.1f} ms  {len(pydantic_page(docs)):>9} bytes")
+
+    for name, render in (("encode_song", encoded_page), ("encode_fields", sparse_page)):
+        elapsed: float = best_of(render, docs, rounds)
+        print(f"  {name:<16} {elapsed * 1000:8.1f} ms  {len(render(docs)):>9} bytes  {baseline / elapsed:5.1f}x")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
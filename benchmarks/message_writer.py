@@ -0,0 +1,128 @@
+import sys
+import asyncio
+
+from bson import ObjectId
+
+from typing import Awaitable, Callable, List
+
+from datetime import datetime, timezone
+
+from app.core.config import Settings
+from app.services.message_writer import MessageWriter, conversation_updates
+from app.utils.utils import conversation_id
+
+
+# Chat message throughput, the per-message insert send_message used to do
+# against the group commit in MessageWriter. There is no Mongo server here,
+# so collections are simulated: every call holds one connection from a
+# motor-sized pool for a network round trip plus a small cost per document.
+#
+#   python -m benchmarks.message_writer [round trip ms] [pool size] [seconds]
+
+
+PER_DOCUMENT_SECONDS = 0.00001
+
+
+class SimulatedCollection():
+
+    def __init__(self, pool: asyncio.Semaphore, round_trip_seconds: float):
+        self.pool = pool
+        self.round_trip_seconds = round_trip_seconds
+        self.calls: int = 0
+
+
+    async def _call(self, documents: int) -> None:
+        async with self.pool:
+            self.calls += 1
+            await asyncio.sleep(self.round_trip_seconds + documents * PER_DOCUMENT_SECONDS)
+        return None
+
+
+    async def insert_one(self, document: dict) -> None:
+        await self._call(1)
+
+
+    async def insert_many(self, documents: List[dict], ordered: bool = True) -> None:
+        await self._call(len(documents))
+
+
+    async def bulk_write(self, operations: list, ordered: bool = True) -> None:
+        await self._call(len(operations))
+
+
+class SimulatedDatabase():
+
+    def __init__(self, pool_size: int, round_trip_seconds: float):
+        pool: asyncio.Semaphore = asyncio.Semaphore(pool_size)
+        self.messages = SimulatedCollection(pool, round_trip_seconds)
+        self.conversations = SimulatedCollection(pool, round_trip_seconds)
+
+
+def message_doc(sender_id: str, receiver_id: str) -> dict:
+    return {
+        "_id": ObjectId(),
+        "sender_id": sender_id,
+        "receiver_id": receiver_id,
+        "content": "See you at the show tonight?",
+        "created_at": datetime.now(timezone.utc),
+        "conversation_id": conversation_id(sender_id, receiver_id),
+    }
+
+
+def per_message(db: SimulatedDatabase, settings: Settings) -> Callable[[dict], Awaitable[None]]:
+    # Before: each sender awaited its own insert and its own summary update.
+    async def write(document: dict) -> None:
+        await db.messages.insert_one(document)
+        await db.conversations.bulk_write(conversation_updates(document, settings.CONVERSATION_PREVIEW_LENGTH), ordered=False)
+    return write
+
+
+async def throughput(write: Callable[[dict], Awaitable[None]], senders: int, seconds: float) -> int:
+    # Every sender waits for its message to be written before sending the next, like a socket handler.
+    loop = asyncio.get_running_loop()
+    deadline: float = loop.time() + seconds
+    sent: List[int] = [0] * senders
+
+    async def sender(index: int) -> None:
+        while loop.time() < deadline:
+            await write(message_doc(f"user_{index}", f"user_{(index + 1) % senders}"))
+            sent[index] += 1
+
+    await asyncio.gather(*(sender(index) for index in range(senders)))
+    return sum(sent)
+
+
+async def run(senders: int, pool_size: int, round_trip_seconds: float, seconds: float, settings: Settings) -> str:
+    db: SimulatedDatabase = SimulatedDatabase(pool_size, round_trip_seconds)
+    before: int = await throughput(per_message(db, settings), senders, seconds)
+
+    MessageWriter._instance = None
+    MessageWriter._initialized = False
+    db = SimulatedDatabase(pool_size, round_trip_seconds)
+    message_writer: MessageWriter = MessageWriter(db_instance=db, settings=settings)
+    await message_writer.start()
+    after: int = await throughput(message_writer.write, senders, seconds)
+    await message_writer.stop()
+
+    return (
+        f"  {senders:>4} senders  per message {before / seconds:8.0f} msg/s"
+        f"  group commit {after / seconds:8.0f} msg/s  average batch {message_writer.stats()['averageBatchSize']:6.1f}"
+    )
+
+
+def main(argv: List[str]) -> None:
+    round_trip_ms: float = float(argv[0]) if argv else 1.0
+    pool_size: int = int(argv[1]) if len(argv) > 1 else 10
+    seconds: float = float(argv[2]) if len(argv) > 2 else 2.0
+    settings: Settings = Settings(APP_NAME="benchmark")
+
+    print(
+        f"{round_trip_ms} ms round trip, {pool_size} connections, batches of up to {settings.MESSAGE_BATCH_SIZE},"
+        f" {settings.MESSAGE_BATCH_LINGER_MS} ms linger, {settings.MESSAGE_WRITE_CONCURRENCY} in flight, {seconds} s per run"
+    )
+    for senders in (1, 50, 500):
+        print(asyncio.run(run(senders, pool_size, round_trip_ms / 1000, seconds, settings)))
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,102 @@
+import sys
+import time
+import tracemalloc
+
+from typing import Callable, Dict, List, Optional, Tuple
+
+from app.services.presence import PresenceRegistry
+
+
+# PresenceRegistry against the two dicts it replaced (user -> sid and
+# user -> activity, disconnect by scanning for the sid). Memory counts the
+# containers and records only, ids are created up front and shared.
+#
+#   python -m benchmarks.presence [connections] [rounds]
+
+
+class DictPresence():
+    # Before: one sid per user, disconnect scans every user for the sid.
+
+    def __init__(self):
+        self.user_sockets: Dict[str, str] = dict()
+        self.user_activities: Dict[str, str] = dict()
+
+    def add(self, sid: str, user_id: str) -> None:
+        self.user_sockets[user_id] = sid
+        self.user_activities[user_id] = PresenceRegistry.DEFAULT_ACTIVITY
+
+    def remove(self, sid: str) -> Optional[str]:
+        removed_user_id: Optional[str] = None
+        for user_id, user_sid in self.user_sockets.items():
+            if user_sid == sid:
+                removed_user_id = user_id
+        if removed_user_id:
+            self.user_sockets.pop(removed_user_id)
+            self.user_activities.pop(removed_user_id)
+        return removed_user_id
+
+    def set_activity(self, user_id: str, activity: str) -> bool:
+        if user_id not in self.user_activities:
+            return False
+        self.user_activities[user_id] = activity
+        return True
+
+
+def connections(count: int) -> List[Tuple[str, str]]:
+    return [ (f"{index:020x}", f"user_{index:027x}") for index in range(count) ]
+
+
+def filled(factory: Callable[[], object], pairs: List[Tuple[str, str]]) -> Tuple[object, int]:
+    tracemalloc.start()
+    presence = factory()
+    for sid, user_id in pairs:
+        presence.add(sid, user_id)
+    allocated, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return presence, allocated
+
+
+def per_operation(operation: Callable[[str, str], object], pairs: List[Tuple[str, str]]) -> float:
+    started: float = time.perf_counter()
+    for sid, user_id in pairs:
+        operation(sid, user_id)
+    return (time.perf_counter() - started) / len(pairs)
+
+
+def best_of(measure: Callable[[], float], rounds: int) -> float:
+    return min(measure() for _ in range(rounds))
+
+
+def main(argv: List[str]) -> None:
+    count: int = int(argv[0]) if argv else 100000
+    rounds: int = int(argv[1]) if len(argv) > 1 else 3
+    pairs: List[Tuple[str, str]] = connections(count)
+    # The old remove is linear, a sample is enough to time it.
+    sample: List[Tuple[str, str]] = pairs[::max(1, count // 200)]
+
+    print(f"{count} connections, one socket per user, best of {rounds}")
+    for name, factory in (("registry", PresenceRegistry), ("dicts", DictPresence)):
+        _, allocated = filled(factory, pairs)
+
+        def add() -> float:
+            presence = factory()
+            return per_operation(presence.add, pairs)
+
+        def set_activity() -> float:
+            presence, _ = filled(factory, pairs)
+            return per_operation(lambda sid, user_id: presence.set_activity(user_id, "Listening"), pairs)
+
+        def remove() -> float:
+            presence, _ = filled(factory, pairs)
+            return per_operation(lambda sid, user_id: presence.remove(sid), sample)
+
+        print(
+            f"  {name:<9} {allocated / count:6.0f} B/connection"
+            f"  add {best_of(add, rounds) * 1e6:6.2f} us"
+            f"  activity {best_of(set_activity, rounds) * 1e6:6.2f} us"
+            f"  remove {best_of(remove, rounds) * 1e6:10.2f} us"
+        )
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
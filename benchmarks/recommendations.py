@@ -0,0 +1,55 @@
+import sys
+import time
+
+import numpy as np
+
+from typing import Dict, List, Tuple
+
+from app.services.recommendation import build_recommendations
+
+
+# The CPU part of RecommendationService.rebuild, on a synthetic listens
+# window where song popularity follows a power law like real catalogs.
+#
+#   python -m benchmarks.recommendations [users] [songs] [listens per user] [rounds]
+
+
+def listens(user_count: int, song_count: int, per_user: int, seed: int = 7) -> Tuple[List[str], List[str], List[int], List[int], List[int]]:
+    rng = np.random.default_rng(seed)
+    popularity = 1.0 / np.arange(1, song_count + 1) ** 0.8
+    popularity /= popularity.sum()
+
+    user_rows: List[int] = []
+    song_cols: List[int] = []
+    for user in range(user_count):
+        played = np.unique(rng.choice(song_count, size=min(per_user, song_count), p=popularity))
+        user_rows.extend([user] * len(played))
+        song_cols.extend(played.tolist())
+
+    play_counts: List[int] = rng.geometric(0.4, size=len(user_rows)).tolist()
+    user_ids: List[str] = [ f"user_{user}" for user in range(user_count) ]
+    song_ids: List[str] = [ f"{song:024x}" for song in range(song_count) ]
+    return user_ids, song_ids, user_rows, song_cols, play_counts
+
+
+def main(argv: List[str]) -> None:
+    user_count: int = int(argv[0]) if argv else 10000
+    song_count: int = int(argv[1]) if len(argv) > 1 else 3000
+    per_user: int = int(argv[2]) if len(argv) > 2 else 40
+    rounds: int = int(argv[3]) if len(argv) > 3 else 2
+    user_ids, song_ids, user_rows, song_cols, play_counts = listens(user_count, song_count, per_user)
+
+    print(f"{user_count} users, {song_count} songs, {len(user_rows)} listens, top 20, best of {rounds}")
+    for max_chunk_cells in (1 << 18, 1 << 20, 1 << 22, 1 << 24):
+        timings: List[float] = []
+        for _ in range(rounds):
+            started: float = time.perf_counter()
+            recommendations: Dict[str, List[str]] = build_recommendations(
+                user_ids, song_ids, user_rows, song_cols, play_counts, 20, max_chunk_cells=max_chunk_cells
+            )
+            timings.append(time.perf_counter() - started)
+        print(f"  chunk {max_chunk_cells:>9} cells  {min(timings) * 1000:8.1f} ms  {len(recommendations):>7} users with recommendations")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
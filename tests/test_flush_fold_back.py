@@ -0,0 +1,73 @@
+import asyncio
+
+from bson import ObjectId
+
+from typing import List
+
+import pytest
+
+from app.core.config import Settings
+from app.services.trending import TrendingService
+from app.services.analytics import AnalyticsService
+
+
+# Flushes write in batches, a failure part way through must only put back
+# what was not written, or the next tick counts the earlier batches twice.
+
+
+class FailingCollection():
+
+    def __init__(self, fail_from_call: int):
+        self.fail_from_call = fail_from_call
+        self.written: List[list] = []
+
+    async def bulk_write(self, operations: list, ordered: bool = True) -> None:
+        if len(self.written) >= self.fail_from_call:
+            raise ConnectionError("connection reset")
+        self.written.append(operations)
+
+
+class FailingDatabase():
+
+    def __init__(self, fail_from_call: int):
+        self.song_scores = FailingCollection(fail_from_call)
+        self.rollups = FailingCollection(fail_from_call)
+
+
+@pytest.fixture
+def settings() -> Settings:
+    return Settings(APP_NAME="test")
+
+
+def test_trending_folds_back_only_unwritten_batches(monkeypatch, settings):
+    monkeypatch.setattr(TrendingService, "_instance", None)
+    monkeypatch.setattr(TrendingService, "_initialized", False)
+    monkeypatch.setattr(TrendingService, "FLUSH_BATCH_SIZE", 2)
+
+    trending_service = TrendingService(db_instance=FailingDatabase(fail_from_call=1), settings=settings)
+    song_ids: List[str] = [ str(ObjectId()) for _ in range(5) ]
+    for song_id in song_ids:
+        trending_service.record_play(song_id=song_id)
+
+    with pytest.raises(ConnectionError):
+        asyncio.run(trending_service.flush())
+
+    assert len(trending_service.db_instance.song_scores.written[0]) == 2
+    assert sorted(trending_service._pending) == sorted(song_ids[2:])
+
+
+def test_analytics_folds_back_only_unwritten_batches(monkeypatch, settings):
+    monkeypatch.setattr(AnalyticsService, "_instance", None)
+    monkeypatch.setattr(AnalyticsService, "_initialized", False)
+    monkeypatch.setattr(AnalyticsService, "FLUSH_BATCH_SIZE", 1)
+
+    analytics_service = AnalyticsService(db_instance=FailingDatabase(fail_from_call=1), settings=settings)
+    analytics_service.record("messages_sent", 3)
+    analytics_service.record("songs_added", 2)
+
+    with pytest.raises(ConnectionError):
+        asyncio.run(analytics_service.flush())
+
+    # messages_sent went out in the first batch, songs_added failed in the second.
+    assert len(analytics_service.db_instance.rollups.written) == 1
+    assert [ (metric, value) for (metric, _), value in analytics_service._pending.items() ] == [("songs_added", 2)]
@@ -0,0 +1,72 @@
+import asyncio
+
+from bson import ObjectId
+
+from typing import List
+
+from datetime import datetime, timezone
+
+import pytest
+
+from app.core.config import Settings
+from app.services.socket import SocketService
+from app.services.message_writer import MessageWriter
+
+
+class MemoryCollection():
+
+    def __init__(self):
+        self.docs: List[dict] = []
+
+    async def insert_many(self, docs: List[dict], ordered: bool = True) -> None:
+        self.docs.extend(docs)
+
+    async def bulk_write(self, operations: list, ordered: bool = True) -> None:
+        self.docs.extend(operations)
+
+
+class MemoryDatabase():
+
+    def __init__(self):
+        self.messages = MemoryCollection()
+        self.conversations = MemoryCollection()
+
+
+def message_doc(content: object) -> dict:
+    return {
+        "_id": ObjectId(),
+        "sender_id": "user_alice",
+        "receiver_id": "user_bob",
+        "content": content,
+        "created_at": datetime.now(timezone.utc),
+        "conversation_id": "user_alice:user_bob",
+    }
+
+
+@pytest.fixture
+def writer(monkeypatch) -> MessageWriter:
+    for singleton in (MessageWriter, SocketService):
+        monkeypatch.setattr(singleton, "_instance", None)
+        monkeypatch.setattr(singleton, "_initialized", False)
+    return MessageWriter(db_instance=MemoryDatabase(), settings=Settings(APP_NAME="test"))
+
+
+def test_summary_failure_does_not_fail_saved_messages(writer):
+
+    async def scenario() -> List[object]:
+        loop = asyncio.get_running_loop()
+        batch = [ (message_doc("hi"), loop.create_future()), (message_doc(123), loop.create_future()) ]
+        await writer._write_batch(batch)
+        return [ future.result() for _, future in batch ]
+
+    assert asyncio.run(scenario()) == [None, None]
+    assert len(writer.db_instance.messages.docs) == 2
+
+
+@pytest.mark.parametrize("receiver_id, content", [("user_bob", 123), ("user_bob", {}), (None, "hi"), ("", "hi"), (["user_bob"], "hi")])
+def test_malformed_message_is_rejected_before_the_queue(writer, receiver_id, content):
+    socket_service = SocketService(db_instance=None, message_writer=writer, presence_store=None, settings=Settings(APP_NAME="test"))
+
+    with pytest.raises(ValueError):
+        asyncio.run(socket_service.handle_message(sender_id="user_alice", receiver_id=receiver_id, content=content))
+    assert writer._queue.qsize() == 0
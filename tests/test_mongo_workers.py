@@ -0,0 +1,237 @@
+import asyncio
+
+from typing import Awaitable, Callable, List
+
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from pymongo.errors import PyMongoError
+
+from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorDatabase
+
+from app.core.config import Settings
+from app.services.presence import MongoPresenceStore
+from app.web_socket.manager import MongoPubSubManager
+from tests.test_query_plans import MONGO_TEST_URI
+
+
+# Workers sharing a mongod, each one a MongoPubSubManager or MongoPresenceStore
+# of its own. Skipped without a mongod, like tests/test_query_plans.py.
+MONGO_TEST_DBNAME: str = "socket_workers_test"
+
+
+class PresenceDatabase():
+    """The collections MongoPresenceStore uses from DatabaseConnection."""
+
+    def __init__(self, db: AsyncIOMotorDatabase):
+        self.presence = db.presence
+        self.presence_users = db.presence_users
+        self.counters = db.counters
+
+
+async def with_mongo(scenario: Callable[[AsyncIOMotorDatabase], Awaitable[None]]) -> None:
+    client: AsyncIOMotorClient = AsyncIOMotorClient(MONGO_TEST_URI, serverSelectionTimeoutMS=1000)
+    try :
+        await client.admin.command("ping")
+    except PyMongoError as err :
+        client.close()
+        pytest.skip(f"no mongod at {MONGO_TEST_URI}: {err}")
+
+    try :
+        await client.drop_database(MONGO_TEST_DBNAME)
+        await scenario(client.get_database(MONGO_TEST_DBNAME))
+
+    finally :
+        await client.drop_database(MONGO_TEST_DBNAME)
+        client.close()
+
+
+def pubsub_manager(db: AsyncIOMotorDatabase) -> MongoPubSubManager:
+    manager: MongoPubSubManager = MongoPubSubManager(collection=db.socket_events, capped_bytes=1 << 20)
+    manager.RETRY_SECONDS = 0.05
+    return manager
+
+
+async def listening(manager: MongoPubSubManager):
+    # The listener starts after what is already in the collection, so it has to be parked first.
+    listener = manager._listen()
+    first_event: asyncio.Task = asyncio.ensure_future(listener.__anext__())
+    await asyncio.sleep(0.5)
+    return listener, first_event
+
+
+async def received(listener, first_event: asyncio.Task, count: int) -> List[dict]:
+    events: List[dict] = [await asyncio.wait_for(first_event, 5)]
+    while len(events) < count:
+        events.append(await asyncio.wait_for(listener.__anext__(), 5))
+    return events
+
+
+def presence_store(monkeypatch, db: AsyncIOMotorDatabase, worker_id: str) -> MongoPresenceStore:
+    # One store per worker, the singleton is reset for each.
+    monkeypatch.setattr(MongoPresenceStore, "_instance", None)
+    monkeypatch.setattr(MongoPresenceStore, "_initialized", False)
+    store: MongoPresenceStore = MongoPresenceStore(db_instance=PresenceDatabase(db), settings=Settings(APP_NAME="test"))
+    store.worker_id = worker_id
+    return store
+
+
+async def stop_heartbeats(db: AsyncIOMotorDatabase, worker_id: str) -> None:
+    # What a crashed worker looks like to the others.
+    await db.presence.update_many({"worker_id": worker_id}, {"$set": {"seen_at": datetime.now(timezone.utc) - timedelta(hours=1)}})
+
+
+def test_events_arrive_in_publish_order_across_workers():
+
+    async def scenario(db: AsyncIOMotorDatabase) -> None:
+        worker_a, worker_b, worker_c = pubsub_manager(db), pubsub_manager(db), pubsub_manager(db)
+        listener, first_event = await listening(worker_c)
+
+        for index in range(10):
+            await (worker_a if index % 2 else worker_b)._publish({"method": "emit", "index": index})
+
+        assert [ event['index'] for event in await received(listener, first_event, 10) ] == list(range(10))
+
+        seqs: List[int] = [ event_doc['seq'] async for event_doc in db.socket_events.find({"data": {"$ne": None}}).sort([("$natural", 1)]) ]
+        assert seqs == sorted(seqs)
+        assert len(set(seqs)) == len(seqs)
+
+        await listener.aclose()
+
+    asyncio.run(with_mongo(scenario))
+
+
+def test_concurrent_publishers_are_delivered_once():
+
+    async def scenario(db: AsyncIOMotorDatabase) -> None:
+        worker_a, worker_b, worker_c = pubsub_manager(db), pubsub_manager(db), pubsub_manager(db)
+        listener, first_event = await listening(worker_c)
+
+        await asyncio.gather(*(
+            (worker_a if index % 2 else worker_b)._publish({"method": "emit", "index": index})
+            for index in range(20)
+        ))
+
+        assert sorted(event['index'] for event in await received(listener, first_event, 20)) == list(range(20))
+
+        await listener.aclose()
+
+    asyncio.run(with_mongo(scenario))
+
+
+def test_tail_reopens_where_it_left_off(monkeypatch):
+
+    async def scenario(db: AsyncIOMotorDatabase) -> None:
+        worker_a, worker_b = pubsub_manager(db), pubsub_manager(db)
+
+        cursors: list = []
+        find = worker_b.collection.find
+
+        def recording_find(*args, **kwargs):
+            cursors.append(find(*args, **kwargs))
+            return cursors[-1]
+
+        monkeypatch.setattr(worker_b.collection, "find", recording_find)
+        listener, first_event = await listening(worker_b)
+
+        await worker_a._publish({"method": "emit", "index": 0})
+        assert [ event['index'] for event in await received(listener, first_event, 1) ] == [0]
+
+        # The cursor dies under the listener, it has to come back after event 0 and before event 1.
+        await cursors[-1].close()
+        next_event: asyncio.Task = asyncio.ensure_future(listener.__anext__())
+        await asyncio.sleep(0.5)
+        assert len(cursors) > 1
+
+        for index in range(1, 4):
+            await worker_a._publish({"method": "emit", "index": index})
+
+        assert [ event['index'] for event in await received(listener, next_event, 3) ] == [1, 2, 3]
+
+        await listener.aclose()
+
+    asyncio.run(with_mongo(scenario))
+
+
+def test_only_one_worker_sees_the_first_and_last_socket(monkeypatch):
+
+    async def scenario(db: AsyncIOMotorDatabase) -> None:
+        worker_a: MongoPresenceStore = presence_store(monkeypatch, db, "worker_a")
+        worker_b: MongoPresenceStore = presence_store(monkeypatch, db, "worker_b")
+
+        joined: List[bool] = await asyncio.gather(
+            worker_a.add(sid="sid_a", user_id="user_alice"),
+            worker_b.add(sid="sid_b", user_id="user_alice"),
+        )
+        assert sorted(joined) == [False, True]
+        assert await worker_a.online_user_ids() == ["user_alice"]
+
+        left: List[str | None] = await asyncio.gather(
+            worker_a.remove(sid="sid_a"),
+            worker_b.remove(sid="sid_b"),
+        )
+        assert sorted(left, key=str) == [None, "user_alice"]
+        assert await db.presence_users.count_documents({}) == 0
+
+    asyncio.run(with_mongo(scenario))
+
+
+def test_reaper_removes_a_dead_workers_sids(monkeypatch):
+
+    async def scenario(db: AsyncIOMotorDatabase) -> None:
+        live_worker: MongoPresenceStore = presence_store(monkeypatch, db, "worker_live")
+        dead_worker: MongoPresenceStore = presence_store(monkeypatch, db, "worker_dead")
+
+        await dead_worker.add(sid="sid_alice", user_id="user_alice")
+        await dead_worker.add(sid="sid_bob_dead", user_id="user_bob")
+        await live_worker.add(sid="sid_bob_live", user_id="user_bob")
+        await stop_heartbeats(db, "worker_dead")
+
+        # Bob still has a socket on a live worker.
+        assert await live_worker._reap() == ["user_alice"]
+        assert await live_worker.online_user_ids() == ["user_bob"]
+        assert await db.presence.count_documents({"worker_id": "worker_dead"}) == 0
+        assert await db.presence_users.count_documents({"_id": "user_alice"}) == 0
+
+        # Another worker reaping the same sids finds nothing left to report.
+        other_worker: MongoPresenceStore = presence_store(monkeypatch, db, "worker_other")
+        assert await other_worker._reap() == []
+
+        # Nobody reaps their own sids, however late their heartbeat.
+        await stop_heartbeats(db, "worker_live")
+        assert await live_worker._reap() == []
+        assert await db.presence.count_documents({"worker_id": "worker_live"}) == 1
+
+    asyncio.run(with_mongo(scenario))
+
+
+def test_heartbeat_broadcasts_users_who_left_with_a_dead_worker(monkeypatch):
+
+    async def scenario(db: AsyncIOMotorDatabase) -> None:
+        live_worker: MongoPresenceStore = presence_store(monkeypatch, db, "worker_live")
+        dead_worker: MongoPresenceStore = presence_store(monkeypatch, db, "worker_dead")
+        live_worker.heartbeat_seconds = 0.05
+
+        departures: List[List[str]] = []
+
+        async def broadcast_left(user_ids: List[str]) -> None:
+            departures.append(user_ids)
+
+        await dead_worker.add(sid="sid_alice", user_id="user_alice")
+        await stop_heartbeats(db, "worker_dead")
+
+        # Added after start, which clears what a previous run of the worker left behind.
+        await live_worker.start(broadcast_left)
+        await live_worker.add(sid="sid_bob", user_id="user_bob")
+        deadline: float = asyncio.get_running_loop().time() + 5
+        while not departures and asyncio.get_running_loop().time() < deadline:
+            await asyncio.sleep(0.05)
+
+        # Bob is not reported, their socket is on the live worker. Its sids go with it on stop.
+        await live_worker.stop()
+        assert departures == [["user_alice"]]
+        assert await db.presence.count_documents({}) == 0
+        assert await db.presence_users.count_documents({}) == 0
+
+    asyncio.run(with_mongo(scenario))
@@ -0,0 +1,104 @@
+import os
+import asyncio
+
+from bson import ObjectId
+
+from typing import Dict, List
+
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from pymongo.errors import PyMongoError
+
+from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorDatabase
+
+from app.db.indexes import QUERY_PLANS, check_query_plans, ensure_indexes
+
+
+# Needs a mongod, a local one by default: MONGO_TEST_URI=mongodb://host:port python -m pytest
+MONGO_TEST_URI: str = os.environ.get("MONGO_TEST_URI", "mongodb://localhost:27017")
+MONGO_TEST_DBNAME: str = "query_plans_test"
+
+
+def seed_docs(count: int) -> Dict[str, List[dict]]:
+    created_at: datetime = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    album_ids: List[ObjectId] = [ ObjectId() for _ in range(max(1, count // 10)) ]
+    return {
+        "users": [
+            {"clerk_id": f"user_{index}", "email": f"user{index}@example.com", "full_name": f"User {index}"}
+            for index in range(count)
+        ],
+        "songs": [
+            {
+                "title": f"Song {index}",
+                "title_key": f"song {index}",
+                "artist": f"Artist {index % 7}",
+                "created_at": created_at + timedelta(minutes=index),
+                "album_id": album_ids[index % len(album_ids)] if index % 4 else None,
+            }
+            for index in range(count)
+        ],
+        "albums": [
+            {"_id": album_id, "title": f"Album {index}", "title_key": f"album {index}", "created_at": created_at + timedelta(hours=index)}
+            for index, album_id in enumerate(album_ids)
+        ],
+        "messages": [
+            {
+                "sender_id": f"user_{index % 5}",
+                "receiver_id": f"user_{(index + 1) % 5}",
+                "conversation_id": ":".join(sorted((f"user_{index % 5}", f"user_{(index + 1) % 5}"))),
+                "content": f"message {index}",
+                "created_at": created_at + timedelta(minutes=index),
+            }
+            for index in range(count)
+        ],
+        "conversations": [
+            {"user_id": f"user_{index % 10}", "peer_id": f"user_{index}", "last_message_at": created_at + timedelta(minutes=index)}
+            for index in range(count)
+        ],
+        "song_scores": [
+            {"updated_at": created_at + timedelta(minutes=index), "score": float(index)}
+            for index in range(count)
+        ],
+        "listens": [
+            {"user_id": f"user_{index % 10}", "song_id": ObjectId(), "plays": 1, "last_played_at": created_at + timedelta(minutes=index)}
+            for index in range(count)
+        ],
+        "catalog_versions": [
+            {"_id": f"album:{index}", "version": 1, "updated_at": created_at + timedelta(minutes=index)}
+            for index in range(count)
+        ],
+        "rollups": [
+            {"metric": "messages_sent", "start": created_at + timedelta(minutes=index), "value": index}
+            for index in range(count)
+        ],
+    }
+
+
+async def collection_scans() -> Dict[str, List[str]]:
+    client: AsyncIOMotorClient = AsyncIOMotorClient(MONGO_TEST_URI, serverSelectionTimeoutMS=1000)
+    try :
+        await client.admin.command("ping")
+    except PyMongoError as err :
+        client.close()
+        pytest.skip(f"no mongod at {MONGO_TEST_URI}: {err}")
+
+    try :
+        await client.drop_database(MONGO_TEST_DBNAME)
+        db: AsyncIOMotorDatabase = client.get_database(MONGO_TEST_DBNAME)
+
+        for collection_name, docs in seed_docs(200).items():
+            await db.get_collection(collection_name).insert_many(docs)
+
+        assert await ensure_indexes(db) == []
+        return await check_query_plans(db)
+
+    finally :
+        await client.drop_database(MONGO_TEST_DBNAME)
+        client.close()
+
+
+def test_hot_queries_use_an_index():
+    assert len(QUERY_PLANS) > 0
+    assert asyncio.run(collection_scans()) == {}
@@ -0,0 +1,60 @@
+from typing import Dict, List, Tuple
+
+from app.services.recommendation import build_recommendations
+
+
+# user -> songs played, as (song, plays). s0 and s1 go together, so do s2 and s3.
+PLAYS: Dict[str, List[Tuple[str, int]]] = {
+    "u0": [("s0", 3), ("s1", 2)],
+    "u1": [("s0", 1), ("s1", 4), ("s2", 1)],
+    "u2": [("s2", 2), ("s3", 5)],
+    "u3": [("s2", 1), ("s3", 1), ("s4", 2)],
+    "u4": [("s0", 1)],
+    "u5": [("s3", 2)],
+}
+
+
+def recommend(top_n: int, max_chunk_cells: int = 1 << 22) -> Dict[str, List[str]]:
+    user_ids: List[str] = list(PLAYS)
+    song_ids: List[str] = sorted({ song_id for plays in PLAYS.values() for song_id, _ in plays })
+
+    user_rows: List[int] = []
+    song_cols: List[int] = []
+    play_counts: List[int] = []
+    for user_id, plays in PLAYS.items():
+        for song_id, count in plays:
+            user_rows.append(user_ids.index(user_id))
+            song_cols.append(song_ids.index(song_id))
+            play_counts.append(count)
+
+    return build_recommendations(user_ids, song_ids, user_rows, song_cols, play_counts, top_n, max_chunk_cells=max_chunk_cells)
+
+
+def test_most_similar_song_comes_first():
+    recommendations = recommend(top_n=3)
+    assert recommendations["u4"][0] == "s1"
+    assert recommendations["u5"][0] == "s2"
+
+
+def test_top_n_and_no_played_songs():
+    recommendations = recommend(top_n=2)
+    for user_id, song_ids in recommendations.items():
+        assert len(song_ids) <= 2
+        assert len(set(song_ids)) == len(song_ids)
+        assert not set(song_ids) & { song_id for song_id, _ in PLAYS[user_id] }
+
+
+def test_only_songs_with_a_positive_score():
+    # s4 only ever co-occurs with s2 and s3, so nobody who never played those gets it.
+    recommendations = recommend(top_n=5)
+    assert "s4" not in recommendations["u0"]
+    assert "s4" not in recommendations["u4"]
+
+
+def test_chunking_does_not_change_results():
+    # One row per chunk against everything at once.
+    assert recommend(top_n=3, max_chunk_cells=1) == recommend(top_n=3)
+
+
+def test_empty_matrix():
+    assert build_recommendations([], [], [], [], [], top_n=5) == {}
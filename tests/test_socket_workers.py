@@ -0,0 +1,227 @@
+import uuid
+import asyncio
+
+from collections import defaultdict
+
+from typing import Awaitable, Callable, Dict, List, Tuple
+
+import pytest
+
+from engineio import packet as eio_packet
+
+from socketio import AsyncServer, packet
+
+from app.core.config import Settings
+from app.core.security import SessionTokenVerifier
+from app.errors.exceptions import InvalidSessionTokenError
+from app.schemas.auth import SessionClaims
+from app.services.search import SearchIndex
+from app.services.socket import SocketService
+from app.services.presence import LocalPresenceStore
+from app.services.activity import ActivityAggregator
+from app.services.trending import TrendingService
+from app.services.analytics import AnalyticsService
+from app.services.message_writer import MessageWriter
+from app.services.recommendation import RecommendationService
+from app.web_socket import serializer
+from app.web_socket.manager import LocalPubSubManager
+from app.web_socket.namespace import ChatNamespace
+
+
+# Two socket servers in one process, joined by LocalPubSubManager the way
+# workers are joined by MongoPubSubManager. Clients are driven at the
+# Socket.IO packet level, frames a server would send are recorded per socket.
+
+
+SINGLETONS = (
+    SessionTokenVerifier, SearchIndex, SocketService, LocalPresenceStore, ActivityAggregator,
+    TrendingService, AnalyticsService, MessageWriter, RecommendationService,
+)
+
+
+class FakeEngine():
+    """Stands in for the Engine.IO server under a socket server."""
+
+    async_mode = "asgi"
+
+    def __init__(self, **engineio_options):
+        self.frames: Dict[str, List[str]] = defaultdict(list)
+        self.sessions: Dict[str, dict] = dict()
+
+    def on(self, event: str, handler: Callable) -> None:
+        return None
+
+    def generate_id(self) -> str:
+        return uuid.uuid4().hex
+
+    async def send(self, eio_sid: str, data: str) -> None:
+        self.frames[eio_sid].append(data)
+
+    async def send_packet(self, eio_sid: str, eio_pkt: eio_packet.Packet) -> None:
+        self.frames[eio_sid].append(eio_pkt.data)
+
+    async def get_session(self, eio_sid: str) -> dict:
+        return self.sessions.setdefault(eio_sid, dict())
+
+    async def save_session(self, eio_sid: str, session: dict) -> None:
+        self.sessions[eio_sid] = session
+
+    def start_background_task(self, target: Callable[..., Awaitable], *args, **kwargs) -> asyncio.Task:
+        return asyncio.ensure_future(target(*args, **kwargs))
+
+    async def sleep(self, seconds: float = 0) -> None:
+        await asyncio.sleep(seconds)
+
+
+class WorkerServer(AsyncServer):
+
+    def _engineio_server_class(self):
+        return FakeEngine
+
+    def events(self, eio_sid: str) -> List[Tuple[str, object]]:
+        decoded: List[packet.Packet] = [ packet.Packet(encoded_packet=frame) for frame in self.eio.frames[eio_sid] ]
+        return [ (pkt.data[0], pkt.data[1]) for pkt in decoded if pkt.packet_type == packet.EVENT ]
+
+    def packet_types(self, eio_sid: str) -> List[int]:
+        return [ packet.Packet(encoded_packet=frame).packet_type for frame in self.eio.frames[eio_sid] ]
+
+
+async def verify(token: str) -> SessionClaims:
+    # The token is the user id, anything else is rejected like a bad signature.
+    if not token.startswith("user_"):
+        raise InvalidSessionTokenError("Invalid session token - malformed header")
+    return SessionClaims(sub=token, iat=0, exp=2 ** 31)
+
+
+async def write(message_doc: dict) -> None:
+    return None
+
+
+async def wait_for(predicate: Callable[[], bool], timeout: float = 2.0) -> None:
+    # Frames from the other server come in through the bus task.
+    deadline: float = asyncio.get_running_loop().time() + timeout
+    while not predicate():
+        if asyncio.get_running_loop().time() > deadline:
+            raise AssertionError("timed out waiting for the other worker")
+        await asyncio.sleep(0.01)
+
+
+async def connect(server: WorkerServer, eio_sid: str, token: str | None) -> None:
+    await server._handle_eio_connect(eio_sid, {})
+    auth: str = serializer.dumps({"token": token}) if token else ""
+    await server._handle_eio_message(eio_sid, f"{packet.CONNECT}{auth}")
+
+
+async def send(server: WorkerServer, eio_sid: str, event: str, data: object) -> None:
+    await server._handle_eio_message(eio_sid, f"{packet.EVENT}{serializer.dumps([event, data])}")
+
+
+@pytest.fixture
+def workers(monkeypatch) -> Tuple[WorkerServer, WorkerServer]:
+    for singleton in SINGLETONS:
+        monkeypatch.setattr(singleton, "_instance", None)
+        monkeypatch.setattr(singleton, "_initialized", False)
+
+    settings: Settings = Settings(APP_NAME="test", SOCKET_MANAGER="local")
+    session_verifier: SessionTokenVerifier = SessionTokenVerifier(settings=settings)
+    monkeypatch.setattr(session_verifier, "verify", verify)
+    message_writer: MessageWriter = MessageWriter(db_instance=None, settings=settings)
+    monkeypatch.setattr(message_writer, "write", write)
+
+    # Both workers share one presence store, like MongoPresenceStore in production.
+    socket_service: SocketService = SocketService(
+        db_instance=None,
+        message_writer=message_writer,
+        presence_store=LocalPresenceStore(),
+        settings=settings
+    )
+
+    channel: str = uuid.uuid4().hex
+    servers: List[WorkerServer] = []
+    for _ in range(2):
+        server: WorkerServer = WorkerServer(json=serializer, async_handlers=False, client_manager=LocalPubSubManager(channel=channel))
+        server.register_namespace(ChatNamespace(
+            namespace="/",
+            session_verifier=session_verifier,
+            search_index=SearchIndex(db_instance=None),
+            socket_service=socket_service,
+            trending_service=TrendingService(db_instance=None, settings=settings),
+            recommendation_service=RecommendationService(db_instance=None, settings=settings),
+            analytics_service=AnalyticsService(db_instance=None, settings=settings),
+            activity_aggregator=ActivityAggregator(settings=settings)
+        ))
+        servers.append(server)
+
+    yield servers[0], servers[1]
+    LocalPubSubManager._inboxes.pop(channel, None)
+
+
+async def stop(*servers: WorkerServer) -> None:
+    for server in servers:
+        server.manager.thread.cancel()
+
+
+def test_message_reaches_receiver_on_other_worker(workers):
+    worker_a, worker_b = workers
+
+    async def scenario() -> None:
+        await connect(worker_b, "bob", "user_bob")
+        await send(worker_b, "bob", "user_connected", {})
+        await connect(worker_a, "alice", "user_alice")
+        await send(worker_a, "alice", "user_connected", {})
+
+        # The sender field comes from alice's session, not from the payload.
+        await send(worker_a, "alice", "send_message", {"senderId": "user_mallory", "receiverId": "user_bob", "content": "hi"})
+
+        await wait_for(lambda: any(event == "receive_message" for event, _ in worker_b.events("bob")))
+        message: dict = next(data for event, data in worker_b.events("bob") if event == "receive_message")
+        assert message['senderId'] == "user_alice"
+        assert message['receiverId'] == "user_bob"
+        assert message['content'] == "hi"
+        assert any(event == "message_sent" for event, _ in worker_a.events("alice"))
+
+        await stop(worker_a, worker_b)
+
+    asyncio.run(scenario())
+
+
+def test_presence_from_one_worker_is_visible_on_the_other(workers):
+    worker_a, worker_b = workers
+
+    async def scenario() -> None:
+        await connect(worker_b, "bob", "user_bob")
+        await send(worker_b, "bob", "user_connected", {})
+        await connect(worker_a, "alice", "user_alice")
+        await send(worker_a, "alice", "user_connected", {})
+
+        await wait_for(lambda: any(event == "presence_delta" for event, _ in worker_b.events("bob")))
+        joined: dict = next(data for event, data in worker_b.events("bob") if event == "presence_delta")
+        assert joined['joined'] == ["user_alice"]
+
+        # A snapshot taken on b after alice joined on a includes her.
+        await send(worker_b, "bob", "presence_resync", None)
+        snapshot: dict = [ data for event, data in worker_b.events("bob") if event == "presence_snapshot" ][-1]
+        assert ["user_alice", "Idle"] in snapshot['users']
+        assert snapshot['version'] == joined['version']
+
+        await worker_a._handle_eio_message("alice", f"{packet.DISCONNECT}")
+        await wait_for(lambda: any(event == "presence_delta" and "left" in data for event, data in worker_b.events("bob")))
+        left: dict = [ data for event, data in worker_b.events("bob") if event == "presence_delta" ][-1]
+        assert left['left'] == ["user_alice"]
+        assert left['version'] > joined['version']
+
+        await stop(worker_a, worker_b)
+
+    asyncio.run(scenario())
+
+
+def test_socket_without_valid_session_is_refused(workers):
+    worker_a, _ = workers
+
+    async def scenario() -> None:
+        await connect(worker_a, "anonymous", None)
+        await connect(worker_a, "forged", "not-a-token")
+        assert worker_a.packet_types("anonymous") == [packet.CONNECT_ERROR]
+        assert worker_a.packet_types("forged") == [packet.CONNECT_ERROR]
+
+    asyncio.run(scenario())